@@ -154,5 +154,8 @@ class GnuToolchainConan(ConanFile):
         for opt in self._other_impl.options.keys():
             if opt not in self._impl.options.keys():
                 self.info.options.rm_safe(opt)
+        # Remove options that do not affect content of the package
+        for opt in self._impl.local_options:
+            self.info.options.rm_safe(opt)
 
 # ================================================================================================================================== #
@@ -82,6 +82,13 @@ class Binutils(Common, BinutilsDescription):
         'lib',
     ]
 
+    # Testsuites are never run by the build
+    source_excludes = [
+        'binutils/testsuite',
+        'gas/testsuite',
+        'ld/testsuite',
+    ]
+
 # =============================================================== GCC ============================================================== #
     
 class GccCommon(Common, GccDescription):
@@ -113,6 +120,24 @@ class GccCommon(Common, GccDescription):
         
     ]
 
+    # ---------------------------------------------------------------------------
+    # @brief Aliases of multilibs of the 'rmprofile' that may be selected by the
+    #    `multilibs` option (or the `multilibs` attribute of the descriptor) to
+    #    build only a subset of them, e.g.
+    #
+    #       -o "&:multilibs=cortex-m4f,cortex-m7"
+    #
+    # @note Code built for other cores is linked against the default multilib
+    # ---------------------------------------------------------------------------
+    multilib_aliases = {
+        'cortex-m0'  : 'mthumb/march=armv6s-m/mfloat-abi=soft',
+        'cortex-m3'  : 'mthumb/march=armv7-m/mfloat-abi=soft',
+        'cortex-m4'  : 'mthumb/march=armv7e-m/mfloat-abi=soft',
+        'cortex-m4f' : 'mthumb/march=armv7e-m+fp/mfloat-abi=hard',
+        'cortex-m7'  : 'mthumb/march=armv7e-m+fp.dp/mfloat-abi=hard',
+        'cortex-m33' : 'mthumb/march=armv8-m.main+fp/mfloat-abi=hard',
+    }
+
 class NewlibCommon(Common, NewlibDescription):
 
     config = [
@@ -415,6 +440,11 @@ class GdbPython(GdbCommon):
     name = 'gdb'
 
     with_python = True
+
+    # Reuse libraries built by the GDB stage without Python (only the debugger itself is rebuilt)
+    share_build_with = [
+        'gdb-no-python',
+    ]
     
     config = GdbCommon.config + [
         "--program-suffix=-py",
@@ -0,0 +1,1233 @@
+# ====================================================================================================================================
+# @file       harness.py
+# @author     Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @maintainer Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @date       Monday, 19th October 2026 6:41:12 pm
+# @modified   Monday, 19th October 2026 6:41:12 pm by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+#
+#
+# @copyright Krzysztof Pierczyk © 2026
+# ====================================================================================================================================
+
+"""
+Hermetic harness running the build drivers (FromSourceDriver, AutotoolsPackage and friends) against fake autotools
+projects. Fake `configure` scripts and a fake `make` simulate durations, CPU usage and outputs of the real tools, so
+the orchestration (step tags, stage cache, autoconf cache, shared build trees, install snapshots, staged installs,
+packaging, parallel stages) can be benchmarked and regression-tested in seconds without building the toolchain.
+
+Usage:
+
+    python harness.py [--scenario NAME ...] [--work-dir DIR] [--profile profile.json] [--scale 1.0] [--jobs N]
+                      [--target arm-none-eabi] [-o name=value ...] [--verbose]
+
+Scenarios (all by default, in this order):
+
+    cold     : build from scratch (seeds the shared stage cache)
+    noop     : rebuild the `cold` build folder (no tool may be run)
+    cached   : build in a new folder with the stage cache seeded by `cold` (no tool may be run)
+    parallel : build from scratch with `parallel_stages=3` (must produce the same package as `cold`)
+    overlap  : like `parallel`, but GDB is installed before the cleanup of `gcc_newlib` removing the `include`
+               directory (must produce the same package as `cold`)
+    resume   : build failing in the `gcc_newlib` stage, then resume it (must produce the same package as `cold`)
+    download : download a file from local HTTP mirrors (chunks, validators of mirrors, resume; no build)
+
+Fake projects are described by the profile (see `DEFAULT_PROFILE`; the `--profile` file is merged into it). For each
+component it gives the number of source files, the number of configure checks (shared ones are subject to the autoconf
+cache), subdirectories of the build tree and, for each make target, the number and duration of compile units (run in
+parallel with respect to `-j` and the jobserver, each one busy for the `cpu` fraction of its duration) and files it
+builds or installs. The report (durations, numbers of fake tool runs, CPU time and results of checks) is printed and
+saved into `<work-dir>/harness-report.json`.
+
+The script is also the implementation of fake tools (`python harness.py configure|make ...`).
+"""
+
+# ============================================================= Imports ============================================================ #
+
+# System imports
+import argparse
+import concurrent.futures
+import copy
+import hashlib
+import http.server
+import io
+import json
+import os
+import pathlib
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+
+# ============================================================= Profile ============================================================ #
+
+# Multilibs reported by the fake compiler driver (-print-multi-lib)
+DEFAULT_MULTILIBS = [
+    [ '.',                       ''                                               ],
+    [ 'thumb/v6-m/nofp',         '@mthumb@march=armv6s-m@mfloat-abi=soft'         ],
+    [ 'thumb/v7-m/nofp',         '@mthumb@march=armv7-m@mfloat-abi=soft'          ],
+    [ 'thumb/v7e-m/nofp',        '@mthumb@march=armv7e-m@mfloat-abi=soft'         ],
+    [ 'thumb/v7e-m+fp/hard',     '@mthumb@march=armv7e-m+fp@mfloat-abi=hard'      ],
+    [ 'thumb/v7e-m+dp/hard',     '@mthumb@march=armv7e-m+fp.dp@mfloat-abi=hard'   ],
+    [ 'thumb/v8-m.main+fp/hard', '@mthumb@march=armv8-m.main+fp@mfloat-abi=hard'  ],
+]
+
+# Targets installing documentation (common to all components)
+DEFAULT_DOC_TARGETS = {
+    'install-html' : { 'units' : 2, 'unit' : 0.005, 'install' : { '{htmldir}/{component}/index.html' : 16384 } },
+    'install-pdf'  : { 'units' : 2, 'unit' : 0.005, 'install' : { '{pdfdir}/{component}.pdf'          : 65536 } },
+}
+
+# Description of fake projects (durations in seconds, sizes in bytes). Install paths are relative to the prefix
+# unless they start with a directory placeholder ({prefix}, {htmldir}, {pdfdir}, {infodir}, {mandir}). Paths holding
+# {multilib} (directory of the multilib) or {multilib_dir} (<target>/lib/<multilib>) are installed for each multilib.
+# Files installed with the '@driver' content are fake compiler drivers reporting multilibs.
+DEFAULT_PROFILE = {
+
+    'binutils' : {
+        'source'    : { 'files' : 400, 'size' : 2048, 'subtrees' : [ 'binutils/testsuite', 'gas/testsuite', 'ld/testsuite' ] },
+        'configure' : { 'checks' : 150, 'check' : 0.001 },
+        'subdirs'   : [ 'bfd', 'opcodes', 'libiberty', 'libctf', 'libsframe', 'zlib', 'binutils', 'gas', 'ld', 'gprof' ],
+        'targets'   : {
+            'all'     : { 'units' : 120, 'unit' : 0.005, 'size' : 16384 },
+            'install' : { 'units' : 4, 'unit' : 0.005, 'install' : {
+                **{ f'bin/{{target}}-{tool}' : 262144 for tool in [ 'as', 'ld', 'ar', 'nm', 'objcopy', 'objdump', 'ranlib', 'readelf', 'size', 'strip' ] },
+                **{ f'{{target}}/bin/{tool}' : 262144 for tool in [ 'as', 'ld', 'ar', 'nm', 'objcopy', 'objdump', 'ranlib', 'strip' ] },
+                '{target}/lib/ldscripts/armelf.x' : 8192,
+                'lib/libbfd.a'                    : 131072,
+                '{infodir}/binutils.info'         : 32768,
+            } },
+            **DEFAULT_DOC_TARGETS,
+        },
+    },
+
+    'gcc' : {
+        'source'    : { 'files' : 1200, 'size' : 2048, 'subtrees' : [ 'gcc/testsuite', 'gcc/ada', 'gcc/go', 'gcc/fortran', 'gcc/d', 'gcc/m2', 'gcc/rust', 'libgo', 'libphobos', 'libgfortran', 'libada' ] },
+        'configure' : { 'checks' : 300, 'check' : 0.001 },
+        'subdirs'   : [ 'libiberty', 'libcpp', 'libdecnumber', 'libbacktrace', 'fixincludes', 'lto-plugin', 'gcc' ],
+        'multilibs' : DEFAULT_MULTILIBS,
+        'targets'   : {
+            'all-gcc'     : { 'units' : 200, 'unit' : 0.005, 'size' : 32768 },
+            'install-gcc' : { 'units' : 4, 'unit' : 0.005, 'install' : {
+                'bin/{target}-gcc'                     : '@driver',
+                'bin/{target}-cpp'                     : 262144,
+                'bin/{target}-gccbug'                  : 1024,
+                'lib/gcc/{target}/{version}/cc1'       : 1048576,
+                'lib/gcc/{target}/{version}/collect2'  : 131072,
+                'lib/gcc/{target}/{version}/include/stddef.h' : 4096,
+                'lib/libiberty.a'                      : 65536,
+                'include/libiberty.h'                  : 4096,
+            } },
+            'all'         : { 'units' : 400, 'unit' : 0.005, 'size' : 32768 },
+            'install'     : { 'units' : 8, 'unit' : 0.005, 'install' : {
+                'bin/{target}-gcc'                     : '@driver',
+                'bin/{target}-g++'                     : '@driver',
+                'bin/{target}-cpp'                     : 262144,
+                'bin/{target}-gccbug'                  : 1024,
+                'lib/gcc/{target}/{version}/cc1'       : 1048576,
+                'lib/gcc/{target}/{version}/cc1plus'   : 1048576,
+                'lib/gcc/{target}/{version}/lto1'      : 1048576,
+                'lib/gcc/{target}/{version}/collect2'  : 131072,
+                'lib/gcc/{target}/{version}/include/stddef.h' : 4096,
+                'lib/gcc/{target}/{version}/{multilib}/libgcc.a' : 65536,
+                'lib/gcc/{target}/{version}/{multilib}/crtbegin.o' : 2048,
+                '{multilib_dir}/libstdc++.a'           : 262144,
+                '{multilib_dir}/libsupc++.a'           : 65536,
+                '{multilib_dir}/libiberty.a'           : 65536,
+                '{target}/include/c++/{version}/vector' : 8192,
+                'lib/libiberty.a'                      : 65536,
+                'include/libiberty.h'                  : 4096,
+                '{infodir}/gcc.info'                   : 65536,
+            } },
+            **DEFAULT_DOC_TARGETS,
+        },
+    },
+
+    'newlib' : {
+        'source'    : { 'files' : 300, 'size' : 2048, 'subtrees' : [ 'newlib/testsuite' ] },
+        'configure' : { 'checks' : 100, 'check' : 0.001 },
+        'subdirs'   : [ 'newlib', 'libgloss' ],
+        'multilibs' : DEFAULT_MULTILIBS,
+        'targets'   : {
+            'all'     : { 'units' : 250, 'unit' : 0.005, 'size' : 8192 },
+            'pdf'     : { 'units' : 2, 'unit' : 0.005, 'outputs' : { '{target}/newlib/libc/libc.pdf' : 65536 } },
+            'html'    : { 'units' : 2, 'unit' : 0.005, 'outputs' : { '{target}/newlib/libc/libc.html' : 16384 } },
+            'install' : { 'units' : 4, 'unit' : 0.005, 'install' : {
+                **{ f'{{multilib_dir}}/{name}' : 65536 for name in [ 'libc.a', 'libg.a', 'libm.a', 'librdimon.a' ] },
+                **{ f'{{multilib_dir}}/{name}' : 1024  for name in [ 'nano.specs', 'rdimon.specs', 'nosys.specs', 'crt0.o', 'rdimon-crt0.o' ] },
+                '{target}/include/newlib.h' : 2048,
+                '{target}/include/stdio.h'  : 8192,
+            } },
+        },
+    },
+
+    'gdb' : {
+        'source'    : { 'files' : 600, 'size' : 2048, 'subtrees' : [ 'gdb/testsuite' ] },
+        'configure' : { 'checks' : 250, 'check' : 0.001 },
+        'subdirs'   : [ 'bfd', 'opcodes', 'libiberty', 'libctf', 'libsframe', 'libdecnumber', 'libbacktrace', 'zlib', 'readline', 'gnulib', 'gdbsupport', 'gdb', 'sim' ],
+        'targets'   : {
+            'all'     : { 'units' : 260, 'unit' : 0.005, 'size' : 16384 },
+            'install' : { 'units' : 4, 'unit' : 0.005, 'install' : {
+                'bin/{target}-gdb{suffix}'         : 2097152,
+                'bin/{target}-gdb-add-index{suffix}' : 4096,
+                '{target}/share/gdb/syscalls/arm-linux.xml' : 8192,
+                'include/gdb/jit-reader.h'         : 4096,
+                '{infodir}/gdb.info'               : 65536,
+            } },
+            **DEFAULT_DOC_TARGETS,
+        },
+    },
+
+}
+
+# Target of make used for targets not described by the profile
+DEFAULT_TARGET = { 'units' : 1, 'unit' : 0.01 }
+
+# Share of configure checks whose results may be shared by the autoconf cache (the rest is specific to the project)
+SHARED_CHECKS_RATIO = 0.8
+
+# ======================================================== Helper functions ======================================================== #
+
+def format_duration(seconds : float) -> str:
+    minutes, seconds = divmod(seconds, 60)
+    return f'{int(minutes)}:{seconds:06.3f}'
+
+def merge_profiles(base : dict, update : dict) -> dict:
+    """Returns copy of `base` with `update` merged in recursively"""
+
+    result = copy.deepcopy(base)
+    for name, value in update.items():
+        if isinstance(value, dict) and isinstance(result.get(name), dict):
+            result[name] = merge_profiles(result[name], value)
+        else:
+            result[name] = copy.deepcopy(value)
+
+    return result
+
+def scale_profile(profile : dict, scale : float) -> dict:
+    """Returns copy of the `profile` with all durations multiplied by `scale`"""
+
+    result = copy.deepcopy(profile)
+    for component in result.values():
+        component.get('configure', { })['check'] = component.get('configure', { }).get('check', 0.0) * scale
+        for target in component.get('targets', { }).values():
+            target['unit'] = target.get('unit', 0.0) * scale
+
+    return result
+
+def burn(
+    duration : float,
+    cpu      : float = 1.0,
+):
+    """Keeps the CPU busy for the `cpu` fraction of the `duration` and sleeps for the rest of it"""
+
+    end = time.process_time() + duration * cpu
+    while time.process_time() < end:
+        pass
+    time.sleep(max(0.0, duration * (1.0 - cpu)))
+
+def log_invocation(**record):
+    """Appends the `record` to the log of fake tools invocations (if enabled)"""
+
+    path = os.environ.get('FAKE_AUTOTOOLS_LOG')
+    if path:
+        with open(path, 'a') as file:
+            file.write(json.dumps(record) + '\n')
+
+def file_content(
+    seed : str,
+    size : int,
+) -> bytes:
+    """Returns deterministic content of the fake file"""
+
+    block = hashlib.sha256(seed.encode()).digest() * 64
+    return (block * (size // len(block) + 1))[:size]
+
+def driver_script(
+    multilibs : list,
+    version   : str,
+) -> str:
+    """Returns the fake compiler driver reporting `multilibs`"""
+
+    lines = ' '.join(f"'{directory};{flags}'" for directory, flags in multilibs)
+
+    return '\n'.join([
+        '#!/bin/sh',
+        '# Fake compiler driver (generated by the fake autotools harness)',
+        'case "$1" in',
+        f'    -print-multi-lib) printf \'%s\\n\' {lines} ;;',
+        f'    --version|-dumpversion) echo "{version}" ;;',
+        'esac',
+        'exit 0',
+    ]) + '\n'
+
+# ========================================================= Fake configure ========================================================= #
+
+# Configure script put into fake sources. It sources the site script (as autoconf does) to find out which checks
+# have cached results and hands over to the fake configure implemented by this script.
+CONFIGURE_SCRIPT = '''\
+#!/bin/sh
+# Fake configure script (generated by the fake autotools harness)
+cache_file=/dev/null
+for fake_arg in "$@"; do
+    case "$fake_arg" in
+        --build=*)        build_alias="${{fake_arg#--build=}}" ;;
+        --host=*)         host_alias="${{fake_arg#--host=}}" ;;
+        --target=*)       target_alias="${{fake_arg#--target=}}" ;;
+        --cache-file=*)   cache_file="${{fake_arg#--cache-file=}}" ;;
+        -C|--config-cache) cache_file=./config.cache ;;
+    esac
+done
+if test -n "$CONFIG_SITE"; then
+    for fake_site in $CONFIG_SITE; do
+        if test -r "$fake_site"; then
+            . "$fake_site"
+        fi
+    done
+fi
+fake_cached=
+for fake_check in {checks}; do
+    if eval "test \\"\\${{$fake_check+set}}\\" = set"; then
+        fake_cached="$fake_cached $fake_check"
+    fi
+done
+FAKE_CACHED_CHECKS="$fake_cached" FAKE_CACHE_FILE="$cache_file" exec "${{FAKE_AUTOTOOLS_PYTHON:-python3}}" "$FAKE_AUTOTOOLS_HARNESS" configure "$0" "$@"
+'''
+
+def fake_configure(argv : list) -> int:
+
+    """Fake configure: spends time on checks without cached results, writes the cache, makefiles (also in
+    subdirectories which do not hold one yet, as the top-level configure does) and the fake config read by
+    the fake make
+    """
+
+    start   = time.monotonic()
+    srcdir  = pathlib.Path(argv[0]).parent.absolute()
+    project = json.loads((srcdir / 'fake-project.json').read_text())
+
+    # Parse options
+    options = { }
+    for arg in argv[1:]:
+        if arg.startswith('--') and ('=' in arg):
+            name, _, value = arg[2:].partition('=')
+            options[name] = value
+    prefix  = options.get('prefix', '/usr/local')
+    target  = options.get('target', options.get('host', 'unknown'))
+
+    # Run checks without cached results
+    checks = project['configure']['checks']
+    cached = set(os.environ.get('FAKE_CACHED_CHECKS', '').split()) & set(checks)
+    print(f'configure: running {len(checks) - len(cached)} checks ({len(cached)} cached)', flush = True)
+    burn((len(checks) - len(cached)) * project['configure'].get('check', 0.0), project['configure'].get('cpu', 1.0))
+
+    build = pathlib.Path.cwd()
+
+    # Save results of checks
+    cache_file = os.environ.get('FAKE_CACHE_FILE', '/dev/null')
+    if cache_file != '/dev/null':
+        (build / cache_file).write_text(''.join(f'{check}=${{{check}=yes}}\n' for check in checks))
+
+    # Write the fake config
+    config = {
+        'srcdir'    : srcdir.as_posix(),
+        'component' : project['component'],
+        'version'   : project['version'],
+        'target'    : target,
+        'prefix'    : prefix,
+        'suffix'    : options.get('program-suffix', ''),
+        'dirs'      : { name : options.get(name, f'{prefix}/share/{name.removesuffix("dir")}') for name in [ 'htmldir', 'pdfdir', 'infodir', 'mandir' ] },
+        'args'      : argv[1:],
+    }
+    (build / 'fake-config.json').write_text(json.dumps(config, indent = 4))
+    (build / 'config.log').write_text(
+        f'This file contains fake messages of configure\n\n$ {argv[0]} {" ".join(argv[1:])}\n\n'
+        '## ---------------- ##\n## Cache variables. ##\n## ---------------- ##\n\n' +
+        ''.join(f'{check}=yes\n' for check in checks)
+    )
+    (build / 'config.status').write_text('#!/bin/sh\n# Fake config.status\n')
+    (build / 'Makefile').write_text('# Fake makefile\n')
+
+    # Configure subdirectories (shared ones already hold makefiles)
+    for subdir in project.get('subdirs', [ ]):
+        if not (build / subdir / 'Makefile').exists():
+            (build / subdir).mkdir(parents = True, exist_ok = True)
+            (build / subdir / 'Makefile').write_text('# Fake makefile\n')
+
+    log_invocation(tool = 'configure', stage = build.name, component = project['component'],
+        checks = len(checks), cached = len(cached), duration = time.monotonic() - start)
+
+    return 0
+
+# ============================================================ Fake make =========================================================== #
+
+def _parse_make_args(argv : list) -> tuple:
+    """Parses make arguments into (targets, variables, jobs, directory); `jobs` is None if not given and 0 if unlimited"""
+
+    targets, variables, jobs, directory = [ ], { }, None, None
+
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg in [ '-j', '--jobs' ]:
+            jobs = int(args.pop(0)) if (args and args[0].isdigit()) else 0
+        elif re.fullmatch(r'-j\d+', arg):
+            jobs = int(arg[2:])
+        elif arg.startswith('--jobs='):
+            jobs = int(arg.removeprefix('--jobs='))
+        elif arg == '-C':
+            directory = args.pop(0)
+        elif arg.startswith('-'):
+            continue
+        elif '=' in arg:
+            name, _, value = arg.partition('=')
+            variables[name] = value
+        else:
+            targets.append(arg)
+
+    return (targets or [ 'all' ], variables, jobs, directory)
+
+class _JobSlots:
+
+    """Job slots of the fake make: the implicit one plus tokens of the jobserver (if any) or up to `jobs` local ones.
+    The jobserver is polled through its own (non-blocking) description so that waiting for a token does not prevent
+    taking the implicit slot when it is released.
+    """
+
+    def __init__(self,
+        jobs : int | None,
+    ):
+        self._fd       = None
+        self._implicit = threading.Lock()
+        self._local    = None
+
+        # Connect to the jobserver (unless the number of jobs is given explicitly, as make does)
+        auth = re.search(r'--jobserver-auth=(\S+)', os.environ.get('MAKEFLAGS', ''))
+        if (jobs is None or jobs == 0) and (auth is not None):
+            if auth.group(1).startswith('fifo:'):
+                path = auth.group(1).removeprefix('fifo:')
+            else:
+                path = f'/proc/self/fd/{auth.group(1).split(",")[0]}'
+            self._fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+        elif jobs:
+            self._local = threading.Semaphore(max(0, jobs - 1))
+
+    def acquire(self) -> str:
+        while self._fd is not None:
+            if self._implicit.acquire(blocking = False):
+                return 'implicit'
+            try:
+                return os.read(self._fd, 1).decode(errors = 'replace') or '+'
+            except BlockingIOError:
+                time.sleep(0.005)
+        if self._implicit.acquire(blocking = False):
+            return 'implicit'
+        if self._local is not None:
+            self._local.acquire()
+        return 'local'
+
+    def release(self, slot : str):
+        if slot == 'implicit':
+            self._implicit.release()
+        elif self._fd is not None:
+            os.write(self._fd, slot.encode())
+        elif self._local is not None:
+            self._local.release()
+
+    @property
+    def jobserver(self) -> bool:
+        return self._fd is not None
+
+def fake_make(argv : list) -> int:
+
+    """Fake make: runs compile units of requested targets (of all of them together, as independent targets given
+    on the command line are built in parallel), writes their outputs and installs files. Targets already built in
+    a subdirectory of the build tree (e.g. one shared with another stage) are skipped there.
+    """
+
+    if '--version' in argv:
+        print('GNU Make 4.3 (fake autotools harness)')
+        return 0
+
+    start = time.monotonic()
+
+    targets, variables, jobs, directory = _parse_make_args(argv)
+    build = pathlib.Path(directory or '.').absolute()
+
+    # Load the fake config written by configure
+    if not (build / 'fake-config.json').exists():
+        print('make: *** No targets specified and no makefile found.  Stop.', file = sys.stderr)
+        return 2
+    config  = json.loads((build / 'fake-config.json').read_text())
+    project = json.loads((pathlib.Path(config['srcdir']) / 'fake-project.json').read_text())
+
+    # Fail if requested (e.g. to test resuming of builds)
+    failures = [ entry.strip() for entry in os.environ.get('FAKE_AUTOTOOLS_FAIL', '').split(',') if entry.strip() ]
+    for target in targets:
+        if f'{build.name}:{target}' in failures:
+            print(f"make: *** [Makefile] Error 1 (failure of '{target}' injected by the harness)", file = sys.stderr)
+            log_invocation(tool = 'make', stage = build.name, targets = targets, units = 0, failed = True, duration = time.monotonic() - start)
+            return 2
+
+    # Wait for files of other stages if requested (e.g. to make stages overlap in a given order)
+    waits = [ entry.strip().partition('=') for entry in os.environ.get('FAKE_AUTOTOOLS_WAIT', '').split(',') if entry.strip() ]
+    for name, _, path in waits:
+        if name in [ f'{build.name}:{target}' for target in targets ]:
+            deadline = time.monotonic() + 60
+            while not (pathlib.Path(config['prefix']) / path).exists():
+                if time.monotonic() > deadline:
+                    print(f"make: *** [Makefile] Error 1 ('{path}' awaited by '{name}' has not appeared)", file = sys.stderr)
+                    log_invocation(tool = 'make', stage = build.name, targets = targets, units = 0, failed = True, duration = time.monotonic() - start)
+                    return 2
+                time.sleep(0.05)
+
+    placeholders = {
+        'target'    : config['target'],
+        'version'   : config['version'],
+        'component' : config['component'],
+        'suffix'    : config['suffix'],
+        'prefix'    : config['prefix'],
+        **config['dirs'],
+    }
+    multilibs = project.get('multilibs', [ [ '.', '' ] ])
+
+    def expand(template : str) -> list:
+        """Expands placeholders of the path (multilib ones into all multilibs)"""
+        paths = [ ]
+        for directory, _ in (multilibs if ('{multilib' in template) else [ [ '.', '' ] ]):
+            multilib     = '' if (directory == '.') else directory
+            multilib_dir = f'{config["target"]}/lib' + (f'/{multilib}' if multilib else '')
+            paths.append(template.format(**placeholders, multilib = multilib, multilib_dir = multilib_dir))
+        return [ re.sub(r'/+', '/', path).rstrip('/') for path in paths ]
+
+    # Collect work to be done
+    units   = [ ]
+    actions = [ ]
+    for target in targets:
+
+        description = project.get('targets', { }).get(target, DEFAULT_TARGET)
+        count       = int(description.get('units', 1))
+        unit        = (float(description.get('unit', 0.0)), float(description.get('cpu', 1.0)))
+
+        # Remove outputs of builds
+        if target == 'clean':
+            for subdir in project.get('subdirs', [ ]) + [ '.' ]:
+                if (build / subdir).is_dir() and not (build / subdir).is_symlink():
+                    for path in (build / subdir).glob('.fake-*.done'):
+                        path.unlink()
+                    for path in (build / subdir).glob('fake-*.o'):
+                        path.unlink()
+            continue
+
+        # Install files
+        if 'install' in description:
+            units += [ unit ] * count
+            actions.append(('install', target, description['install']))
+            continue
+
+        # Build outputs in subdirectories that have not been built yet
+        subdirs = project.get('subdirs', [ ]) or [ '.' ]
+        pending = [ subdir for subdir in subdirs if not (build / subdir / f'.fake-{target}.done').exists() ]
+        units  += [ unit ] * ((count * len(pending) + len(subdirs) - 1) // len(subdirs))
+        actions.append(('build', target, (pending, count // len(subdirs), description)))
+
+    # Run compile units in parallel
+    slots   = _JobSlots(jobs)
+    if jobs is None:
+        workers = 64 if slots.jobserver else 1
+    else:
+        workers = jobs or 64
+
+    def run_unit(pool, unit):
+        slot = slots.acquire()
+        try:
+            pool.submit(burn, *unit).result()
+        finally:
+            slots.release(slot)
+
+    if units:
+        print(f"make: building {', '.join(targets)} ({len(units)} units)", flush = True)
+        with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as pool:
+            with concurrent.futures.ThreadPoolExecutor(max_workers = workers) as executor:
+                list(executor.map(lambda unit: run_unit(pool, unit), units))
+
+    # Write outputs
+    destdir = variables.get('DESTDIR', '')
+    for kind, target, details in actions:
+
+        if kind == 'build':
+            pending, count, description = details
+            for subdir in pending:
+                (build / subdir).mkdir(parents = True, exist_ok = True)
+                for index in range(count):
+                    (build / subdir / f'fake-{target}-{index}.o').write_bytes(file_content(f'{subdir}/{target}/{index}', int(description.get('size', 0))))
+                (build / subdir / f'.fake-{target}.done').touch()
+            for template, size in description.get('outputs', { }).items():
+                for path in expand(template):
+                    (build / path).parent.mkdir(parents = True, exist_ok = True)
+                    (build / path).write_bytes(file_content(path, int(size)))
+            continue
+
+        for template, content in details.items():
+            for path in expand(template):
+
+                # Paths are relative to the prefix unless given by the directory placeholder
+                path = pathlib.PurePosixPath(config['prefix']) / path
+                seed = path.relative_to(config['prefix']) if path.is_relative_to(config['prefix']) else path
+                dst  = pathlib.Path(f'{destdir}{path}')
+                dst.parent.mkdir(parents = True, exist_ok = True)
+
+                # Files are replaced (not modified in place) as done by `install`
+                dst.unlink(missing_ok = True)
+                if content == '@driver':
+                    dst.write_text(driver_script(multilibs, config['version']))
+                elif isinstance(content, str):
+                    dst.write_text(content)
+                else:
+                    dst.write_bytes(file_content(f'{config["component"]}/{seed}', int(content)))
+                if (content == '@driver') or ('bin' in path.parent.parts):
+                    dst.chmod(0o755)
+
+    log_invocation(tool = 'make', stage = build.name, targets = targets, units = len(units), jobs = jobs,
+        jobserver = slots.jobserver, duration = time.monotonic() - start)
+
+    return 0
+
+# ========================================================== FakeConanfile ========================================================= #
+
+class FakeOutput:
+
+    """Output of the fake conanfile (written into the stream)"""
+
+    def __init__(self,
+        stream,
+    ):
+        self.stream = stream
+        self._lock  = threading.Lock()
+
+    def _print(self, level, message):
+        with self._lock:
+            self.stream.write(f'[{level}] {message}\n' if level else message)
+            self.stream.flush()
+
+    def info(self, message, *args, **kwargs):      self._print('info', message)
+    def warning(self, message, *args, **kwargs):   self._print('warning', message)
+    def success(self, message, *args, **kwargs):   self._print('success', message)
+    def highlight(self, message, *args, **kwargs): self._print('highlight', message)
+    def debug(self, message, *args, **kwargs):     self._print('debug', message)
+    def error(self, message, *args, **kwargs):     self._print('error', message)
+    def write(self, message, *args, **kwargs):     self._print(None, message)
+    def writeln(self, message, *args, **kwargs):   self._print(None, f'{message}\n')
+
+class FakeValues:
+
+    """Options or settings of the fake conanfile (attributes with `get_safe` and `dumps` as in Conan)"""
+
+    def __init__(self,
+        values : dict,
+    ):
+        self.__dict__['_values'] = dict(values)
+
+    def __getattr__(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        self._values[name] = value
+
+    def get_safe(self, name, default = None):
+        value = self._values.get(name)
+        return default if (value is None) else value
+
+    def dumps(self) -> str:
+        return '\n'.join(f'{name}={value}' for name, value in sorted(self._values.items()) if value is not None)
+
+class FakeDependency:
+
+    def __init__(self,
+        name           : str,
+        package_folder : pathlib.Path,
+    ):
+        self.ref            = type('Reference', (), { 'name' : name, '__str__' : lambda self: f'{name}/fake' })()
+        self.pref           = f'{name}/fake#0:0#0'
+        self.package_folder = package_folder.as_posix()
+
+class FakeDependencies(dict):
+
+    """Dependencies of the fake conanfile (host ones by name; no build requirements)"""
+
+    @property
+    def build(self) -> dict:
+        return { }
+
+class FakeConf:
+
+    def __init__(self,
+        values : dict,
+    ):
+        self._values = values
+
+    def get(self, name, default = None, check_type = None):
+        value = self._values.get(name, default)
+        return check_type(value) if (check_type is not None) and (value is not None) else value
+
+class FakeConanfile:
+
+    """Minimal conanfile accepted by the build drivers. Commands are run directly with the shell. As with
+    Conan, each instance packages into a new, empty package folder.
+    """
+
+    win_bash     = False
+    win_bash_run = False
+
+    def __init__(self,
+        recipe_folder : pathlib.Path,
+        build_folder   : pathlib.Path,
+        package_folder : pathlib.Path,
+        options        : dict,
+        conf           : dict,
+        dependencies   : dict,
+        stream,
+    ):
+        self.recipe_folder     = recipe_folder.as_posix()
+        self.build_folder      = build_folder.as_posix()
+        self.source_folder     = build_folder.as_posix()
+        self.generators_folder = (build_folder / 'generators').as_posix()
+        self.package_folder    = package_folder.as_posix()
+
+        self.options        = FakeValues(options)
+        self.settings       = FakeValues({ 'os' : 'Linux', 'arch' : 'x86_64', 'build_type' : 'Release', 'compiler' : 'gcc' })
+        self.settings_build = self.settings
+        self.conf           = FakeConf(conf)
+        self.dependencies   = FakeDependencies(dependencies)
+        self.output         = FakeOutput(stream)
+
+    def run(self,
+        command,
+        stdout        = None,
+        cwd           = None,
+        ignore_errors = False,
+        env           = '',
+        quiet         = False,
+        shell         = True,
+        scope         = 'build',
+        stderr        = None,
+    ):
+        from conan.errors import ConanException
+
+        if not quiet:
+            self.output.info(f'RUN: {command}')
+
+        result = subprocess.run(command,
+            shell  = shell,
+            cwd    = cwd,
+            stdout = stdout or self.output.stream,
+            stderr = stderr or self.output.stream,
+        )
+        if (result.returncode != 0) and (not ignore_errors):
+            raise ConanException(f'Error {result.returncode} while executing')
+
+        return result.returncode
+
+# ========================================================== Fake mirrors ========================================================== #
+
+class FakeMirror(http.server.ThreadingHTTPServer):
+
+    """Local HTTP server serving the `content` under any path with support of range requests (honouring If-Range)
+    and the `etag` validator. Responses to HEAD requests are delayed by `latency` seconds (to order mirrors). Served
+    ranges are recorded in `ranges`.
+    """
+
+    def __init__(self,
+        content : bytes,
+        etag    : str,
+        latency : float = 0,
+    ):
+        super().__init__(('127.0.0.1', 0), FakeMirrorHandler)
+
+        self.content = content
+        self.etag    = etag
+        self.latency = latency
+        self.ranges  = [ ]
+
+        threading.Thread(target = self.serve_forever, daemon = True).start()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}/file.tar.gz'
+
+class FakeMirrorHandler(http.server.BaseHTTPRequestHandler):
+
+    def do_HEAD(self):
+        time.sleep(self.server.latency)
+        self._respond(body = False)
+
+    def do_GET(self):
+        self._respond(body = True)
+
+    def _respond(self, body : bool):
+
+        content    = self.server.content
+        start, end = 0, len(content) - 1
+
+        # Serve the range only if the file has not changed since the client validated it
+        match = re.fullmatch(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        ranged = (match is not None) and (self.headers.get('If-Range', self.server.etag) == self.server.etag)
+        if ranged:
+            start, end = int(match[1]), (int(match[2]) if match[2] else len(content) - 1)
+            self.server.ranges.append((start, end))
+
+        self.send_response(206 if ranged else 200)
+        self.send_header('Content-Length', str(end + 1 - start))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', self.server.etag)
+        if ranged:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(content)}')
+        self.end_headers()
+
+        if body:
+            self.wfile.write(content[start:end + 1])
+
+    def log_message(self, *args):
+        pass
+
+# ============================================================= Harness ============================================================ #
+
+class Harness:
+
+    def __init__(self,
+        work_dir : pathlib.Path,
+        profile  : dict,
+        target   : str,
+        jobs     : int,
+        options  : dict,
+        verbose  : bool,
+    ):
+        self.work_dir = work_dir
+        self.profile  = profile
+        self.target   = target
+        self.jobs     = jobs
+        self.options  = options
+        self.verbose  = verbose
+        self.recipe   = pathlib.Path(__file__).absolute().parent
+
+        # Make build drivers importable
+        sys.path.insert(0, (self.recipe / 'src').as_posix())
+
+        # Fake tools find the harness (and log their invocations) through the environment
+        self.log_path = self.work_dir / 'invocations.jsonl'
+        os.environ['FAKE_AUTOTOOLS_PYTHON']  = sys.executable
+        os.environ['FAKE_AUTOTOOLS_HARNESS'] = pathlib.Path(__file__).absolute().as_posix()
+        os.environ['FAKE_AUTOTOOLS_LOG']     = self.log_path.as_posix()
+
+        self.results = { }
+
+    # ------------------------------------------------------------------ #
+
+    def prepare(self):
+
+        """Creates fake sources, fake dependencies and the fake make"""
+
+        from gnu_toolchain.from_source import FromSourceDriver
+
+        self.work_dir.mkdir(parents = True, exist_ok = True)
+        self.log_path.touch()
+
+        # Sources are put into directory specific to the profile (URLs are part of stage keys)
+        digest      = hashlib.sha256(json.dumps(self.profile, sort_keys = True).encode()).hexdigest()[:12]
+        sources_dir = self.work_dir / 'sources' / digest
+        sources_dir.mkdir(parents = True, exist_ok = True)
+
+        self.urls = { }
+        for component, project in self.profile.items():
+            version = str(self.options.get(f'with_{component}_version', FromSourceDriver.default_options.get(f'with_{component}_version')))
+            archive = sources_dir / f'{component}-{version}.tar.gz'
+            if not archive.exists():
+                self._make_sources(archive, component, version, project)
+            self.urls[f'with_{component}_url'] = archive.as_uri()
+
+        # Dependencies
+        self.dependencies = { }
+        for name in [ 'zlib', 'gmp', 'mpfr', 'mpc', 'isl', 'expat', 'elfutils' ]:
+            folder = self.work_dir / 'deps' / name
+            for subdir in [ 'include', 'lib' ]:
+                (folder / subdir).mkdir(parents = True, exist_ok = True)
+            self.dependencies[name] = FakeDependency(name, folder)
+
+        # Make
+        self.make = self.work_dir / 'bin' / 'make'
+        self.make.parent.mkdir(parents = True, exist_ok = True)
+        self.make.write_text('#!/bin/sh\nexec "$FAKE_AUTOTOOLS_PYTHON" "$FAKE_AUTOTOOLS_HARNESS" make "$@"\n')
+        self.make.chmod(0o755)
+
+    def _make_sources(self,
+        archive   : pathlib.Path,
+        component : str,
+        version   : str,
+        project   : dict,
+    ):
+        """Creates archive of fake sources of the `component`"""
+
+        root    = f'{component}-{version}'
+        source  = project.get('source', { })
+        count   = int(project.get('configure', { }).get('checks', 0))
+        shared  = int(count * SHARED_CHECKS_RATIO)
+        checks  = [ f'ac_cv_sizeof_fake_{index}' for index in range(shared) ] + [ f'fake_cv_{component}_{index}' for index in range(count - shared) ]
+        project = project | {
+            'component' : component,
+            'version'   : version,
+            'configure' : project.get('configure', { }) | { 'checks' : checks },
+        }
+
+        def add(tar, name, content, mode = 0o644):
+            info       = tarfile.TarInfo(f'{root}/{name}')
+            info.size  = len(content)
+            info.mode  = mode
+            info.mtime = 0
+            tar.addfile(info, io.BytesIO(content))
+
+        tmp_path = archive.with_name(f'{archive.name}.tmp')
+        with tarfile.open(tmp_path, 'w:gz', compresslevel = 1) as tar:
+            add(tar, 'configure', CONFIGURE_SCRIPT.format(checks = ' '.join(checks)).encode(), 0o755)
+            add(tar, 'fake-project.json', json.dumps(project, indent = 4).encode())
+            # Spread files over subdirectories and excludable subtrees
+            directories = [ '.' ] + project.get('subdirs', [ ]) + source.get('subtrees', [ ])
+            for index in range(int(source.get('files', 0))):
+                name = f'{directories[index % len(directories)]}/src-{index}.c'
+                add(tar, name, file_content(f'{component}/{name}', int(source.get('size', 0))))
+            for subdir in project.get('subdirs', [ ]):
+                add(tar, f'{subdir}/configure', f'#!/bin/sh\n# Fake configure of {subdir}\n'.encode(), 0o755)
+        os.replace(tmp_path, archive)
+
+    # ------------------------------------------------------------------ #
+
+    def build(self,
+        name    : str,
+        folder  : str | None = None,
+        options : dict       = { },
+        fail    : str | None = None,
+        wait    : str | None = None,
+    ) -> dict:
+
+        """Builds and packages the toolchain in the `folder` (the `name` by default) with extra `options`.
+        If `fail` is given (<stage>:<make target>), the fake make fails at the given target. If `wait` is
+        given (<stage>:<make target>=<path relative to the prefix>), the fake make does not start the given
+        target until the path appears.
+        """
+
+        from gnu_toolchain.from_source import FromSourceDriver
+
+        build_folder = self.work_dir / 'runs' / (folder or name)
+        build_folder.mkdir(parents = True, exist_ok = True)
+
+        conanfile_options = FromSourceDriver.default_options | {
+            'target'       : self.target,
+            'prebuilt'     : False,
+            'download_dir' : (self.work_dir / 'downloads').as_posix(),
+        } | self.urls | self.options | options
+
+        log_file = open(self.work_dir / 'logs' / f'{name}.log', 'w') if not self.verbose else None
+        # Package into a new folder (as Conan does)
+        (self.work_dir / 'packages').mkdir(parents = True, exist_ok = True)
+        package_folder = pathlib.Path(tempfile.mkdtemp(prefix = f'{name}-', dir = self.work_dir / 'packages'))
+
+        conanfile = FakeConanfile(
+            recipe_folder  = self.recipe,
+            build_folder   = build_folder,
+            package_folder = package_folder,
+            options        = conanfile_options,
+            conf           = {
+                'tools.build:jobs'       : self.jobs,
+                'tools.gnu:make_program' : self.make.as_posix(),
+            },
+            dependencies   = self.dependencies,
+            stream         = log_file or sys.stdout,
+        )
+
+        # Arguments of configure and make passed by Conan (none)
+        from conan.tools.build import save_toolchain_args
+        pathlib.Path(conanfile.generators_folder).mkdir(parents = True, exist_ok = True)
+        save_toolchain_args({ 'configure_args' : '', 'make_args' : '', 'autoreconf_args' : '' }, generators_folder = conanfile.generators_folder)
+
+        if fail is not None:
+            os.environ['FAKE_AUTOTOOLS_FAIL'] = fail
+        if wait is not None:
+            os.environ['FAKE_AUTOTOOLS_WAIT'] = wait
+        offset = self.log_path.stat().st_size
+        usage  = resource.getrusage(resource.RUSAGE_CHILDREN)
+        start  = time.monotonic()
+
+        status = 'succeeded'
+        try:
+            driver = FromSourceDriver(conanfile)
+            driver.validate()
+            driver.build()
+            driver.package()
+        except Exception as e:
+            status = 'failed'
+            conanfile.output.error(f'Build failed ({e})')
+        finally:
+            os.environ.pop('FAKE_AUTOTOOLS_FAIL', None)
+            os.environ.pop('FAKE_AUTOTOOLS_WAIT', None)
+            if log_file is not None:
+                log_file.close()
+
+        duration = time.monotonic() - start
+        current  = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+        # Collect invocations of fake tools
+        with open(self.log_path) as file:
+            file.seek(offset)
+            invocations = [ json.loads(line) for line in file if line.strip() ]
+
+        return {
+            'status'      : status,
+            'duration'    : round(duration, 3),
+            'cpu_time'    : round((current.ru_utime - usage.ru_utime) + (current.ru_stime - usage.ru_stime), 3),
+            'configure'   : sum(1 for record in invocations if record['tool'] == 'configure'),
+            'make'        : sum(1 for record in invocations if record['tool'] == 'make'),
+            'units'       : sum(record.get('units', 0) for record in invocations),
+            'checks'      : sum(record.get('checks', 0) - record.get('cached', 0) for record in invocations),
+            'package'     : self._list_tree(pathlib.Path(conanfile.package_folder), build_folder),
+        }
+
+    @staticmethod
+    def _list_tree(
+        root         : pathlib.Path,
+        build_folder : pathlib.Path,
+    ) -> dict:
+        """Returns { relative path : size or link target } of the tree (links into the build folder are made
+        relative to it so that listings of different build folders can be compared)
+        """
+
+        listing = { }
+        for path in sorted(root.rglob('*')) if root.exists() else [ ]:
+            if path.is_symlink():
+                listing[path.relative_to(root).as_posix()] = f'-> {os.readlink(path).replace(build_folder.as_posix(), "<build>")}'
+            elif path.is_file():
+                listing[path.relative_to(root).as_posix()] = path.stat().st_size
+
+        return listing
+
+    def download(self,
+        check,
+    ) -> dict:
+
+        """Downloads a file from local HTTP mirrors: chunks of mirrors serving a different file of the same size
+        must not be combined without the digest, and partial downloads may be resumed only from mirrors serving
+        the file with the same validator
+        """
+
+        from gnu_toolchain.utils.download import download_file
+
+        work_dir = self.work_dir / 'download'
+        shutil.rmtree(work_dir, ignore_errors = True)
+        work_dir.mkdir(parents = True)
+
+        content = hashlib.sha256(b'0').digest() * 32768
+        other   = hashlib.sha256(b'1').digest() * 32768
+        # Two mirrors of the same file, a slow mirror of another file of the same size and an unavailable one
+        mirrors = [ FakeMirror(content, '"v1"'), FakeMirror(content, '"v1"'), FakeMirror(other, '"v2"', latency = 0.2) ]
+        urls    = [ mirror.url for mirror in mirrors ] + [ 'http://127.0.0.1:9/file.tar.gz' ]
+
+        log_file  = open(self.work_dir / 'logs' / 'download.log', 'w') if not self.verbose else None
+        conanfile = FakeConanfile(
+            recipe_folder  = self.recipe,
+            build_folder   = work_dir,
+            package_folder = work_dir,
+            options        = { },
+            conf           = { },
+            dependencies   = { },
+            stream         = log_file or sys.stdout,
+        )
+
+        result = { 'status' : 'succeeded', 'cpu_time' : 0, 'configure' : 0, 'make' : 0, 'units' : 0, 'checks' : 0, 'package' : { } }
+        start  = time.monotonic()
+
+        try:
+
+            # Chunks are spread over mirrors serving the same file
+            path = download_file(conanfile, urls, work_dir / 'chunked.tar.gz', chunk_size = 65536, threads = 4)
+            check(result, 'chunks from the same file', path.read_bytes() == content)
+            check(result, 'chunks from both mirrors', all(mirror.ranges for mirror in mirrors[:2]))
+            check(result, 'no chunks from another file', not mirrors[2].ranges)
+
+            # Partial download of the changed file is restarted
+            destination = work_dir / 'changed.tar.gz'
+            destination.with_name(f'{destination.name}.part').write_bytes(other[:100000])
+            destination.with_name(f'{destination.name}.part.json').write_text(json.dumps({ 'validator' : '"v0"' }))
+            path = download_file(conanfile, urls[:1], destination, threads = 1)
+            check(result, 'restarted download of a changed file', path.read_bytes() == content)
+
+            # Partial download of the same file is resumed
+            mirrors[0].ranges.clear()
+            destination = work_dir / 'resumed.tar.gz'
+            destination.with_name(f'{destination.name}.part').write_bytes(content[:100000])
+            destination.with_name(f'{destination.name}.part.json').write_text(json.dumps({ 'validator' : '"v1"' }))
+            path = download_file(conanfile, urls[:1], destination, threads = 1)
+            check(result, 'resumed download', path.read_bytes() == content)
+            check(result, 'resumed at the offset', mirrors[0].ranges == [ (100000, len(content) - 1) ])
+
+        except Exception as e:
+            result['status'] = 'failed'
+            conanfile.output.error(f'Download failed ({e})')
+        finally:
+            for mirror in mirrors:
+                mirror.shutdown()
+            if log_file is not None:
+                log_file.close()
+
+        result['duration'] = round(time.monotonic() - start, 3)
+
+        return result
+
+    # ------------------------------------------------------------------ #
+
+    def run(self,
+        scenarios : list,
+    ) -> bool:
+
+        self.prepare()
+        (self.work_dir / 'logs').mkdir(parents = True, exist_ok = True)
+
+        stage_cache = { 'stage_cache_dir' : (self.work_dir / 'stage-cache').as_posix() }
+
+        def check(result, name, condition):
+            result.setdefault('checks_failed' if not condition else 'checks_passed', [ ]).append(name)
+
+        # Scenarios comparing results with the cold build need it
+        if any(scenario not in [ 'cold', 'download' ] for scenario in scenarios) and ('cold' not in scenarios):
+            scenarios = [ 'cold' ] + scenarios
+
+        for scenario in scenarios:
+
+            print(f'[harness] Running {scenario}...', flush = True)
+
+            match scenario:
+
+                case 'cold':
+                    result = self.build('cold', options = stage_cache)
+                    check(result, 'succeeded', result['status'] == 'succeeded')
+                    check(result, 'configured', result['configure'] > 0)
+                    for path in [ f'bin/{self.target}-gcc', f'bin/{self.target}-gdb', f'{self.target}/lib/libc_nano.a' ]:
+                        check(result, f'packaged {path}', path in result['package'])
+
+                case 'noop':
+                    result = self.build('noop', folder = 'cold', options = stage_cache)
+                    check(result, 'succeeded', result['status'] == 'succeeded')
+                    check(result, 'no tools run', result['configure'] + result['make'] == 0)
+
+                case 'cached':
+                    result = self.build('cached', options = stage_cache)
+                    check(result, 'succeeded', result['status'] == 'succeeded')
+                    check(result, 'no tools run', result['configure'] + result['make'] == 0)
+
+                case 'parallel':
+                    result = self.build('parallel', options = { 'parallel_stages' : 3 })
+                    check(result, 'succeeded', result['status'] == 'succeeded')
+
+                case 'overlap':
+                    # GDB is installed before the cleanup of gcc_newlib (which removes the 'include' directory)
+                    result = self.build('overlap', options = { 'parallel_stages' : 3 }, wait = 'gcc_newlib:all=include/gdb/jit-reader.h')
+                    check(result, 'succeeded', result['status'] == 'succeeded')
+                    check(result, 'packaged GDB headers', 'include/gdb/jit-reader.h' in result['package'])
+
+                case 'resume':
+                    failed = self.build('resume-failed', folder = 'resume', fail = 'gcc_newlib:all')
+                    check(failed, 'failed', failed['status'] == 'failed')
+                    self.results['resume-failed'] = failed
+                    result = self.build('resume', folder = 'resume')
+                    check(result, 'succeeded', result['status'] == 'succeeded')
+                    check(result, 'earlier stages not rerun', result['configure'] < self.results['cold']['configure'])
+
+                case 'download':
+                    result = self.download(check)
+                    check(result, 'succeeded', result['status'] == 'succeeded')
+
+                case _:
+                    raise ValueError(f"Unknown scenario: '{scenario}'")
+
+            # All builds produce the same package
+            if (scenario not in [ 'cold', 'download' ]) and (result['status'] == 'succeeded'):
+                check(result, 'same package', result['package'] == self.results['cold']['package'])
+
+            self.results[scenario] = result
+
+        return self.report()
+
+    def report(self) -> bool:
+
+        # Save the report
+        (self.work_dir / 'harness-report.json').write_text(json.dumps(self.results, indent = 4))
+
+        # Print the summary
+        width = max(len(name) for name in list(self.results.keys()) + [ 'scenario' ])
+        print(f'\n{"scenario".ljust(width)}  {"status":<10}  {"time":>9}  {"cpu":>9}  {"configure":>9}  {"make":>5}  {"units":>6}  {"files":>6}  checks')
+        for name, result in self.results.items():
+            failed = result.get('checks_failed', [ ])
+            print(
+                f'{name.ljust(width)}  {result["status"]:<10}  '
+                f'{format_duration(result["duration"]):>9}  '
+                f'{format_duration(result["cpu_time"]):>9}  '
+                f'{result["configure"]:>9}  {result["make"]:>5}  {result["units"]:>6}  {len(result["package"]):>6}  '
+                + (f'FAILED: {", ".join(failed)}' if failed else f'{len(result.get("checks_passed", [ ]))} passed')
+            )
+        print(f'\nReport saved into {(self.work_dir / "harness-report.json").as_posix()} (logs in {(self.work_dir / "logs").as_posix()})')
+
+        return not any(result.get('checks_failed') for result in self.results.values())
+
+# ============================================================== Main ============================================================== #
+
+def parse_value(value : str):
+    return { 'True' : True, 'False' : False, 'None' : None }.get(value, value)
+
+if __name__ == '__main__':
+
+    # Fake tools
+    if (len(sys.argv) > 1) and (sys.argv[1] == 'configure'):
+        sys.exit(fake_configure(sys.argv[2:]))
+    if (len(sys.argv) > 1) and (sys.argv[1] == 'make'):
+        sys.exit(fake_make(sys.argv[2:]))
+
+    scenarios = [ 'cold', 'noop', 'cached', 'parallel', 'overlap', 'resume', 'download' ]
+
+    parser = argparse.ArgumentParser(description = 'Runs build drivers against fake autotools projects')
+    parser.add_argument('--scenario', action = 'append', choices = scenarios, help = 'Scenario to run (all by default)')
+    parser.add_argument('--work-dir', type = pathlib.Path, help = 'Working directory (temporary one removed afterwards by default)')
+    parser.add_argument('--profile', type = pathlib.Path, help = 'Profile of fake projects (JSON merged into the default one)')
+    parser.add_argument('--scale', type = float, default = 1.0, help = 'Multiplier of all simulated durations')
+    parser.add_argument('--jobs', type = int, default = os.cpu_count() or 1, help = 'Number of build jobs')
+    parser.add_argument('--target', default = 'arm-none-eabi', help = 'Target of the toolchain (descriptor from data/)')
+    parser.add_argument('-o', '--option', action = 'append', default = [ ], help = 'Option of the package (name=value)')
+    parser.add_argument('-v', '--verbose', action = 'store_true', help = 'Print output of builds instead of saving it into logs')
+    args = parser.parse_args()
+
+    profile = DEFAULT_PROFILE
+    if args.profile is not None:
+        profile = merge_profiles(profile, json.loads(args.profile.read_text()))
+
+    work_dir = args.work_dir.absolute() if (args.work_dir is not None) else pathlib.Path(tempfile.mkdtemp(prefix = 'fake-autotools-'))
+
+    harness = Harness(
+        work_dir = work_dir,
+        profile  = scale_profile(profile, args.scale),
+        target   = args.target,
+        jobs     = args.jobs,
+        options  = { name : parse_value(value) for name, _, value in (option.partition('=') for option in args.option) },
+        verbose  = args.verbose,
+    )
+
+    try:
+        passed = harness.run(args.scenario or scenarios)
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors = True)
+
+    sys.exit(0 if passed else 1)
+
+# ================================================================================================================================== #
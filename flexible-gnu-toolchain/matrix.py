@@ -0,0 +1,358 @@
+# ====================================================================================================================================
+# @file       matrix.py
+# @author     Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @maintainer Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @date       Monday, 19th October 2026 12:14:08 pm
+# @modified   Monday, 19th October 2026 12:14:08 pm by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# 
+# 
+# @copyright Krzysztof Pierczyk © 2026
+# ====================================================================================================================================
+
+"""
+Builds a matrix of toolchains (e.g. GCC versions x targets x build types) on a single machine.
+
+Usage:
+
+    python matrix.py <matrix.json> [--dry-run]
+
+The matrix file describes common options/settings of all builds and either a list of explicit entries or
+axes expanded into all combinations:
+
+    {
+        "jobs"         : 32,                                  # Global job budget (default: number of CPUs)
+        "parallel"     : 2,                                   # Maximal number of concurrent builds (default: 1)
+        "output_dir"   : "matrix",                            # Root of output folders of the builds
+        "cache_dir"    : "~/.cache/flexible-gnu-toolchain",   # Shared stage cache and downloads
+        "profiles"     : [ "default" ],                       # Host profiles
+        "export"       : false,                               # Run 'conan export-pkg' after successful builds
+        "options"      : { "with_doc": false },               # Options common to all entries
+        "settings"     : { },                                 # Settings common to all entries
+        "axes"         : {
+            "options"  : { "with_gcc_version" : [ "13.3.0", "14.2.0" ], "target" : [ "arm-none-eabi" ] },
+            "settings" : { "build_type" : [ "Release", "Debug" ] }
+        },
+        "entries"      : [ { "name": "...", "options": { }, "settings": { } } ]
+    }
+
+All builds share the stage cache, the autoconf cache (if enabled), the timings database and the download directory. Entries sharing inputs of the first stage (target, settings,
+binutils sources and the GCC version the package version is derived from) are grouped and a single leader of each group is built first
+so that its stages can be reused by the remaining members of the group. Members are started as soon as the leader has stored the first
+stage in the stage cache (or has finished). After all builds finish, the consolidated timing and cache-hit report is printed
+and saved into `<output_dir>/matrix-report.json`.
+"""
+
+# ============================================================= Imports ============================================================ #
+
+# System imports
+import argparse
+import itertools
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import threading
+import time
+
+# ======================================================== Helper functions ======================================================== #
+
+def format_duration(seconds : float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes   = divmod(minutes, 60)
+    return f'{hours}:{minutes:02d}:{seconds:02d}'
+
+# ============================================================== Entry ============================================================= #
+
+class Entry:
+
+    """Single build of the matrix"""
+
+    def __init__(self,
+        name     : str,
+        options  : dict,
+        settings : dict,
+    ):
+        self.name     = name
+        self.options  = options
+        self.settings = settings
+
+        # Results of the build
+        self.status   = 'pending'
+        self.duration = None
+        self.jobs     = None
+
+    @property
+    def group(self) -> tuple:
+
+        """Returns key of the group of entries sharing inputs of the first stage (binutils). The GCC version is
+        a part of the key as well, as it is a part of the package version the stage is configured with.
+        """
+
+        return (
+            str(self.options.get('target')),
+            json.dumps(self.settings, sort_keys = True),
+            str(self.options.get('with_binutils_version')),
+            str(self.options.get('with_binutils_url')),
+            str(self.options.get('with_gcc_version')),
+        )
+
+    def first_stages_cached(self,
+        output_dir : pathlib.Path,
+    ) -> bool:
+
+        """Checks whether the build has already stored (or restored) first stages (binutils) of all its targets
+        in the stage cache, i.e. whether they can be reused by members of the group
+        """
+
+        stages = { }
+        for path in (output_dir / self.name).glob('*/build/report.json'):
+            try:
+                stages |= json.loads(path.read_text())
+            except (OSError, ValueError):
+                pass
+
+        cached = [
+            stage for stage, record in stages.items()
+                if (stage.split('/')[-1] == 'binutils') and (record.get('cache', { }).get('status') in [ 'stored', 'hit' ])
+        ]
+
+        targets = [ target for target in str(self.options.get('target', '')).split(',') if target.strip() ]
+        return len(cached) >= max(1, len(targets))
+
+    def make_command(self,
+        recipe     : pathlib.Path,
+        output_dir : pathlib.Path,
+        profiles   : list,
+        jobs       : int,
+        subcommand : str = 'build',
+    ) -> list:
+
+        command = [ 'conan', subcommand, recipe.as_posix(), '-of', (output_dir / self.name).as_posix() ]
+
+        for profile in profiles:
+            command += [ '-pr:h', profile ]
+        for name, value in self.settings.items():
+            command += [ '-s', f'{name}={value}' ]
+        for name, value in self.options.items():
+            command += [ '-o', f'&:{name}={value}' ]
+
+        if subcommand == 'build':
+            command += [ '--build=missing', '-c', f'tools.build:jobs={jobs}' ]
+
+        return command
+
+# ============================================================= Matrix ============================================================= #
+
+class Matrix:
+
+    def __init__(self,
+        config : dict,
+        recipe : pathlib.Path,
+    ):
+        self.recipe     = recipe
+        self.jobs       = int(config.get('jobs', os.cpu_count() or 1))
+        self.parallel   = max(1, int(config.get('parallel', 1)))
+        self.output_dir = pathlib.Path(config.get('output_dir', 'matrix')).expanduser().absolute()
+        self.cache_dir  = pathlib.Path(config.get('cache_dir', self.output_dir / 'cache')).expanduser().absolute()
+        self.profiles   = config.get('profiles', [ ])
+        self.export     = bool(config.get('export', False))
+
+        # Options shared by all builds
+        common_options = config.get('options', { }) | {
+            'stage_cache_dir'    : (self.cache_dir / 'stages').as_posix(),
+            'download_dir'       : (self.cache_dir / 'downloads').as_posix(),
+            'autoconf_cache_dir' : (self.cache_dir / 'autoconf').as_posix(),
+            'timings_db'         : (self.cache_dir / 'timings.sqlite').as_posix(),
+        }
+        common_settings = config.get('settings', { })
+
+        self.entries = [ ]
+
+        # Expand axes
+        axes = config.get('axes', { })
+        axes = [ ('options', name, values) for name, values in axes.get('options', { }).items() ] + \
+               [ ('settings', name, values) for name, values in axes.get('settings', { }).items() ]
+        if axes:
+            for values in itertools.product(*[ axis[2] for axis in axes ]):
+                options  = dict(common_options)
+                settings = dict(common_settings)
+                for (kind, name, _), value in zip(axes, values):
+                    (options if kind == 'options' else settings)[name] = value
+                self.entries.append(Entry(
+                    name     = '_'.join(str(value).replace(',', '+').replace('/', '-') for value in values),
+                    options  = options,
+                    settings = settings,
+                ))
+
+        # Add explicit entries
+        for index, entry in enumerate(config.get('entries', [ ])):
+            self.entries.append(Entry(
+                name     = entry.get('name', f'entry-{index}'),
+                options  = common_options | entry.get('options', { }),
+                settings = common_settings | entry.get('settings', { }),
+            ))
+
+        if len(set(entry.name for entry in self.entries)) != len(self.entries):
+            raise ValueError("Names of matrix entries must be unique!")
+
+    # ------------------------------------------------------------------ #
+
+    def schedule(self) -> list:
+
+        """Orders entries so that a single leader of each group goes first. Returns list of
+        (entry, leader) pairs where `leader` is None for leaders themselves.
+        """
+
+        leaders = { }
+        for entry in self.entries:
+            leaders.setdefault(entry.group, entry)
+
+        return [ (entry, None) for entry in leaders.values() ] + \
+               [ (entry, leaders[entry.group]) for entry in self.entries if leaders[entry.group] is not entry ]
+
+    def run(self,
+        dry_run : bool = False,
+    ):
+        self.output_dir.mkdir(parents = True, exist_ok = True)
+
+        pending   = self.schedule()
+        running   = [ 0 ]
+        condition = threading.Condition()
+
+        def next_entry():
+
+            """Picks the first pending entry whose group leader has cached the first stage or has finished (blocks
+            if none is ready; reports of running leaders are polled)
+            """
+
+            with condition:
+                while True:
+                    if not pending:
+                        return None
+                    for index, (entry, leader) in enumerate(pending):
+                        if (leader is None) or (leader.status not in [ 'pending', 'running' ]) or \
+                           ((leader.status == 'running') and (not dry_run) and leader.first_stages_cached(self.output_dir)):
+                            pending.pop(index)
+                            # Split the job budget between builds running concurrently
+                            entry.jobs   = max(1, self.jobs // max(1, min(self.parallel, running[0] + 1 + len(pending))))
+                            entry.status = 'running'
+                            running[0]  += 1
+                            return entry
+                    condition.wait(timeout = 5)
+
+        def worker():
+            while (entry := next_entry()) is not None:
+
+                status = self._build(entry, dry_run)
+
+                with condition:
+                    entry.status = status
+                    running[0]  -= 1
+                    condition.notify_all()
+
+        workers = [ threading.Thread(target = worker) for _ in range(self.parallel) ]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        return self.report()
+
+    def _build(self,
+        entry   : Entry,
+        dry_run : bool,
+    ) -> str:
+
+        commands = [ entry.make_command(self.recipe, self.output_dir, self.profiles, entry.jobs) ]
+        if self.export:
+            commands.append(entry.make_command(self.recipe, self.output_dir, self.profiles, entry.jobs, 'export-pkg'))
+
+        print(f'[matrix] Building {entry.name} (jobs: {entry.jobs})...', flush = True)
+
+        start = time.monotonic()
+
+        # Run the build
+        log_path = self.output_dir / f'{entry.name}.log'
+        with open(log_path, 'w') as log:
+            for command in commands:
+                if dry_run:
+                    print(f'[matrix]   {" ".join(command)}', flush = True)
+                    continue
+                if subprocess.run(command, stdout = log, stderr = subprocess.STDOUT).returncode != 0:
+                    entry.duration = time.monotonic() - start
+                    print(f'[matrix] {entry.name} failed after {format_duration(entry.duration)} (see {log_path.as_posix()})', flush = True)
+                    return 'failed'
+
+        entry.duration = time.monotonic() - start
+        print(f'[matrix] {entry.name} finished in {format_duration(entry.duration)}', flush = True)
+
+        return 'succeeded' if not dry_run else 'planned'
+
+    # ------------------------------------------------------------------ #
+
+    def report(self) -> dict:
+
+        """Collects per-stage reports of all builds into the consolidated report"""
+
+        report = { }
+
+        for entry in self.entries:
+
+            # Load reports of the build (one per build folder)
+            stages = { }
+            for path in sorted((self.output_dir / entry.name).glob('*/build/report.json')):
+                try:
+                    stages |= json.loads(path.read_text())
+                except (OSError, ValueError):
+                    pass
+
+            cache_status = [ stage.get('cache', { }).get('status') for stage in stages.values() ]
+
+            report[entry.name] = {
+                'status'     : entry.status,
+                'duration'   : round(entry.duration, 3) if (entry.duration is not None) else None,
+                'jobs'       : entry.jobs,
+                'options'    : entry.options,
+                'settings'   : entry.settings,
+                'cache_hits' : cache_status.count('hit'),
+                'stages'     : stages,
+            }
+
+        # Save the report
+        (self.output_dir / 'matrix-report.json').write_text(json.dumps(report, indent = 4, sort_keys = True))
+
+        # Print the summary
+        width = max([ len('entry') ] + [ len(name) for name in report.keys() ])
+        print(f'\n{"entry".ljust(width)}  {"status":<10}  {"time":>9}  {"steps":>9}  {"cache hits":>10}')
+        for name, record in report.items():
+            steps_time = sum(sum(stage.get('steps', { }).values()) for stage in record['stages'].values())
+            print(
+                f'{name.ljust(width)}  {record["status"]:<10}  '
+                f'{format_duration(record["duration"] or 0):>9}  '
+                f'{format_duration(steps_time):>9}  '
+                f'{record["cache_hits"]:>4}/{len(record["stages"]):<5}'
+            )
+        print(f'\nReport saved into {(self.output_dir / "matrix-report.json").as_posix()}')
+
+        return report
+
+# ============================================================== Main ============================================================== #
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'Builds a matrix of toolchains on a single machine')
+    parser.add_argument('config', type = pathlib.Path, help = 'Path to the matrix description (JSON)')
+    parser.add_argument('--dry-run', action = 'store_true', help = 'Print commands instead of running them')
+    args = parser.parse_args()
+
+    matrix = Matrix(
+        config = json.loads(args.config.read_text()),
+        recipe = pathlib.Path(__file__).parent,
+    )
+
+    report = matrix.run(dry_run = args.dry_run)
+
+    sys.exit(0 if all(record['status'] != 'failed' for record in report.values()) else 1)
+
+# ================================================================================================================================== #
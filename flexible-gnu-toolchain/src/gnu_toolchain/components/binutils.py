@@ -30,7 +30,8 @@ class Binutils(AutotoolsPackage):
         super().build(
                       
             doc_install_targets = [
-                'install-html install-pdf',
+                'install-html',
+                'install-pdf',
             ],
             
         )
@@ -12,27 +12,162 @@
 # ============================================================= Imports ============================================================ #
 
 # Standard imports
-import os
 import subprocess
 import re
+import os
+import hashlib
 import pathlib
+# Conan imports
+from conan.errors import ConanException
 # Private imports
 from gnu_toolchain.utils.autotools import AutotoolsPackage
+from gnu_toolchain.utils.environment import Environment
+from gnu_toolchain.utils.timings import BuildPlan
+
+# ==================================================== _evaluate_make_fragment ===================================================== #
+
+def _split_make_args(
+    text : str,
+) -> list:
+    """Splits arguments of the make function at top-level commas"""
+
+    args, depth, start = [ ], 0, 0
+    for index, char in enumerate(text):
+        depth += { '(' : 1, ')' : -1 }.get(char, 0)
+        if (char == ',') and (depth == 0):
+            args.append(text[start:index])
+            start = index + 1
+
+    return args + [ text[start:] ]
+
+def _expand_make(
+    text      : str,
+    variables : dict,
+) -> str:
+    """Expands references to make `variables` and basic make functions in the `text` (unsupported
+    functions, e.g. `call` or `foreach`, expand to an empty string)
+    """
+
+    result, index = '', 0
+    while index < len(text):
+
+        if text.startswith('$$', index):
+            result, index = result + '$', index + 2
+            continue
+        if not text.startswith('$(', index):
+            result, index = result + text[index], index + 1
+            continue
+
+        # Find the matching parenthesis
+        depth, end = 0, index + 1
+        while end < len(text):
+            depth += { '(' : 1, ')' : -1 }.get(text[end], 0)
+            if depth == 0:
+                break
+            end += 1
+        inner, index = text[index + 2:end], end + 1
+
+        function, _, args = inner.partition(' ')
+        if function in [ 'subst', 'filter', 'filter-out', 'strip', 'and', 'or', 'if' ]:
+            args = [ _expand_make(arg, variables) for arg in _split_make_args(args) ]
+            if function == 'subst':
+                result += args[2].replace(args[0], args[1])
+            elif function == 'filter':
+                result += ' '.join(word for word in args[1].split() if word in args[0].split())
+            elif function == 'filter-out':
+                result += ' '.join(word for word in args[1].split() if word not in args[0].split())
+            elif function == 'strip':
+                result += ' '.join(args[0].split())
+            elif function == 'and':
+                result += args[-1].strip() if all(arg.strip() for arg in args) else ''
+            elif function == 'or':
+                result += next((arg.strip() for arg in args if arg.strip()), '')
+            else:
+                result += args[1] if args[0].strip() else (args[2] if len(args) > 2 else '')
+        elif ' ' not in inner:
+            result += variables.get(_expand_make(inner, variables), '')
+
+    return result
+
+def _evaluate_make_fragment(
+    path      : pathlib.Path,
+    variables : dict,
+):
+    """Evaluates assignments, conditionals and includes of the make fragment at `path` updating `variables`
+    (all variables are expanded immediately, in order of their definitions; rules are ignored)
+    """
+
+    # Stack of [ active, taken ] states of conditionals
+    conditionals = [ ]
+    active       = lambda: all(state[0] for state in conditionals)
+
+    def condition(directive, argument):
+        if directive in [ 'ifdef', 'ifndef' ]:
+            defined = bool(variables.get(_expand_make(argument, variables).strip(), ''))
+            return defined if (directive == 'ifdef') else not defined
+        if argument.startswith('('):
+            left, right = _split_make_args(argument[1:-1])
+        else:
+            left, right = [ part[1:-1] for part in re.findall(r'"[^"]*"|\'[^\']*\'', argument) ]
+        equal = _expand_make(left, variables).strip() == _expand_make(right, variables).strip()
+        return equal if (directive == 'ifeq') else not equal
+
+    lines = iter(pathlib.Path(path).read_text().replace('\\\n', ' ').splitlines())
+    for line in lines:
+
+        # Skip recipes of rules and comments
+        if line.startswith('\t'):
+            continue
+        line = line.split('#')[0].strip()
+        directive, _, argument = line.partition(' ')
+        argument = argument.strip()
+
+        # Skip multi-line definitions
+        if directive == 'define':
+            for line in lines:
+                if line.strip() == 'endef':
+                    break
+            continue
+
+        # Process conditionals
+        if directive in [ 'ifeq', 'ifneq', 'ifdef', 'ifndef' ]:
+            state = active() and condition(directive, argument)
+            conditionals.append([ state, state ])
+            continue
+        if directive == 'else':
+            _, taken = conditionals.pop()
+            state    = (not taken) and active()
+            if state and argument:
+                state = condition(*[ part.strip() for part in argument.split(' ', 1) ])
+            conditionals.append([ state, taken or state ])
+            continue
+        if directive == 'endif':
+            conditionals.pop()
+            continue
+        if not active():
+            continue
+
+        # Process includes
+        if directive in [ 'include', '-include', 'sinclude' ]:
+            for included in _expand_make(argument, variables).split():
+                if pathlib.Path(included).exists():
+                    _evaluate_make_fragment(pathlib.Path(included), variables)
+            continue
+
+        # Process assignments
+        match = re.match(r'(?:override\s+)?([^:#=\s]+)\s*(\+=|::=|:=|\?=|=)(.*)', line)
+        if match is not None:
+            name, operator, value = match.groups()
+            value = _expand_make(value, variables).strip()
+            if operator == '+=':
+                variables[name] = f"{variables.get(name, '')} {value}".strip()
+            elif (operator != '?=') or (name not in variables):
+                variables[name] = value
 
 # =============================================================== Gcc ============================================================== #
 
 class Gcc(AutotoolsPackage):
 
-    def _extend_path(self):
-
-        """Extends Path with the <prefix>/bin directory if not already present"""
-
-        bin_dir = self.dirs.prefix / 'bin'
-
-        # If the path does not contain the install directory, prepend it
-        if not bin_dir.as_posix() in os.environ["PATH"]:
-            os.environ["PATH"] = f"{bin_dir.as_posix()}{os.pathsep}{os.environ['PATH']}"
-
     def build(self):
 
         # Build the LibC, if present
@@ -47,12 +182,18 @@ class Gcc(AutotoolsPackage):
                     libc_descriptor.target_files
                 )
 
-            # Build the LibC
-            libc_descriptor.make_driver(
+            # Build the LibC (it depends on the same stages as the GCC)
+            libc_driver = libc_descriptor.make_driver(
                 conanfile   = self.conanfile,
                 target      = self.target,
                 pkg_version = self.pkg_version,
-            ).build()
+                depends_on  = self.depends_on,
+                jobs        = self.jobs,
+            )
+            libc_driver.build()
+
+            # The GCC is installed on top of the LibC
+            self.depends_on = self.depends_on + [ libc_driver._stage_id ]
 
         # Resolve target files path patterns, if present
         if self.description.target_files is not None:
@@ -91,23 +232,30 @@ class Gcc(AutotoolsPackage):
                 f"--with-sysroot={self.dirs.offprefix.as_posix()}/{self.target}",
             ]
 
+        # Restrict multilibs to the requested subset
+        multilibs = self.description.get_multilibs()
+        if multilibs is not None:
+            self._configure_multilibs(multilibs)
+
         # Pick targets to be built
         targets = { } if self.description.full_build else {
             'target' :         'all-gcc',
             'install_target' : 'install-gcc',
         }
 
-        # Create symbolic link to the <install_dir> from <install_dir>/<target>/usr
+        # Create symbolic link to the <install_dir> from <install_dir>/<target>/usr (unless only the build plan is collected)
         usr_dir = self.dirs.prefix / self.target / 'usr'
-        if usr_dir.exists():
-            usr_dir.unlink()
-        try:
-            usr_dir.symlink_to(self.dirs.prefix)
-        except Exception as e:
-            self.conanfile.output.error(
-                f"Failed to create symbolic link to the <install_dir> from <install_dir>/<target>/usr ({e}). " + 
-                f"If you are on Windows, you may need to enable Developer Mode in the Windows Settings. for symlink creation to work.")
-            raise
+        with self.install_lock:
+            if not BuildPlan.is_collecting(self.conanfile):
+                if usr_dir.exists():
+                    usr_dir.unlink()
+                try:
+                    usr_dir.symlink_to(self.dirs.prefix)
+                except Exception as e:
+                    self.conanfile.output.error(
+                        f"Failed to create symbolic link to the <install_dir> from <install_dir>/<target>/usr ({e}). " + 
+                        f"If you are on Windows, you may need to enable Developer Mode in the Windows Settings. for symlink creation to work.")
+                    raise
 
         # Build the project
         super().build(
@@ -115,7 +263,8 @@ class Gcc(AutotoolsPackage):
             **targets,
                       
             doc_install_targets = [
-                'install-html install-pdf',
+                'install-html',
+                'install-pdf',
             ] if self.conanfile.settings.os != 'Windows' else [
                 'install-html',
             ],
@@ -124,25 +273,109 @@ class Gcc(AutotoolsPackage):
             doc_install_args = ([ '-j1' ] if (self.conanfile.settings.os == 'Linux') else None),
 
             # Force C++11 (see GCC prerequisites, @note MSYS/MinGW GCC requires GNU extensions to make __POSIX_VISIBLE defined)
-            envs = {
-                'CXXFLAGS' : f'{os.environ.get("CXXFLAGS", "")} ' + (
-                    '-std=gnu++11'
-                        if (self.conanfile.settings.os == 'Windows') else
-                    '-std=c++11'
-                )
-            },
+            envs = Environment().append('CXXFLAGS',
+                '-std=gnu++11'
+                    if (self.conanfile.settings.os == 'Windows') else
+                '-std=c++11'
+            ),
 
         )
-
-        # Prepend PATH with the new GCC
-        self._extend_path()
         
     # ---------------------------------------------------------------------------- #
 
+    def _configure_multilibs(self,
+        multilibs : list,
+    ):
+        """Restricts multilibs selected by `--with-multilib-list` to `multilibs` specs. The custom multilib config
+        fragment (see `--with-multilib-list=@<file>` in GCC installation docs, supported by ARM targets) is included
+        before the fragment of the profile (config.gcc appends the profile's `tmake_profile_file` after processing the
+        whole list), so it overrides (with `override`) the list of required multilibs defined by the profile (reuse rules
+        of the profile are dropped as they may refer to multilibs that are not built anymore). Specs are validated against MULTILIB_OPTIONS of the profile once sources are
+        available (see `_validate_multilibs`).
+        """
+
+        if not self.target.startswith('arm'):
+            raise ConanException(f"Explicit multilib subsets are supported only by ARM targets (requested for '{self.target}')")
+
+        # Find the profile the subset is selected from
+        index = next((index for index, option in enumerate(self.description.config) if option.startswith('--with-multilib-list=')), None)
+        if index is None:
+            raise ConanException(f"Explicit multilib subset requires '--with-multilib-list=<profile>' in the config of '{self.description.name}'")
+
+        self._multilib_fragment = '\n'.join([
+            f"# Multilib subset of {self.target} toolchain (generated by the gnu_toolchain package)",
+            f"override MULTILIB_REQUIRED = {' '.join(multilibs)}",
+            f"override MULTILIB_REUSE    =",
+        ]) + '\n'
+        self._multilib_fragment_name = f't-ml-gnu-toolchain-{hashlib.sha256(self._multilib_fragment.encode()).hexdigest()[:8]}'
+        self._multilib_profiles      = [ profile for profile in self.description.config[index].partition('=')[2].split(',') if not profile.startswith('@') ]
+        self._multilibs              = multilibs
+
+        self.description.config[index] += f',@{self._multilib_fragment_name}'
+
+    def _validate_multilibs(self):
+
+        """Checks that all requested multilib specs are combinations of MULTILIB_OPTIONS of profiles selected by
+        `--with-multilib-list` (at most one option of each group, in order of groups). Otherwise GCC would silently
+        build no multilib for the spec.
+        """
+
+        arm_dir = self.dirs.src / 'gcc' / 'config' / 'arm'
+
+        # Since GCC 8 config.gcc selects the common `t-multilib` fragment for both profiles (it includes fragments
+        # of requested profiles defining their architectures), older versions select the fragment of the profile
+        config_gcc = self.dirs.src / 'gcc' / 'config.gcc'
+        match      = re.search(r'aprofile\|rmprofile\)\s*tmake_profile_file="arm/(t-[\w-]+)"', config_gcc.read_text()) if config_gcc.exists() else None
+        fragments  = [ match[1] ] if (match is not None) else [ f't-{profile}' for profile in self._multilib_profiles ]
+
+        # Evaluate fragments (just like the make does with TM_MULTILIB_CONFIG set by config.gcc)
+        variables = {
+            'srcdir'             : (self.dirs.src / 'gcc').as_posix(),
+            'TM_MULTILIB_CONFIG' : ','.join(self._multilib_profiles),
+        }
+        for fragment in fragments:
+            if not (arm_dir / fragment).exists():
+                raise ConanException(f"Multilib fragment '{fragment}' of the '{','.join(self._multilib_profiles)}' profile not found in '{arm_dir.as_posix()}'")
+            _evaluate_make_fragment(arm_dir / fragment, variables)
+
+        # Collect groups of options (joined with '/' in each group)
+        groups = [ group.split('/') for group in variables.get('MULTILIB_OPTIONS', '').split() ]
+        if not groups:
+            raise ConanException(f"No MULTILIB_OPTIONS found in '{', '.join(fragments)}' fragments of the '{','.join(self._multilib_profiles)}' profile")
+
+        for spec in self._multilibs:
+            indices = [ next((index for index, group in enumerate(groups) if option in group), None) for option in spec.split('/') ]
+            if (None in indices) or (indices != sorted(set(indices))):
+                aliases = ', '.join(self.description.multilib_aliases) or 'none'
+                raise ConanException(
+                    f"Unknown multilib '{spec}' of the '{','.join(self._multilib_profiles)}' profile (expected an alias ({aliases}) or " +
+                    f"options from MULTILIB_OPTIONS joined with '/': {' '.join('/'.join(group) for group in groups)})"
+                )
+
+    def _clone_sources(self):
+
+        super()._clone_sources()
+
+        # Validate the requested multilibs
+        if getattr(self, '_multilib_fragment', None) is not None:
+            self._validate_multilibs()
+
+        # Put the multilib config fragment into the source tree (looked up in gcc/config/arm by the configure script)
+        if getattr(self, '_multilib_fragment', None) is not None:
+            path = self.dirs.src / 'gcc' / 'config' / 'arm' / self._multilib_fragment_name
+            if (not path.exists()) or (path.read_text() != self._multilib_fragment):
+                tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+                tmp_path.write_text(self._multilib_fragment)
+                os.replace(tmp_path, path)
+
     def _get_multilib_dirs(self):
 
         gcc_path = self.dirs.prefix / 'bin' / f'{self.target}-gcc'
 
+        # The compiler may be not installed yet if only the plan of the build is collected (multilib dirs are unknown)
+        if BuildPlan.is_collecting(self.conanfile) and (not gcc_path.exists()):
+            return [ ]
+
         # Run the GCC to get the list of multilib dirs
         result = subprocess.run([
             gcc_path.as_posix(), '-print-multi-lib'
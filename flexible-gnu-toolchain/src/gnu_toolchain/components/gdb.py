@@ -13,9 +13,11 @@
 
 # System imports
 import pathlib
-import os
+import shutil
 # Private imports
 from gnu_toolchain.utils.autotools import AutotoolsPackage
+from gnu_toolchain.utils.environment import Environment
+from gnu_toolchain.utils.timings import BuildPlan
 
 # =============================================================== Gdb ============================================================== #
 
@@ -43,6 +45,12 @@ class Gdb(AutotoolsPackage):
             f"--with-python=" + ("yes" if self.description.with_python else "no"),
         ]
 
+        # Build a single multi-target debugger if requested
+        if self.description.enable_targets:
+            self.description.config += [
+                f"--enable-targets={','.join([ self.target ] + self.description.enable_targets)}",
+            ]
+
         # Compile components to be disabled on current platform
         disabled_modules = {
             
@@ -61,7 +69,8 @@ class Gdb(AutotoolsPackage):
         super().build(
             
             doc_install_targets = [
-                'install-html install-pdf',
+                'install-html',
+                'install-pdf',
             ] if self.conanfile.settings.os != 'Windows' else [
                 'install-pdf',
             ],
@@ -70,24 +79,47 @@ class Gdb(AutotoolsPackage):
             envs = self._make_env(),
             
         )
+
+        # Provide target-prefixed names of the multi-target debugger for additional targets
+        if self.description.enable_targets and (not BuildPlan.is_collecting(self.conanfile)):
+            with self.install_lock:
+                self._link_additional_targets()
         
     # ---------------------------------------------------------------------------- #
 
     def _make_env(self):
 
-        env = { }
+        zlib_dir = pathlib.Path(self.conanfile.dependencies['zlib'].package_folder).as_posix()
 
         # Extend the environment to let the GDB find the zlib
-        env["CFLAGS"]  = f"{os.environ.get('CFLAGS', '')}  -I{pathlib.Path(self.conanfile.dependencies['zlib'].package_folder).as_posix()}/include"
-        env["LDFLAGS"] = f"{os.environ.get('LDFLAGS', '')} -L{pathlib.Path(self.conanfile.dependencies['zlib'].package_folder).as_posix()}/lib"
+        env = Environment() \
+            .append('CFLAGS',  f'-I{zlib_dir}/include') \
+            .append('LDFLAGS', f'-L{zlib_dir}/lib')
 
         # Force C++17 from GDB 15.0 onwards
-        env['CXXFLAGS'] = f'{os.environ.get("CXXFLAGS", "")} ' + (
-            '-std=gnu++17'
-                if (self.description.version.major >= 15) else
-            ''
-        )
+        if self.description.version.major >= 15:
+            env = env.append('CXXFLAGS', '-std=gnu++17')
             
         return env
+
+    def _link_additional_targets(self):
+
+        # Find suffix of the executable
+        suffix = ([ '' ] + [ opt.removeprefix('--program-suffix=') for opt in self.description.config if opt.startswith('--program-suffix=') ])[-1]
+        # Find extension of the executable
+        extension = '.exe' if (self.conanfile.settings.os == 'Windows') else ''
+
+        gdb_path = self.dirs.prefix / 'bin' / f'{self.target}-gdb{suffix}{extension}'
+        for target in self.description.enable_targets:
+
+            link_path = self.dirs.prefix / 'bin' / f'{target}-gdb{suffix}{extension}'
+            if link_path.exists() or link_path.is_symlink():
+                continue
+
+            try:
+                link_path.symlink_to(gdb_path.name)
+            except Exception as e:
+                self.conanfile.output.warning(f"Failed to link '{link_path.as_posix()}' to '{gdb_path.as_posix()}' ({e}). Copying...")
+                shutil.copy(gdb_path, link_path)
                                           
 # ================================================================================================================================== #
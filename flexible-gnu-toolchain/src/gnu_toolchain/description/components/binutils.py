@@ -29,4 +29,20 @@ class BinutilsDescription(CommonDescription):
     # Associated driver
     driver = Binutils
 
+    # Estimated memory used by a single make job [MiB]
+    memory_per_job = {
+        'Debug' : 1024,
+        '_'     : 512,
+    }
+
+    # Libraries built from the common binutils-gdb codebase (may be shared with GDB stages built from the same release)
+    shared_build_dirs = [
+        'bfd',
+        'opcodes',
+        'libiberty',
+        'libctf',
+        'libsframe',
+        'zlib',
+    ]
+
 # ================================================================================================================================== #
@@ -11,6 +11,8 @@
 
 # ============================================================= Imports ============================================================ #
 
+# System imports
+import copy
 # External imports
 from packaging.version import Version
 
@@ -22,9 +24,21 @@ class CommonDescription:
     target_files = None
     # List of files to be removed after installation
     cleanup_files = None
+    # List of glob patterns of source subtrees (relative to the source root) skipped when the source archive is extracted
+    source_excludes = None
+
+    # Subdirectories of the build tree that may be shared with build trees of stages listed in `share_build_with`
+    shared_build_dirs = None
+    # Names of stages whose build trees provide `shared_build_dirs` (the first compatible one is used)
+    share_build_with = None
+    # Prefixes of configure options that do not affect `shared_build_dirs` (may differ between sharing stages)
+    share_build_neutral_options = None
 
     # By default buid doc
     without_doc = False
+
+    # Estimated peak memory (in MiB) used by a single make job (may be dictionary keyed by build type, like `config`)
+    memory_per_job = None
     
     # ------------------------------------------------------------------ #
 
@@ -33,6 +47,12 @@ class CommonDescription:
     ):
         self.conanfile = conanfile
 
+        # Make instance-local copies of descriptors extended in place by build drivers (class-level
+        # values are shared by all instances created from the same descriptor module)
+        for member in [ 'config', 'target_files', 'cleanup_files', 'source_excludes' ]:
+            if isinstance(getattr(self, member, None), (list, dict)):
+                setattr(self, member, copy.deepcopy(getattr(self, member)))
+
         # Pick source of the component name
         dep_name = getattr(self, 'dep_name', self.name)
 
@@ -70,6 +90,28 @@ class CommonDescription:
             'env',
             default = { }
         )
+    
+    def get_source_excludes(self) -> list:
+        return list(self.source_excludes or [ ])
+
+    def get_memory_per_job(self) -> int | None:
+        return self._get_build_typed_descriptor(
+            'memory_per_job',
+            default = None
+        )
+
+    def get_host_linkage(self) -> str:
+
+        """Returns linkage of host executables of the stage selected by the `host_linkage` option. Executables
+        loading plugins (enabled in `config`) cannot be linked fully statically, so only the C/C++ runtime
+        is linked statically in their case.
+        """
+
+        linkage = str(self.conanfile.options.get_safe('host_linkage', 'dynamic'))
+        if (linkage == 'static') and any(opt in [ '--enable-plugin', '--enable-plugins' ] for opt in self.get_config()):
+            return 'static-runtime'
+
+        return linkage
 
     # ------------------------------------------------------------------ #
 
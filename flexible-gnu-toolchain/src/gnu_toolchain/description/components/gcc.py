@@ -13,6 +13,7 @@
 
 # Package imports
 from gnu_toolchain.description.components.common import CommonDescription
+from gnu_toolchain.utils.common import split_option
 from gnu_toolchain.components.gcc import Gcc
 
 # ========================================================= GccDescription ========================================================= #
@@ -33,6 +34,32 @@ class GccDescription(CommonDescription):
 
     # Associated driver
     driver = Gcc
+
+    # Source subtrees of front ends and runtime libraries of languages (not extracted unless the language is enabled)
+    language_dirs = {
+        'ada'     : [ 'gcc/ada', 'libada', 'gnattools' ],
+        'cobol'   : [ 'gcc/cobol', 'libgcobol' ],
+        'd'       : [ 'gcc/d', 'libphobos' ],
+        'fortran' : [ 'gcc/fortran', 'libgfortran' ],
+        'go'      : [ 'gcc/go', 'libgo', 'gotools' ],
+        'jit'     : [ 'gcc/jit' ],
+        'm2'      : [ 'gcc/m2', 'libgm2' ],
+        'objc'    : [ 'gcc/objc', 'libobjc' ],
+        'obj-c++' : [ 'gcc/objcp' ],
+        'rust'    : [ 'gcc/rust', 'libgrust' ],
+    }
+
+    # Explicit subset of multilibs built for the target (list of MULTILIB_REQUIRED specs, e.g. 'mthumb/march=armv7e-m+fp/mfloat-abi=hard'
+    # or aliases defined in `multilib_aliases`); all multilibs selected by `--with-multilib-list` are built if None
+    multilibs = None
+    # Human-readable names of multilib specs
+    multilib_aliases = { }
+
+    # Estimated memory used by a single make job [MiB] (linking cc1plus/lto1 dominates)
+    memory_per_job = {
+        'Debug' : 3072,
+        '_'     : 1536,
+    }
     
     # ------------------------------------------------------------------ #
 
@@ -45,4 +72,46 @@ class GccDescription(CommonDescription):
         if hasattr(self, 'Libc'):
             self.libc = self.Libc(conanfile)
 
+    # ------------------------------------------------------------------ #
+
+    def get_multilibs(self) -> list | None:
+
+        """Returns list of multilib specs to be built (the `multilibs` option takes precedence over the descriptor)
+        with aliases resolved. Returns None if the default set of multilibs should be built.
+        """
+
+        multilibs = split_option(self.conanfile.options.get_safe('multilibs'))
+        if not multilibs:
+            multilibs = self.multilibs
+        if not multilibs:
+            return None
+
+        return [ self.multilib_aliases.get(multilib, multilib) for multilib in multilibs ]
+
+    def get_source_excludes(self) -> list:
+
+        """Extends explicit excludes with the compiler's testsuite (never run by the build) and sources of
+        languages not listed in `--enable-languages` (nothing is derived if the option is not given)
+        """
+
+        excludes = super().get_source_excludes() + [ 'gcc/testsuite' ]
+
+        # Parse enabled languages
+        languages = None
+        for option in self.get_config():
+            if option.startswith('--enable-languages='):
+                languages = set(option.removeprefix('--enable-languages=').split(','))
+        if (languages is None) or ('all' in languages):
+            return excludes
+
+        # Objective-C++ front end builds on top of the Objective-C one
+        if 'obj-c++' in languages:
+            languages.add('objc')
+
+        for language, dirs in self.language_dirs.items():
+            if language not in languages:
+                excludes += dirs
+
+        return excludes
+
 # ================================================================================================================================== #
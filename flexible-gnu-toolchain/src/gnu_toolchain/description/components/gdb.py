@@ -29,7 +29,49 @@ class GdbDescription(CommonDescription):
     # Associated driver
     driver = Gdb
 
+    # Estimated memory used by a single make job [MiB]
+    memory_per_job = {
+        'Debug' : 2048,
+        '_'     : 1024,
+    }
+
     # Default Python integration
     with_python = False
 
+    # Additional targets supported by the debugger (set by the driver in multi-target builds)
+    enable_targets = None
+
+    # Libraries built from the common binutils-gdb codebase (may be shared with other GDB stages)
+    shared_build_dirs = [
+        'bfd',
+        'opcodes',
+        'libiberty',
+        'libctf',
+        'libsframe',
+        'libdecnumber',
+        'libbacktrace',
+        'zlib',
+        'readline',
+        'gnulib',
+        'gdbsupport',
+    ]
+
+    # Options affecting only the debugger itself (gdb/ and sim/ directories)
+    share_build_neutral_options = [
+        '--with-python',
+        '--program-suffix',
+    ]
+
+    # ------------------------------------------------------------------ #
+
+    def get_host_linkage(self) -> str:
+
+        linkage = super().get_host_linkage()
+
+        # Python integration loads extension modules of the interpreter
+        if (linkage == 'static') and self.with_python:
+            return 'static-runtime'
+
+        return linkage
+
 # ================================================================================================================================== #
@@ -29,4 +29,7 @@ class NewlibDescription(CommonDescription):
     # Associated driver
     driver = Newlib
 
+    # Estimated memory used by a single make job [MiB]
+    memory_per_job = 256
+
 # ================================================================================================================================== #
@@ -0,0 +1,140 @@
+# ====================================================================================================================================
+# @file       registry.py
+# @author     Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @maintainer Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @date       Monday, 19th October 2026 10:02:17 am
+# @modified   Monday, 19th October 2026 10:02:17 am by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# 
+# 
+# @copyright Krzysztof Pierczyk © 2026
+# ====================================================================================================================================
+
+# ============================================================ Imports ============================================================= #
+
+# Standard imports
+import pathlib
+import threading
+import importlib.util
+
+# ======================================================= DescriptionRegistry ====================================================== #
+
+class DescriptionRegistry:
+
+    """Process-wide cache of the target descriptors residing in the `data/` directory of the recipe.
+
+    Conan calls each of the recipe's methods on a freshly constructed driver. Without the cache
+    each of these calls would re-execute the descriptor module and re-instantiate the description.
+    The registry indexes `data/*.py` files once per data directory and loads each module once.
+    `Description` instances are cached on the conanfile they are bound to (so they are released
+    along with it), keyed by the target and values of its options and settings. Modules (and
+    descriptions created from them) are invalidated when the descriptor file's modification time changes.
+    """
+
+    # Attribute of the conanfile holding its descriptions
+    descriptions_attribute = '_gnu_toolchain_descriptions'
+
+    def __init__(self):
+        self._lock    = threading.Lock()
+        self._indices = { }
+        self._modules = { }
+
+    # ------------------------------------------------------------------ #
+
+    def targets(self,
+        data_dir : pathlib.Path,
+    ) -> dict:
+
+        """Returns dictionary mapping names of targets described in the `data_dir` to the paths of descriptors"""
+
+        data_dir = pathlib.Path(data_dir)
+        mtime    = data_dir.stat().st_mtime_ns if data_dir.exists() else None
+
+        with self._lock:
+
+            # Reindex the directory if it has changed (e.g. a descriptor has been added)
+            cached = self._indices.get(data_dir)
+            if (cached is None) or (cached[0] != mtime):
+                cached = (mtime, {
+                    path.stem : path for path in sorted(data_dir.glob('*.py'))
+                } if mtime is not None else { })
+                self._indices[data_dir] = cached
+
+            return cached[1]
+
+    def get_module(self,
+        data_dir : pathlib.Path,
+        target   : str,
+    ):
+        """Returns the (cached) descriptor module of the `target`"""
+
+        # Find the descriptor
+        path = self.targets(data_dir).get(target, None)
+        if (path is None) or (not path.exists()):
+            raise FileNotFoundError(f"Description file for the '{target}' target does not exist!")
+
+        mtime = path.stat().st_mtime_ns
+
+        with self._lock:
+
+            # Reload the module if the descriptor has been modified
+            cached = self._modules.get(path)
+            if (cached is None) or (cached[0] != mtime):
+
+                spec   = importlib.util.spec_from_file_location(f'gnu_toolchain_description_{target.replace("-", "_")}', path.as_posix())
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+
+                cached = (mtime, module)
+                self._modules[path] = cached
+
+            return cached[1]
+
+    def get_description(self,
+        conanfile,
+        target : str | None = None,
+        fresh  : bool       = False,
+    ):
+        """Returns the `Description` of the `target` (conanfile's target by default) for the given
+        conanfile. If `fresh` is True, a new instance is created (and not cached). This should be used
+        whenever the description is going to be modified (e.g. by the build drivers).
+        """
+
+        target   = str(target if target is not None else conanfile.options.target)
+        data_dir = pathlib.Path(conanfile.recipe_folder) / "data"
+        module   = self.get_module(data_dir, target)
+
+        # Create a new instance if requested
+        if fresh:
+            return module.Description(conanfile)
+
+        # Compute the cache key (descriptions are bound to folders and output of the conanfile, so they are
+        # cached on the conanfile itself; descriptions created from outdated modules are not reused)
+        key = (
+            target,
+            conanfile.options.dumps(),
+            conanfile.settings.dumps(),
+        )
+
+        with self._lock:
+            descriptions = getattr(conanfile, self.descriptions_attribute, None)
+            if descriptions is None:
+                descriptions = { }
+                setattr(conanfile, self.descriptions_attribute, descriptions)
+            cached = descriptions.get(key)
+            if (cached is not None) and (cached[0] is module):
+                return cached[1]
+
+        # Create the description outside of the lock (it may be expensive)
+        description = module.Description(conanfile)
+
+        with self._lock:
+            descriptions[key] = (module, description)
+
+        return description
+
+# ============================================================= Globals ============================================================ #
+
+# Process-wide registry of descriptions
+registry = DescriptionRegistry()
+
+# ================================================================================================================================== #
@@ -12,16 +12,28 @@
 # ============================================================ Imports ============================================================= #
 
 # Standard imports
+import concurrent.futures
+import contextlib
 import pathlib
-from importlib.machinery import SourceFileLoader
 # Conan imports
+from conan.errors import ConanException
+from conan.tools.build import build_jobs
 from conan.tools.layout import basic_layout
-from conan.tools.files import copy
 from conan.tools.gnu import AutotoolsToolchain
 from conan.tools.system.package_manager import Apt
 # Package imports
 from gnu_toolchain.components import *
 from gnu_toolchain.utils.autotools import AutotoolsPackage
+from gnu_toolchain.utils.stage_cache import StageCache
+from gnu_toolchain.utils.prefix_snapshots import PrefixSnapshots
+from gnu_toolchain.utils.manifest import InstallManifest
+from gnu_toolchain.utils.files import sync_tree, clone_tree
+from gnu_toolchain.utils.timings import BuildPlan, TimingDatabase
+from gnu_toolchain.utils.logs import Progress
+from gnu_toolchain.utils.disk import format_size
+from gnu_toolchain.utils.jobs import Jobserver
+from gnu_toolchain.description import GdbDescription
+from gnu_toolchain.description.registry import registry
 
 # ======================================================== FromSourceDriver ======================================================== #
 
@@ -36,6 +48,41 @@ class FromSourceDriver():
 
         # Common config
         'with_doc' : [ True, False ],
+        # Explicit subset of target multilibs (comma-separated multilib specs or aliases defined by the descriptor)
+        'multilibs' : [ None, 'ANY' ],
+        # Linkage of host executables (dynamic, with static C/C++ runtime or fully static)
+        'host_linkage' : [ 'dynamic', 'static-runtime', 'static' ],
+
+        # Build trees policy (kept, removed or archived after the stage succeeds)
+        'build_trees' : [ 'keep', 'remove', 'archive' ],
+        # Directories shared by builds (e.g. entries of the build matrix)
+        'stage_cache_dir' : [ None, 'ANY' ],
+        'download_dir'    : [ None, 'ANY' ],
+        # Bare reference repositories of git sources (shared by all checkouts of the remote)
+        'git_reference_dir' : [ None, 'ANY' ],
+        # Remote stage cache (HTTP GET/PUT of stage artifacts)
+        'stage_cache_url'  : [ None, 'ANY' ],
+        'stage_cache_mode' : [ 'read-write', 'read-only' ],
+        # Maximal number of stages built in parallel (in multi-target builds)
+        'parallel_stages' : [ 'ANY' ],
+        # Output of build commands (streamed to the console or captured into compressed per-stage logs)
+        'build_logs'     : [ 'console', 'file' ],
+        'build_log_tail' : [ 'ANY' ],
+        # Autoconf cache shared by configure scripts of all stages (and builds, if the directory is shared)
+        'autoconf_cache'     : [ True, False ],
+        'autoconf_cache_dir' : [ None, 'ANY' ],
+        # Number of make jobs limited by available memory (and throttled under memory pressure)
+        'memory_aware_jobs' : [ True, False ],
+        # Snapshots of install trees taken after each stage (used to roll back failed stages)
+        'prefix_snapshots' : [ True, False ],
+        # Stages installed into staging trees (DESTDIR) merged into install trees with per-stage manifests
+        'staged_install' : [ True, False ],
+        # The way the install tree is packaged (synced, cloned, linked or moved into the package folder)
+        'packaging' : [ 'sync', 'clone', 'link', 'move' ],
+        # Database of durations of steps (used to predict durations and the remaining time of the build)
+        'timings_db' : [ None, 'ANY' ],
+        # Only print the plan of the build (steps to be run or skipped with predicted durations)
+        'plan' : [ True, False ],
 
         # Dependencies versions
         "with_zlib_version"     : [ 'ANY' ],
@@ -65,6 +112,41 @@ class FromSourceDriver():
 
         # Common config
         'with_doc' : True,
+        # By default, build multilibs selected by the descriptor
+        'multilibs' : None,
+        # By default, link host executables dynamically
+        'host_linkage' : 'dynamic',
+
+        # By default, keep build trees
+        'build_trees' : 'keep',
+        # By default, do not share stages and downloads
+        'stage_cache_dir' : None,
+        'download_dir'    : None,
+        # By default, keep reference repositories in the download directory
+        'git_reference_dir' : None,
+        # By default, do not use remote stage cache
+        'stage_cache_url'  : None,
+        'stage_cache_mode' : 'read-write',
+        # By default, build stages one by one
+        'parallel_stages' : 1,
+        # By default, stream output to the console (print last 50 lines of logs on failure if captured)
+        'build_logs'     : 'console',
+        'build_log_tail' : 50,
+        # By default, do not share configure results between configure scripts
+        'autoconf_cache'     : False,
+        'autoconf_cache_dir' : None,
+        # By default, use the number of jobs given by Conan's configuration
+        'memory_aware_jobs' : False,
+        # By default, do not snapshot install trees (staged installs keep failed installs out of them)
+        'prefix_snapshots' : False,
+        # By default, stage installs
+        'staged_install' : True,
+        # By default, copy only files that changed since the previous packaging into the package mirror
+        'packaging' : 'sync',
+        # By default, keep timings in the build folder
+        'timings_db' : None,
+        # By default, build the toolchain
+        'plan' : False,
 
         # Dependencies versions
         "with_zlib_version"     : "[>=1.2.11]",
@@ -90,6 +172,27 @@ class FromSourceDriver():
         
     }
 
+    # Options that affect only the way the package is built (not its content)
+    local_options = [
+        'build_trees',
+        'stage_cache_dir',
+        'download_dir',
+        'git_reference_dir',
+        'stage_cache_url',
+        'stage_cache_mode',
+        'parallel_stages',
+        'build_logs',
+        'build_log_tail',
+        'autoconf_cache',
+        'autoconf_cache_dir',
+        'memory_aware_jobs',
+        'prefix_snapshots',
+        'staged_install',
+        'packaging',
+        'timings_db',
+        'plan',
+    ]
+
     # ---------------------------------------------------------------------------- #
 
     def configure(self):
@@ -102,6 +205,11 @@ class FromSourceDriver():
             if self.conanfile.settings.compiler != 'gcc':
                 raise ValueError(f"On Windows only GCC (MinGW) is supported as a host compiler (current compiler: {self.conanfile.settings.compiler})")
 
+        # Make sure all targets are described
+        for target in AutotoolsPackage.get_targets(self.conanfile):
+            if target not in registry.targets(pathlib.Path(self.conanfile.recipe_folder) / "data"):
+                raise ValueError(f"Description file for the '{target}' target does not exist!")
+
     def system_requirements(self):
 
         if self.conanfile.settings.os == 'Linux':
@@ -118,9 +226,16 @@ class FromSourceDriver():
 
             # Get dependency version
             dep_version = getattr(self.conanfile.options, f"with_{dep}_version")
+            # Get dependency options (all targets need to agree on them as host libraries are shared)
+            dep_options = [ description.dependencies.get_options(dep) for description in self._descriptions ]
+            if any(options != dep_options[0] for options in dep_options):
+                raise ValueError(f"Targets of the multi-target build require different options of the '{dep}' dependency")
+            # Statically linked executables need static libraries of dependencies
+            if str(self.conanfile.options.get_safe('host_linkage', 'dynamic')) != 'dynamic':
+                dep_options[0] = dep_options[0] | { 'shared' : False }
             # Add dependency
             self.conanfile.requires(f"{dep}/{dep_version}",
-                options = self._description.dependencies.get_options(dep)
+                options = dep_options[0]
             )
 
         # Specify dependencies
@@ -171,18 +286,81 @@ class FromSourceDriver():
         toolchain.generate()
 
     def build(self):
-        for component_description in self._description.components:
-            component_description.make_driver(
-                conanfile   = self.conanfile,
-                target      = self._description.target,
-                pkg_version = self._description.pkg_version,
-            ).build()
+
+        # Collect plan of the build (stages only report their steps) if requested or if the remaining time
+        # can be estimated from durations of previous builds (without fetching anything in the latter case)
+        only_plan = str(self.conanfile.options.get_safe('plan', False)) == 'True'
+        if (not only_plan) and TimingDatabase.from_conanfile(self.conanfile).is_empty():
+            self._build_stages()
+            return
+
+        plan = BuildPlan.collect(self.conanfile, offline = not only_plan)
+        try:
+
+            for driver in self._make_drivers()[0]:
+                driver.build()
+            plan.collecting = False
+            plan.show(self.conanfile)
+
+            # Stop if only the plan has been requested
+            if only_plan:
+                return
+
+            # Show estimated remaining time of the build on the progress line
+            Progress.eta = plan.eta
+            self._build_stages()
+
+        finally:
+            Progress.eta = None
+            BuildPlan.drop(self.conanfile)
 
     def package(self):
-        copy(self.conanfile,
-            pattern = '*',
-            src     = AutotoolsPackage.make_dirs(self.conanfile).prefix.as_posix(),
-            dst     = self.conanfile.package_folder,
+
+        prefix = AutotoolsPackage.make_dirs(self.conanfile).prefix
+        mode   = str(self.conanfile.options.get_safe('packaging', 'sync'))
+
+        # The install tree may have been moved away by the previous packaging (if the build has not been run since)
+        if not prefix.is_dir():
+            raise ConanException(f"Install tree '{prefix.as_posix()}' does not exist. Run the build (again) before packaging")
+
+        # Clone, link or move the whole tree (the latter leaves the build folder without the install tree)
+        if mode != 'sync':
+            stats = clone_tree(self.conanfile,
+                src  = prefix,
+                dst  = pathlib.Path(self.conanfile.package_folder),
+                mode = mode,
+            )
+            # Once moved, stages need to be installed again by the next build
+            if stats['moved']:
+                AutotoolsPackage.forget_installs(self.conanfile)
+                PrefixSnapshots.clear(self.conanfile)
+            return
+
+        # Digests of installed files known from install manifests (only if files have not been modified since)
+        digests = { }
+        for manifest in InstallManifest.load_all(self.conanfile.build_folder).values():
+            for path, entry in manifest['files'].items():
+                path = pathlib.Path(self.conanfile.build_folder) / path
+                if path.is_relative_to(prefix) and path.is_file():
+                    stat = path.stat()
+                    if (stat.st_size == entry['size']) and (stat.st_mtime_ns == entry.get('mtime_ns')):
+                        digests[path.relative_to(prefix).as_posix()] = entry['sha256']
+
+        # Copy only files that changed since the previous packaging into the mirror kept in the build folder
+        # (Conan packages into a new, empty folder each time, so the package folder cannot be synced)
+        mirror = pathlib.Path(self.conanfile.build_folder) / 'package-mirror'
+        sync_tree(self.conanfile,
+            src     = prefix,
+            dst     = mirror,
+            digests = digests,
+        )
+
+        # Reflink or hardlink the mirror into the package folder (the mirror replaces changed files instead
+        # of modifying them in place, so files shared with previously exported packages are never modified)
+        clone_tree(self.conanfile,
+            src  = mirror,
+            dst  = pathlib.Path(self.conanfile.package_folder),
+            mode = 'link',
         )
     
     def package_info(self):
@@ -190,25 +368,216 @@ class FromSourceDriver():
         
     # ---------------------------------------------------------------------------- #
 
+    @property
+    def _descriptions(self):
+
+        # Make sure target is set
+        if not AutotoolsPackage.get_targets(self.conanfile):
+            raise ValueError("Target must be set!")
+
+        return [
+            registry.get_description(self.conanfile, target)
+                for target in AutotoolsPackage.get_targets(self.conanfile)
+        ]
+
     @property
     def _description(self):
+        return self._descriptions[0]
 
-        # If config has not been loaded, load it
-        if not hasattr(self, '_description_cache'):
+    def _make_drivers(self) -> tuple:
 
-            description_file = pathlib.Path(self.conanfile.recipe_folder) / "data" / (str(self.conanfile.options.target) + ".py")
+        """Creates drivers of all stages of the build. Returns (drivers, dependencies) pair."""
 
-            # Check if target description file exists
-            if not description_file.exists():
-               raise FileNotFoundError(f"Description file for the '{self.conanfile.options.target}' target does not exist!")
+        # Forget keys of stages computed by previous builds
+        StageCache.reset_keys(self.conanfile)
 
-            self._description_cache = SourceFileLoader(
-                'config_module',
-                description_file.as_posix()
-            ).load_module().Description(
-                self.conanfile
+        # Use fresh descriptions as drivers modify them during the build
+        descriptions = [
+            registry.get_description(self.conanfile, target, fresh = True)
+                for target in AutotoolsPackage.get_targets(self.conanfile)
+        ]
+
+        # Create drivers of all stages
+        schedule = self._schedule(descriptions)
+        drivers  = [
+            component_description.make_driver(
+                conanfile   = self.conanfile,
+                target      = description.target,
+                pkg_version = description.pkg_version,
+            ) for description, component_description in schedule
+        ]
+        # Find dependencies between stages
+        dependencies = self._get_dependencies(schedule, scoped_cleanups = all(driver.manifest is not None for driver in drivers))
+        preceding = [ ]
+        for index, driver in enumerate(drivers):
+            driver.depends_on = [ drivers[dependency]._stage_id for dependency in dependencies[index] ]
+            # Stages depend only on stages scheduled before them
+            preceding.append(set(dependencies[index]).union(*[ preceding[dependency] for dependency in dependencies[index] ]))
+            driver.preceded_by = [ drivers[dependency]._stage_id for dependency in sorted(preceding[index]) ]
+
+        return (drivers, dependencies)
+
+    def _build_stages(self):
+
+        drivers, dependencies = self._make_drivers()
+
+        # Roll back install trees left dirty by a failed stage (or installed by stages that are re-run)
+        prefix_snapshots = PrefixSnapshots.from_conanfile(self.conanfile)
+        if prefix_snapshots is not None:
+            prefix_snapshots.recover(self.conanfile,
+                needs_install = lambda stage: not AutotoolsPackage.is_stage_installed(self.conanfile, stage)
+            )
+
+        # Build stages
+        workers = max(1, int(str(self.conanfile.options.get_safe('parallel_stages', 1))))
+        if workers > 1:
+            self._build_in_parallel(drivers, dependencies, workers)
+        else:
+            for driver in drivers:
+                driver.build()
+
+        # Wait for uploads of stage artifacts to the remote stage cache
+        uploads = [ result for result in StageCache.wait_for_uploads(self.conanfile) if not isinstance(result, Exception) ]
+        if uploads:
+            self.conanfile.output.info(
+                f"{len(uploads)} stage artifact(s) uploaded to the remote stage cache "
+                f"({format_size(sum(upload['size'] for upload in uploads))}, "
+                f"{sum(upload['duration'] for upload in uploads):.1f}s in total)."
             )
 
-        return self._description_cache
+    @staticmethod
+    def _schedule(
+        descriptions : list,
+    ) -> list:
+
+        """Computes order of stages for the list of target descriptions. In multi-target builds:
+
+            - stages of all targets are interleaved, i.e. n-th stages of all targets are scheduled
+              together (binutils first, then GCC stages, etc.),
+            - GDB stages are built only once (from the first target's description) with support
+              for all remaining targets enabled.
+
+        Returns list of (description, component description) pairs.
+        """
+
+        # Build GDB only for the first target with all remaining targets enabled
+        if len(descriptions) > 1:
+            for component in descriptions[0].components:
+                if isinstance(component, GdbDescription):
+                    component.enable_targets = [ description.target for description in descriptions[1:] ]
+            for description in descriptions[1:]:
+                description.components = [
+                    component for component in description.components if not isinstance(component, GdbDescription)
+                ]
+
+        # Interleave stages of all targets
+        schedule = [ ]
+        for index in range(max(len(description.components) for description in descriptions)):
+            for description in descriptions:
+                if index < len(description.components):
+                    schedule.append((description, description.components[index]))
+
+        return schedule
+
+    @staticmethod
+    def _get_dependencies(
+        schedule        : list,
+        scoped_cleanups : bool = True,
+    ) -> list:
+
+        """Computes dependencies between stages of the `schedule` (as returned by `_schedule`). Stages of
+        each target depend on the preceding stage of the same target. GDB stages depend only on the first
+        stage (binutils) of their target as they do not use the target compiler. Cleanups preserve files
+        installed by stages not preceding them only if install manifests are available - otherwise (`scoped_cleanups`
+        is False) GDB stages depend also on preceding stages removing files from the prefix (`cleanup_files`).
+        Stages sharing build trees of other stages (`share_build_with`) depend also on these stages.
+        Returns list of lists of indices of stages each stage depends on.
+        """
+
+        dependencies = [ ]
+
+        first    = { }
+        last     = { }
+        names    = { }
+        cleaning = [ ]
+        for index, (description, component_description) in enumerate(schedule):
+
+            target = description.target
+
+            if isinstance(component_description, GdbDescription):
+                dependencies.append(sorted(set([ first[target] ] if target in first else [ ]) | set(cleaning)))
+            else:
+                dependencies.append([ last[target] ] if target in last else [ ])
+                last[target] = index
+                if component_description.cleanup_files and not scoped_cleanups:
+                    cleaning.append(index)
+
+            # Build trees are shared only after providing stages have been built
+            for name in (component_description.share_build_with or [ ]):
+                if ((target, name) in names) and (names[(target, name)] not in dependencies[-1]):
+                    dependencies[-1].append(names[(target, name)])
+
+            first.setdefault(target, index)
+            names[(target, component_description.name)] = index
+
+        return dependencies
+
+    def _build_in_parallel(self,
+        drivers      : list,
+        dependencies : list,
+        workers      : int,
+    ):
+        """Builds stages by `workers` parallel workers. Stage is started as soon as all stages it depends on
+        have been built. Where possible (POSIX, GNU make 4.2+) make commands of all stages are clients of
+        a single jobserver so that jobs are taken by whichever stages are running at the moment. Otherwise
+        (or if memory-aware jobs are enabled) make jobs are split between stages running at the time the stage
+        is started. After the first failure no new stages are started.
+        """
+
+        jobs = build_jobs(self.conanfile)
+
+        self.conanfile.output.info(f"Building {len(drivers)} stages by {workers} parallel workers...")
+
+        done    = set()
+        running = { }
+        error   = None
+
+        with contextlib.ExitStack() as stack, concurrent.futures.ThreadPoolExecutor(max_workers = workers) as executor:
+
+            # Share the jobserver between stages
+            jobserver = None
+            if Jobserver.supported(self.conanfile):
+                jobserver = stack.enter_context(Jobserver(self.conanfile, self.conanfile.build_folder, 'stages', jobs, None))
+                for driver in drivers:
+                    driver.jobserver = jobserver
+
+            while True:
+
+                # Start all stages that are ready
+                if error is None:
+                    ready = [
+                        index for index in range(len(drivers))
+                            if (index not in done) and (index not in running.values()) and all(dep in done for dep in dependencies[index])
+                    ][:workers - len(running)]
+                    # Split jobs between stages running at the moment (used by stages not run by the shared jobserver)
+                    share = max(1, jobs // max(1, len(running) + len(ready)))
+                    for index in ready:
+                        drivers[index].jobs = share
+                        running[executor.submit(drivers[index].build)] = index
+
+                if not running:
+                    break
+
+                # Wait for any of running stages
+                finished, _ = concurrent.futures.wait(running.keys(), return_when = concurrent.futures.FIRST_COMPLETED)
+                for future in finished:
+                    index = running.pop(future)
+                    if future.exception() is not None:
+                        error = error or future.exception()
+                    else:
+                        done.add(index)
+
+        if error is not None:
+            raise error
 
 # ================================================================================================================================== #
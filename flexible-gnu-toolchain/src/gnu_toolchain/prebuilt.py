@@ -3,7 +3,7 @@
 # @author     Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
 # @maintainer Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
 # @date       Tuesday, 1st October 2024 7:01:52 pm
-# @modified   Saturday, 12th October 2024 10:52:44 pm by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @modified   Monday, 19th October 2026 1:31:12 pm by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
 # 
 # 
 # @copyright Your Company © 2024
@@ -12,7 +12,17 @@
 # ============================================================ Imports ============================================================= #
 
 # Standard imports
+import hashlib
+import os
 import pathlib
+import shutil
+# Conan imports
+from conan.tools.build import build_jobs
+from conan.tools.files import copy
+from conan.tools.layout import basic_layout
+# Package imports
+from gnu_toolchain.utils.files import locked, extract_archive
+from gnu_toolchain.utils.download import download_file, sha256sum
 
 # ========================================================= PrebuiltDriver ========================================================= #
 
@@ -25,37 +35,177 @@ class PrebuiltDriver():
 
     # ------------------------------------------------------------------ #
 
-    options = { }
-    
-    default_options = { }
-        
+    options = {
+
+        # Location of the prebuilt archive (URL or local path, may refer to {target}, {version}, {os} and {arch})
+        'prebuilt_url' : [ None, 'ANY' ],
+        # Expected SHA256 digest of the archive
+        'prebuilt_sha256' : [ None, 'ANY' ],
+        # Directory of the local cache of archives
+        'prebuilt_cache_dir' : [ None, 'ANY' ],
+
+    }
+
+    default_options = {
+
+        # No default mirror
+        'prebuilt_url' : None,
+        # By default, do not verify the archive
+        'prebuilt_sha256' : None,
+        # By default, cache archives in the user's cache directory
+        'prebuilt_cache_dir' : None,
+
+    }
+
+    # Options that affect only the way the package is built (not its content)
+    local_options = [
+        'prebuilt_cache_dir',
+    ]
+
+    # Supported archive formats
+    archive_suffixes = [ '.tar.gz', '.tgz', '.tar.xz', '.txz', '.tar.zst', '.tzst', '.tar.bz2', '.tar' ]
+
     # ---------------------------------------------------------------------------- #
 
     def validate(self):
-        raise NotImplementedError("PrebuiltDriver.validate() is not implemented")
+
+        # Make sure the archive location is set
+        if self._get_option('prebuilt_url') is None:
+            raise ValueError("Prebuilt toolchain requires the 'prebuilt_url' option to be set!")
+        # Make sure the archive format is supported
+        if self._archive_suffix is None:
+            raise ValueError(f"Unsupported format of the prebuilt archive '{self._url}' (supported: {', '.join(self.archive_suffixes)})")
 
     def configure(self):
-        raise NotImplementedError("PrebuiltDriver.configure() is not implemented")
+        pass
 
     def system_requirements(self):
-        raise NotImplementedError("PrebuiltDriver.system_requirements() is not implemented")
-    
+        pass
+
     def requirements(self):
-        raise NotImplementedError("PrebuiltDriver.requirements() is not implemented")
+        pass
 
     def layout(self):
-        raise NotImplementedError("PrebuiltDriver.layout() is not implemented")
+        basic_layout(self.conanfile, src_folder = "src")
 
     def generate(self):
-        raise NotImplementedError("PrebuiltDriver.generate() is not implemented")
+        pass
 
     def build(self):
-        raise NotImplementedError("PrebuiltDriver.build() is not implemented")
+
+        archive, digest = self._fetch_archive()
+
+        # Extract the archive (unless the same content has been already extracted)
+        tag = self._extract_dir / '.extracted'
+        if (not tag.exists()) or (tag.read_text() != digest):
+
+            if self._extract_dir.exists():
+                shutil.rmtree(self._extract_dir.as_posix())
+
+            self.conanfile.output.info(f"Extracting '{archive.as_posix()}'...")
+            extract_archive(archive, self._extract_dir, threads = build_jobs(self.conanfile))
+            tag.write_text(digest)
+
+        else:
+            self.conanfile.output.info(f"'{archive.name}' already extracted. Skipping...")
 
     def package(self):
-        raise NotImplementedError("PrebuiltDriver.package() is not implemented")
-    
+        copy(self.conanfile,
+            pattern  = '*',
+            src      = self._package_root.as_posix(),
+            dst      = self.conanfile.package_folder,
+            excludes = [ '.extracted' ],
+        )
+
     def package_info(self):
-        raise NotImplementedError("PrebuiltDriver.package_info() is not implemented")
+        pass
+
+    # ---------------------------------------------------------------------------- #
+
+    def _get_option(self, name):
+        value = self.conanfile.options.get_safe(name)
+        return str(value) if (value is not None) and (str(value) != 'None') else None
+
+    @property
+    def _url(self):
+        return self._get_option('prebuilt_url').format(
+            target  = self.conanfile.options.target,
+            version = self.conanfile.version,
+            os      = str(self.conanfile.settings.os).lower(),
+            arch    = str(self.conanfile.settings.arch),
+        )
+
+    @property
+    def _archive_suffix(self):
+        name = self._url.split('?')[0].rstrip('/').rsplit('/', 1)[-1]
+        return next((suffix for suffix in self.archive_suffixes if name.endswith(suffix)), None)
+
+    @property
+    def _cache_dir(self):
+
+        # Use the requested directory
+        if self._get_option('prebuilt_cache_dir') is not None:
+            return pathlib.Path(self._get_option('prebuilt_cache_dir')).expanduser()
+
+        # Otherwise use the user's cache directory
+        cache_home = os.environ.get('XDG_CACHE_HOME', None) or (pathlib.Path.home() / '.cache')
+        return pathlib.Path(cache_home) / 'flexible-gnu-toolchain' / 'prebuilt'
+
+    @property
+    def _extract_dir(self):
+        return pathlib.Path(self.conanfile.build_folder) / 'prebuilt'
+
+    @property
+    def _package_root(self):
+
+        # Skip the top-level directory if the archive has one
+        entries = [ entry for entry in self._extract_dir.iterdir() if entry.name != '.extracted' ]
+        if (len(entries) == 1) and entries[0].is_dir() and not entries[0].is_symlink():
+            return entries[0]
+
+        return self._extract_dir
+
+    def _fetch_archive(self) -> tuple:
+
+        """Returns path to the verified archive in the local cache (downloads it if needed) along with
+        its SHA256 digest. Archives are named after their SHA256 digests (or after the URL if the digest
+        is not given). Digest of the archive is kept next to it so that cached archives are not rehashed
+        on each install. Archives without the digest cannot be verified and are downloaded again on each
+        install (content behind the URL may change, the digest of the downloaded file is computed then).
+        """
+
+        sha256 = self._get_option('prebuilt_sha256')
+        name   = sha256.lower() if (sha256 is not None) else hashlib.sha256(self._url.encode()).hexdigest()
+
+        if sha256 is None:
+            self.conanfile.output.warning(
+                f"No 'prebuilt_sha256' given for '{self._url}'. The archive will not be verified "
+                f"(and will be downloaded again on each install)."
+            )
+
+        archive   = self._cache_dir / f'{name}{self._archive_suffix}'
+        signature = archive.with_name(f'{archive.name}.sha256')
+
+        # Archives cache may be shared by concurrent builds
+        with locked(archive.with_name(f'{archive.name}.lock')):
+
+            # Use cached archive if verified
+            if (sha256 is not None) and archive.exists() and signature.exists() and (signature.read_text().strip() == sha256.lower()):
+                self.conanfile.output.info(f"Using cached '{archive.as_posix()}'")
+                return (archive, sha256.lower())
+
+            # Download the archive
+            download_file(self.conanfile,
+                url         = self._url,
+                destination = archive,
+                sha256      = sha256,
+                threads     = build_jobs(self.conanfile),
+            )
+
+            # Mark the archive as verified (or record digest of the unverified content)
+            digest = sha256.lower() if (sha256 is not None) else sha256sum(archive)
+            signature.write_text(digest)
+
+        return (archive, digest)
 
 # ================================================================================================================================== #
@@ -0,0 +1,262 @@
+# ====================================================================================================================================
+# @file       autoconf_cache.py
+# @author     Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @maintainer Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @date       Monday, 19th October 2026 3:58:07 pm
+# @modified   Monday, 19th October 2026 3:58:07 pm by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# 
+# 
+# @copyright Krzysztof Pierczyk © 2026
+# ====================================================================================================================================
+
+# ============================================================= Imports ============================================================ #
+
+# System imports
+import hashlib
+import json
+import os
+import pathlib
+import re
+import shlex
+import subprocess
+import threading
+# Conan imports
+from conan.tools.microsoft import unix_path
+# Private imports
+from gnu_toolchain.utils.files import locked
+from gnu_toolchain.utils.environment import Environment
+
+# =========================================================== Site script ========================================================== #
+
+# Script sourced by each configure script (via CONFIG_SITE). Results of checks are shared between configure scripts
+# running in the same context (host triplet, compilers and flags). Host checks (e.g. binutils, GCC and GDB for the
+# build machine) and target checks (e.g. libc and target libraries of GCC) are kept in separate directories.
+SITE_SCRIPT = '''\
+# Generated by flexible-gnu-toolchain (shared autoconf cache)
+gnu_toolchain_cache_kind=host
+case "${{host_alias}}" in
+    {targets}) gnu_toolchain_cache_kind=target ;;
+esac
+gnu_toolchain_cache_key=`printf '%s\\n' "${{build_alias}}" "${{host_alias}}" "${{CC}}" "${{CFLAGS}}" "${{CPPFLAGS}}" "${{LDFLAGS}}" "${{CXX}}" "${{CXXFLAGS}}" | cksum | sed 's/[^0-9].*//'`
+gnu_toolchain_cache_file="{root}/${{gnu_toolchain_cache_kind}}/${{gnu_toolchain_cache_key}}.cache"
+# Use results of checks run by other configure scripts in the same context
+if test -r "${{gnu_toolchain_cache_file}}"; then
+    . "${{gnu_toolchain_cache_file}}"
+fi
+# Results are collected from config.log written next to this file
+echo "${{gnu_toolchain_cache_file}}" > ./config.cache.shared
+'''
+
+# ========================================================== AutoconfCache ========================================================= #
+
+class AutoconfCache:
+
+    """Autoconf cache shared by all configure scripts run by the build (top-level and nested ones)
+    and by subsequent builds. Caches are kept in a directory specific to the host compiler (its
+    version output) and flags passed via Conan configuration so they are invalidated whenever
+    the host compiler changes. Only results of checks that depend solely on the compiler (object
+    and executable extensions, compiler features, sizes of types) are shared. Results of checks for
+    headers, functions or libraries depend on LIBS and include paths added by each configure script
+    and are never shared. Results are collected from the `Cache variables` section of `config.log`
+    files, so configure scripts are not forced to use cache files.
+    """
+
+    # Prefixes of cache variables that are shared between configure scripts
+    shared_prefixes = (
+        'ac_cv_objext',
+        'ac_cv_exeext',
+        'ac_cv_c_compiler_gnu',
+        'ac_cv_cxx_compiler_gnu',
+        'ac_cv_prog_cc_',
+        'ac_cv_prog_cxx_',
+        'ac_cv_sizeof_',
+    )
+
+    # Pattern of cache lines (both formats written by autoconf)
+    line_pattern = re.compile(r'^(?:(?P<plain>[A-Za-z_][A-Za-z0-9_]*)=\$\{|test "\$\{(?P<braced>[A-Za-z_][A-Za-z0-9_]*)\+set\}" = set \|\| )')
+    # Pattern of cache variables listed in config.log
+    log_pattern  = re.compile(r"^(?P<name>ac_cv_[A-Za-z0-9_]+)=(?P<value>.*)$")
+
+    # Versions of compilers (computed once per process)
+    _versions      = { }
+    _versions_lock = threading.Lock()
+
+    def __init__(self,
+        root    : pathlib.Path,
+        targets : list,
+    ):
+        self.root    = pathlib.Path(root)
+        self.targets = list(targets)
+
+        # Root as seen by configure scripts (differs from `root` on MSYS2)
+        self._shell_root = self.root.as_posix()
+
+    @staticmethod
+    def from_conanfile(
+        conanfile,
+        targets : list,
+    ):
+        """Creates the autoconf cache of the build (returns None if disabled with the `autoconf_cache` option)"""
+
+        if str(conanfile.options.get_safe('autoconf_cache', False)) != 'True':
+            return None
+
+        root = conanfile.options.get_safe('autoconf_cache_dir')
+        root = pathlib.Path(str(root)).expanduser() if (str(root) != 'None') else (pathlib.Path(conanfile.build_folder) / 'autoconf-cache')
+
+        return AutoconfCache(
+            root    = root / AutoconfCache._host_key(conanfile)[:16],
+            targets = targets,
+        )
+
+    # ------------------------------------------------------------------ #
+
+    @property
+    def site_file(self) -> pathlib.Path:
+        return self.root / f'config-{hashlib.sha256(",".join(sorted(self.targets)).encode()).hexdigest()[:16]}.site'
+
+    def environment(self,
+        conanfile,
+    ) -> Environment:
+
+        """Returns environment pointing configure scripts to the site script (created if needed)"""
+
+        self._shell_root = unix_path(conanfile, self.root.as_posix())
+
+        # Write the site script
+        content = SITE_SCRIPT.format(
+            root    = self._shell_root,
+            targets = '|'.join(shlex.quote(target) for target in self.targets) or '""',
+        )
+        with locked(self.root / '.lock'):
+            if (not self.site_file.exists()) or (self.site_file.read_text() != content):
+                self.site_file.write_text(content)
+
+        return Environment().define('CONFIG_SITE', unix_path(conanfile, self.site_file.as_posix()))
+
+    def collect(self,
+        build_dir : pathlib.Path,
+    ) -> int:
+
+        """Merges results of configure scripts run in the `build_dir` tree into shared caches (results
+        of more recent configure runs replace older ones). Returns number of new or updated entries.
+        """
+
+        # Find logs of configure scripts (grouped by the shared cache they correspond to, oldest first)
+        logs = { }
+        for root, dirs, files in os.walk(build_dir):
+            if ('config.cache.shared' in files) and ('config.log' in files):
+                shared = (pathlib.Path(root) / 'config.cache.shared').read_text().strip()
+                logs.setdefault(shared, [ ]).append(pathlib.Path(root) / 'config.log')
+
+        updated = 0
+
+        for shared, local_logs in logs.items():
+
+            # Map path seen by configure scripts back to the native one
+            try:
+                shared = self.root / pathlib.PurePosixPath(shared).relative_to(self._shell_root)
+            except ValueError:
+                continue
+            shared.parent.mkdir(parents = True, exist_ok = True)
+
+            with locked(shared.with_name(f'{shared.name}.lock')):
+
+                entries  = self._parse(shared) if shared.exists() else { }
+                previous = dict(entries)
+                for local_log in sorted(local_logs, key = lambda path: path.stat().st_mtime_ns):
+                    entries.update(self._parse_log(local_log))
+
+                changed = [ name for name in entries if previous.get(name) != entries[name] ]
+                if changed:
+                    tmp_path = shared.with_name(f'{shared.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+                    tmp_path.write_text(''.join(f'{entries[name]}\n' for name in sorted(entries)))
+                    os.replace(tmp_path, shared)
+                    updated += len(changed)
+
+        return updated
+
+    # ------------------------------------------------------------------ #
+
+    def _parse(self,
+        path : pathlib.Path,
+    ) -> dict:
+        """Returns { variable : line } dictionary of entries of the cache file"""
+
+        entries = { }
+        for line in path.read_text(errors = 'replace').splitlines():
+            match = self.line_pattern.match(line)
+            if match is not None:
+                entries[match.group('plain') or match.group('braced')] = line
+
+        return entries
+
+    def _parse_log(self,
+        path : pathlib.Path,
+    ) -> dict:
+        """Returns { variable : cache line } dictionary of shared results listed in the `Cache variables`
+        section of the config.log (empty if configure has not finished)
+        """
+
+        entries = { }
+        section = False
+        for line in path.read_text(errors = 'replace').splitlines():
+            # Titles of sections are framed with '## ---- ##' lines
+            if line.startswith('## ') and (not line.startswith('## -')):
+                section = (line.strip() == '## Cache variables. ##')
+                continue
+            match = self.log_pattern.match(line) if section else None
+            if (match is None) or (not match.group('name').startswith(self.shared_prefixes)):
+                continue
+            # Values are single-quoted by configure if needed
+            value = match.group('value')
+            if (len(value) >= 2) and value.startswith("'") and value.endswith("'"):
+                value = value[1:-1].replace("'\\''", "'")
+            name = match.group('name')
+            entries[name] = f'{name}=${{{name}={shlex.quote(value)}}}'
+
+        return entries
+
+    @classmethod
+    def _host_key(cls,
+        conanfile,
+    ) -> str:
+
+        """Computes key identifying the host compiler (versions of compilers and flags)"""
+
+        executables = conanfile.conf.get('tools.build:compiler_executables', default = { }, check_type = dict) or { }
+        compilers   = [
+            executables.get('c',   os.environ.get('CC',  'cc')),
+            executables.get('cpp', os.environ.get('CXX', 'c++')),
+        ]
+
+        with cls._versions_lock:
+            for compiler in compilers:
+                if compiler not in cls._versions:
+                    try:
+                        cls._versions[compiler] = subprocess.run(shlex.split(compiler) + [ '--version' ],
+                            stdout = subprocess.PIPE,
+                            stderr = subprocess.DEVNULL,
+                            check  = True,
+                        ).stdout.decode(errors = 'replace')
+                    except (OSError, subprocess.CalledProcessError):
+                        cls._versions[compiler] = None
+
+            versions = { compiler : cls._versions[compiler] for compiler in compilers }
+
+        inputs = {
+            'compilers' : versions,
+            'settings'  : conanfile.settings.dumps(),
+            'conf'      : {
+                name : conanfile.conf.get(name) for name in [
+                    'tools.build:cflags',
+                    'tools.build:cxxflags',
+                    'tools.build:ldflags',
+                    'tools.build:defines',
+                ]
+            },
+        }
+
+        return hashlib.sha256(json.dumps(inputs, sort_keys = True, default = str).encode()).hexdigest()
+
+# ================================================================================================================================== #
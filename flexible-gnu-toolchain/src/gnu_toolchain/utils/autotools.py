@@ -15,11 +15,30 @@
 import pathlib
 import shutil
 import os
+import json
 import contextlib
+import tarfile
+import hashlib
+import threading
+import time
 # Conan imports
+from conan.errors import ConanException
+from conan.tools.build import build_jobs
 from conan.tools.gnu import Autotools
 # Private imports
-from gnu_toolchain.utils.files import get, copy_with_rename
+from gnu_toolchain.utils.files import get, get_patches_dir, copy_with_rename, extract_tar, remove_matching, locked
+from gnu_toolchain.utils.disk import DiskUsageMonitor, get_tree_size, format_size
+from gnu_toolchain.utils.common import split_option
+from gnu_toolchain.utils.git import GitSource
+from gnu_toolchain.utils.report import BuildReport
+from gnu_toolchain.utils.stage_cache import StageCache
+from gnu_toolchain.utils.environment import Environment, StageConanfile
+from gnu_toolchain.utils.logs import StageLog
+from gnu_toolchain.utils.autoconf_cache import AutoconfCache
+from gnu_toolchain.utils.jobs import Jobserver, reserve_jobs
+from gnu_toolchain.utils.prefix_snapshots import PrefixSnapshots
+from gnu_toolchain.utils.manifest import InstallManifest, hash_file
+from gnu_toolchain.utils.timings import TimingDatabase, BuildPlan, CommandUsage, format_duration
 
 # ========================================================== Helper types ========================================================== #
 
@@ -40,6 +59,36 @@ def get_standard_dirs():
     setattr(result, 'offprefix', pathlib.Path("install") / "temp")
 
     return result
+
+# ========================================================== batch_targets ========================================================= #
+
+def batch_targets(
+    targets : list | dict,
+) -> list:
+
+    """Splits make `targets` into batches of independent targets run by a single make invocation each (so that
+    make may run them in parallel). Targets are given either as a list of independent targets (entries holding
+    space-separated names are split) or as a dictionary mapping each target to the list of targets it has to be
+    run after. Returns list of batches (lists of targets) to be run one after another.
+    """
+
+    if isinstance(targets, dict):
+        dependencies = { target : set(after or [ ]) & set(targets) for target, after in targets.items() }
+    else:
+        dependencies = { name : set() for target in targets for name in str(target).split() }
+
+    batches = [ ]
+    while dependencies:
+
+        # Pick targets whose dependencies have been run by previous batches
+        batch = [ target for target, after in dependencies.items() if not after ]
+        if not batch:
+            raise ConanException(f"Circular dependencies between make targets: {', '.join(dependencies)}")
+
+        batches.append(batch)
+        dependencies = { target : after - set(batch) for target, after in dependencies.items() if target not in batch }
+
+    return batches
         
 # ======================================================== AutotoolsPackage ======================================================== #
 
@@ -50,11 +99,21 @@ class AutotoolsPackage:
         target,
         pkg_version,
         description,
+        depends_on = None,
+        jobs       = None,
     ):
         self.conanfile   = conanfile
         self.target      = target
         self.pkg_version = pkg_version
         self.description = description
+        # Identifiers of stages the stage depends on
+        self.depends_on  = list(depends_on) if depends_on else [ ]
+        # Identifiers of stages (transitively) preceding the stage whose files may be removed by its cleanup
+        self.preceded_by = list(self.depends_on)
+        # Number of make jobs (Conan's default if None)
+        self.jobs        = jobs
+        # Jobserver shared by stages built in parallel (None if not used)
+        self.jobserver   = None
 
         # Compile dirs
         self.dirs = self.make_dirs(
@@ -62,6 +121,23 @@ class AutotoolsPackage:
             self.description.name,
             self.target,
         )
+
+        # Persistent report of the build
+        self.report = BuildReport(self.conanfile)
+        # Stage cache shared by builds (None if disabled)
+        self.stage_cache = StageCache.from_conanfile(self.conanfile)
+        # Compressed log of the stage (None if output is streamed to the console)
+        self.log = StageLog.from_conanfile(self.conanfile, self._stage_id, self.description.name)
+        # Autoconf cache shared by configure scripts (None if disabled)
+        self.autoconf_cache = AutoconfCache.from_conanfile(self.conanfile, self.get_targets(self.conanfile))
+        # Snapshots of install trees (None if disabled)
+        self.prefix_snapshots = PrefixSnapshots.from_conanfile(self.conanfile)
+        # Manifest of files installed by the stage (None if installs are not staged)
+        self.manifest = InstallManifest.from_conanfile(self.conanfile, self._stage_id)
+        # Database of durations of steps
+        self.timings = TimingDatabase.from_conanfile(self.conanfile)
+        # Resource usage of commands run by the current step
+        self.usage = CommandUsage()
     
     # ------------------------------------------------------------------ #
 
@@ -70,6 +146,9 @@ class AutotoolsPackage:
         'msys-gcc_s-seh-1.dll',
     ]
 
+    # Lock serializing modifications of install trees by stages running in parallel
+    install_lock = threading.RLock()
+
     # ------------------------------------------------------------------ #
 
     @staticmethod
@@ -79,91 +158,190 @@ class AutotoolsPackage:
         target = None,
     ):
         result = get_standard_dirs()
+
+        # In multi-target builds stages of each target are placed in dedicated subdirectories
+        namespace = target if (target is not None) and (len(AutotoolsPackage.get_targets(conanfile)) > 1) else '.'
         
         # Compile common dirs
         setattr(result, 'src',       pathlib.Path(conanfile.build_folder) / result.src)
         setattr(result, 'download',  pathlib.Path(conanfile.build_folder) / result.download)
-        setattr(result, 'build',     pathlib.Path(conanfile.build_folder) / result.build / (build_name if build_name else '.'))
+        # Use shared download directory if requested
+        if str(conanfile.options.get_safe('download_dir', None)) != 'None':
+            setattr(result, 'download', pathlib.Path(str(conanfile.options.download_dir)))
+        setattr(result, 'build',     pathlib.Path(conanfile.build_folder) / result.build / namespace / (build_name if build_name else '.'))
         setattr(result, 'prefix',    pathlib.Path(conanfile.build_folder) / result.prefix)
-        setattr(result, 'offprefix', pathlib.Path(conanfile.build_folder) / result.offprefix)
+        setattr(result, 'offprefix', pathlib.Path(conanfile.build_folder) / result.offprefix / namespace)
         # Extra paths for convenience
         setattr(result, 'doc',       pathlib.Path("share") / "doc" / f"gcc-{target}")
 
         return result
 
+    @staticmethod
+    def is_stage_installed(
+        conanfile,
+        stage : str,
+    ):
+        """Checks whether the `stage` (identifier of the stage, i.e. path of its build directory relative
+        to <build_folder>/build) has been installed"""
+        return (pathlib.Path(conanfile.build_folder) / get_standard_dirs().build / stage / '.installed').exists()
+
+    @staticmethod
+    def forget_installs(
+        conanfile,
+    ):
+        """Removes tags of the install step and of all steps following it (see `_steps`) of all stages, e.g. once
+        the install tree has been moved away, so that the next build installs all stages again"""
+
+        build_root = pathlib.Path(conanfile.build_folder) / get_standard_dirs().build
+        for installed in list(build_root.glob('*/.installed')) + list(build_root.glob('*/*/.installed')):
+            for tag in [ '.installed', '.installed-extra', '.installed-doc', '.installed-manual', '.cleaned' ]:
+                (installed.parent / tag).unlink(missing_ok = True)
+
+    @staticmethod
+    def get_targets(
+        conanfile
+    ):
+        """Returns list of targets (comma-separated `target` option) the toolchain is built for"""
+        return split_option(conanfile.options.target)
+
     def build(self,
         
         target        : str         = None,
         build_args    : list | None = None,
-        doc_targets   : list        = [],
-        extra_targets : list        = [],
+        doc_targets   : list | dict = [],
+        extra_targets : list | dict = [],
 
         install_target        : str         = 'install',
         install_args          : list | None = None,
-        extra_install_targets : list        = [],
+        extra_install_targets : list | dict = [],
         extra_install_args    : list | None = None,
-        doc_install_targets   : list        = [],
+        doc_install_targets   : list | dict = [],
         doc_install_args      : list | None = None,
         manual_install_files  : dict        = {},
 
         clean_target     : str  = 'clean',
         clean_on_rebuild : bool = False,
 
-        envs : dict | None = { },
+        envs : Environment | None = None,
         
     ):
-        """Downloads, configures and builds the autotools project"""
+        """Downloads, configures and builds the autotools project. Extra and doc targets (see `batch_targets`)
+        are run in batches of independent targets.
+        """
+
+        # Keep arguments of the stage (they are part of the stage's identity)
+        arguments = { name: value for name, value in locals().items() if name != 'self' }
 
-        with self._envs_context(envs):
+        # Only add steps of the stage to the plan if the plan of the build is being collected
+        if BuildPlan.is_collecting(self.conanfile):
+            self._plan_stage(BuildPlan.get(self.conanfile), arguments)
+            return False
+
+        with DiskUsageMonitor(self.conanfile.build_folder) as disk_usage:
 
             # Compile dirs
             self._create_dirs()
 
-            # Create the autotools driver
-            autotools = Autotools(self.conanfile)
+            # Restore the build tree if it has been reclaimed and some of steps need to be rerun
+            self._restore_build_tree()
+
+            # Rebuild the stage if its sources changed (e.g. the branch of the git repository moved)
+            if self._sources_changed():
+                self.conanfile.output.info(f"Sources of '{self.description.name}' changed. The stage will be rebuilt...")
+                self._remove_all_step_tags_from('configure')
+            self._source_tag.write_text(self._source_id)
+
+            # Compute key of the stage (if the stage cache is enabled)
+            stage_key = self._get_stage_key(arguments)
+            # Restore the stage from the stage cache if possible
+            with self.install_lock:
+                restored = self._restore_from_stage_cache(stage_key, arguments)
+                if restored:
+                    self._snapshot_prefix()
+            if restored:
+                if BuildPlan.get(self.conanfile) is not None:
+                    BuildPlan.get(self.conanfile).complete_stage(self._stage_id)
+                self._report_disk_usage(disk_usage)
+                return True
+
+            # Compute environments of the stage
+            environment       = self._make_environment(envs)
+            build_environment = self._make_build_environment(environment)
+            # Create the autotools drivers running commands in these environments
+            build_conanfile = StageConanfile(self.conanfile, build_environment, self.dirs.build, self.log, self.usage)
+            autotools       = Autotools(StageConanfile(self.conanfile, environment, self.dirs.build, self.log, self.usage))
+            build_autotools = Autotools(build_conanfile)
+            # Record location of the log
+            if self.log is not None:
+                self.report.update(self._stage_id, log = self.log.path.as_posix())
 
             # Clone the sources into <build>/src/binutils
             self._clone_sources()
 
             # Check if the project has been already configured
             configured = self._configure_project(
-                autotools
+                autotools,
+                environment,
             )
             
             # Remove build tags if the project has been configured
             if configured:
+                self._collect_autoconf_cache()
                 self._remove_all_step_tags_from('build')
             # Check if the project has been already built
-            built = self._build_project(
-                autotools,
-                build_target = target,
-                build_args = build_args,
-                doc_targets = doc_targets,
-                extra_targets = extra_targets,
-                clean_target = clean_target,
-                clean_build = (not configured) and clean_on_rebuild,
-            )
+            with self._make_jobs(build_conanfile) as jobs_args:
+                built = self._build_project(
+                    build_autotools,
+                    build_target = target,
+                    build_args = (build_args or [ ]) + jobs_args,
+                    doc_targets = doc_targets,
+                    extra_targets = extra_targets,
+                    clean_target = clean_target,
+                    clean_build = (not configured) and clean_on_rebuild,
+                )
 
             # Remove install tags if the project has been built
             if built:
+                self._collect_autoconf_cache()
                 self._remove_all_step_tags_from('install')
-            # Check if the project has been already installed
-            installed = self._install_project(
-                autotools,
-                install_target = install_target,
-                install_args = install_args,
-                extra_install_targets = extra_install_targets,
-                extra_install_args = extra_install_args,
-                doc_install_targets = doc_install_targets,
-                doc_install_args = doc_install_args,
-                manual_install_files = manual_install_files,
-            )
 
-            # Remove cleanup tags if the project has been installed
-            if installed:
-                self._remove_all_step_tags_from('cleanup')
-            # Cleanup the installation
-            cleaned = self._cleanup_project()
+            # Install trees are shared by all stages
+            with self.install_lock:
+
+                # Snapshot install trees to find out files installed by the stage
+                install_snapshot = self._snapshot_install_trees(stage_key)
+                # Install trees are considered dirty until the stage is installed and cleaned up
+                if not self._has_step_tag('cleanup'):
+                    self._mark_prefix_dirty()
+
+                # Check if the project has been already installed
+                installed = self._install_project(
+                    build_autotools,
+                    install_target = install_target,
+                    install_args = install_args,
+                    extra_install_targets = extra_install_targets,
+                    extra_install_args = extra_install_args,
+                    doc_install_targets = doc_install_targets,
+                    doc_install_args = doc_install_args,
+                    manual_install_files = manual_install_files,
+                )
+
+                # Remove cleanup tags if the project has been installed
+                if installed:
+                    self._remove_all_step_tags_from('cleanup')
+                # Cleanup the installation
+                cleaned = self._cleanup_project()
+
+                # Store results of the stage in the stage cache
+                self._store_in_stage_cache(stage_key, install_snapshot)
+                # Snapshot install trees for rollback
+                if installed or cleaned:
+                    self._snapshot_prefix()
+
+            # Report disk usage of the stage
+            self._report_disk_usage(disk_usage)
+            # Remove/archive the build tree if requested
+            self._reclaim_build_tree()
 
             return (
                 configured or
@@ -174,32 +352,112 @@ class AutotoolsPackage:
     
     # ------------------------------------------------------------------ #
 
-    def _envs_context(self,
-        envs : dict | None
+    def _make_environment(self,
+        envs : Environment | None,
+    ) -> Environment:
+
+        """Computes environment of the stage. Tools installed by preceding stages (e.g. the target compiler
+        needed to build the libc) are made available via PATH. Environment of the current process is
+        never modified.
+        """
+
+        environment = Environment().prepend_path('PATH', self.dirs.prefix / 'bin')
+        # Share results of configure checks
+        if self.autoconf_cache is not None:
+            environment = environment | self.autoconf_cache.environment(self.conanfile)
+        # Link host executables statically ('--static' is passed through by libtool unlike '-static')
+        match self.description.get_host_linkage():
+            case 'static-runtime': environment = environment.append('LDFLAGS', '-static-libstdc++ -static-libgcc')
+            case 'static':         environment = environment.append('LDFLAGS', '--static')
+
+        return environment | (envs or Environment())
+
+    def _mark_prefix_dirty(self):
+        if self.prefix_snapshots is not None:
+            self.prefix_snapshots.mark_dirty(self._stage_id)
+
+    def _snapshot_prefix(self):
+        if self.prefix_snapshots is not None:
+            self.prefix_snapshots.take(self.conanfile, self._stage_id)
+
+    @contextlib.contextmanager
+    def _make_jobs(self,
+        stage_conanfile : StageConanfile,
     ):
-        class _EnvsContext:
+        """Context in which make commands of the build step are run. Yields list of additional make
+        arguments. If memory-aware jobs are enabled, the number of jobs is limited by the memory available
+        for the build and the memory weight of the stage. Where possible (POSIX, GNU make 4.2+) make is run
+        as a client of the jobserver throttling jobs under memory pressure. Otherwise, if stages are built
+        in parallel, make is run as a client of the jobserver shared by all stages.
+        """
+
+        cores = self.jobs if (self.jobs is not None) else build_jobs(self.conanfile)
+
+        # Use fixed number of jobs (or the shared jobserver) if not requested otherwise
+        if str(self.conanfile.options.get_safe('memory_aware_jobs', False)) != 'True':
+            if self.jobserver is None:
+                yield ([ f'-j{self.jobs}' ] if (self.jobs is not None) else [ ])
+                return
+            stage_conanfile.jobserver = self.jobserver
+            try:
+                yield [ ]
+            finally:
+                stage_conanfile.jobserver = None
+            return
 
-            def __init__(self, autotools_package, envs):
-                self._envs = envs
+        memory_per_job = self.description.get_memory_per_job()
 
-            def __enter__(self):
-                self._old_envs = { }
-                for key, value in self._envs.items():
-                    self._old_envs[key] = os.environ.get(key, None)
-                    os.environ[key] = value
-                return self
+        # Memory of planned jobs is reserved for the time of the build step
+        with reserve_jobs(cores, memory_per_job) as (jobs, available):
 
-            def __exit__(self, etype, value, traceback):
-                for key, value in self._old_envs.items():
-                    if value is not None:
-                        os.environ[key] = value
-                    else:
-                        os.environ.pop(key, None)
-
-        return _EnvsContext(
-            self,
-            envs
-        )
+            self.conanfile.output.info(
+                f"Using {jobs} make job(s) for '{self.description.name}' (cores: {cores}, " +
+                f"available memory: {format_size(available) if (available is not None) else 'unknown'}, " +
+                f"memory per job: {f'{memory_per_job} MiB' if (memory_per_job is not None) else 'unknown'})"
+            )
+
+            # Use static number of jobs if the jobserver cannot be used
+            if not Jobserver.supported(self.conanfile):
+                yield [ f'-j{jobs}' ]
+                return
+
+            with Jobserver(self.conanfile, self.dirs.build, self.description.name, jobs, memory_per_job) as jobserver:
+                stage_conanfile.jobserver = jobserver
+                try:
+                    yield [ ]
+                finally:
+                    stage_conanfile.jobserver = None
+
+    def _collect_autoconf_cache(self):
+
+        """Merges results of configure scripts run by the stage (including nested ones run by make)
+        into the shared autoconf cache
+        """
+
+        if self.autoconf_cache is None:
+            return
+
+        updated = self.autoconf_cache.collect(self.dirs.build)
+        if updated:
+            self.conanfile.output.info(f"{updated} result(s) of configure checks of '{self.description.name}' stored in the shared autoconf cache")
+
+    def _make_build_environment(self,
+        environment : Environment,
+    ) -> Environment:
+
+        """Extends the stage's `environment` with build options and environment of the description
+        (used when building and installing the project)
+        """
+
+        # Apply build options
+        build_options = self.description.get_build_options()
+        if build_options:
+            environment = environment.append('CXXFLAGS', ' '.join(build_options))
+        # Extend environment
+        for name, value in (self.description.get_env() or { }).items():
+            environment = environment.define(name, value)
+
+        return environment
     
     # ------------------------------------------------------------------ #
 
@@ -334,7 +592,7 @@ class AutotoolsPackage:
         target_step_index = list(self._steps.keys()).index(step)
         # Remove all tags after the target step
         for step_index, step in enumerate(list(self._steps.keys())):
-            if step_index >= target_step_index:
+            if (step_index >= target_step_index) and ('tag' in self._steps[step]):
                 if self._steps[step]['tag'].exists():
                     self.conanfile.output.info(f"Removing '{self._steps[step]['tag'].as_posix()}' tag...")
                     self._steps[step]['tag'].unlink()
@@ -386,14 +644,88 @@ class AutotoolsPackage:
     ):
         self.conanfile.output.success(f"{self._to_present_continuous(step).capitalize()} '{self.description.name}'...")
 
+        start = time.monotonic()
+        self.usage.reset()
+
+        if self.log is not None:
+            self.log.step = step
+        started_at = time.time()
+
+        plan = BuildPlan.get(self.conanfile)
+        if plan is not None:
+            plan.start_step(self._stage_id, step)
+
         try:
             process()
         except Exception as e:
             self.conanfile.output.error(f"Failed to {self._to_infinitive(step)} '{self.description.name}' ({e})")
+            # Show the end of the captured output
+            if self.log is not None:
+                self.log.report_failure(self.conanfile, self.dirs.build, since = started_at)
             raise
 
+        # Record duration of the step
+        duration = time.monotonic() - start
+        self.report.add_step(self._stage_id, step, duration)
+        self._record_timing(step, duration)
+
+        # Report estimated remaining time of the build (the progress line shows it if output is captured)
+        if plan is not None:
+            plan.complete_step(self._stage_id, step)
+            eta = plan.eta()
+            if (eta is not None) and (self.log is None):
+                self.conanfile.output.info(f"Estimated remaining time of the build: {format_duration(eta)}")
+
         self.conanfile.output.success(f"'{self.description.name}' {self._to_present_perfect(step)} successfully.")
 
+    def _record_timing(self,
+        step     : str,
+        duration : float,
+    ):
+        """Records duration and resource usage of the step in the timing database (CPU time and peak RSS of commands
+        run by the step, unknown if they could not be measured)"""
+
+        usage = self.usage.get()
+
+        try:
+            self.timings.record(
+                component = self.description.component_name,
+                version   = str(self.description.version),
+                stage     = self.description.name,
+                target    = self.target,
+                step      = step,
+                duration  = duration,
+                cpu_time  = usage.get('cpu_time'),
+                max_rss   = usage.get('max_rss'),
+                jobs      = self.jobs if (self.jobs is not None) else build_jobs(self.conanfile),
+            )
+        except Exception as e:
+            self.conanfile.output.warning(f"Failed to record duration of the '{step}' step of '{self.description.name}' ({e})")
+
+    def _plan_stage(self,
+        plan      : BuildPlan,
+        arguments : dict,
+    ):
+        """Adds steps of the stage to the `plan` (nothing is built)"""
+
+        stage_key = self._get_stage_key(arguments)
+        steps     = self._get_stage_steps(arguments)
+        changed   = self._sources_changed()
+        pending   = [ step for step in steps if changed or (not self._has_step_tag(step)) ]
+
+        # Stage is restored from the stage cache if any of its steps needs to be run
+        cached = bool(pending) and (stage_key is not None) and (self.stage_cache.lookup(stage_key) is not None)
+
+        for step in steps:
+            status    = 'done' if (step not in pending) else ('cached' if cached else 'run')
+            predicted = self.timings.predict(
+                component = self.description.component_name,
+                version   = str(self.description.version),
+                stage     = self.description.name,
+                step      = step,
+            ) if (status == 'run') else None
+            plan.add(self._stage_id, self.description.name, step, status, predicted)
+
     def _run_step(self,
         step,
         process
@@ -421,21 +753,23 @@ class AutotoolsPackage:
     def _clone_sources(self):
         
         # Clone the sources into <build>/src/binutils
-        with contextlib.chdir(self.dirs.download):
-            try:
-                self.dirs.src = get(
-                    conanfile      = self.conanfile,
-                    url            = self.description.url,
-                    component_name = self.description.component_name,
-                    version        = str(self.description.version),
-                    destination    = self.dirs.src.as_posix(),
-                )
-            except Exception as e:
-                self.conanfile.output.error(f"Failed to clone sources of '{self.description.name}' ({e})")
-                raise
+        try:
+            self.dirs.src = get(
+                conanfile      = self.conanfile,
+                url            = self.description.url,
+                component_name = self.description.component_name,
+                version        = str(self.description.version),
+                destination    = self.dirs.src.as_posix(),
+                download_dir   = self.dirs.download,
+                exclude        = self.description.get_source_excludes(),
+            )
+        except Exception as e:
+            self.conanfile.output.error(f"Failed to clone sources of '{self.description.name}' ({e})")
+            raise
 
     def _configure_project(self,
-        autotools : Autotools,
+        autotools   : Autotools,
+        environment : Environment,
     ):
         def process():
 
@@ -449,76 +783,148 @@ class AutotoolsPackage:
             # Extend the config with standard options
             config += self._common_config
 
+            # Reuse subdirectories of the build tree of a compatible stage
+            if self.description.shared_build_dirs:
+                fingerprint = self._get_share_fingerprint(config, environment)
+                self._share_build_dirs(fingerprint)
+
             # Configure the project in the build directory
-            with contextlib.chdir(self.dirs.build):
-                autotools.configure(
-                    build_script_folder = self.dirs.src.as_posix(),
-                    args = config
-                )
+            autotools.configure(
+                build_script_folder = self.dirs.src.as_posix(),
+                args = config
+            )
+
+            # Let subsequent stages reuse subdirectories of the build tree
+            if self.description.shared_build_dirs:
+                self._share_fingerprint_file.write_text(json.dumps(fingerprint, indent = 4))
         
         return self._run_step('configure', process)
+
+    # ------------------------------------------------------------------ #
+
+    @property
+    def _share_fingerprint_file(self):
+        return self.dirs.build / '.shared-build.json'
+
+    def _get_share_fingerprint(self,
+        config      : list,
+        environment : Environment,
+    ) -> dict:
+
+        """Returns description of inputs of subdirectories listed in `shared_build_dirs` (configure options,
+        environment and digests of configure scripts of subdirectories)
+        """
+
+        return {
+            'config'  : list(config),
+            'env'     : [ list(operation) for operation in environment ],
+            'sources' : {
+                name : hash_file(self.dirs.src / name / 'configure') if (self.dirs.src / name / 'configure').exists() else None
+                    for name in self.description.shared_build_dirs
+            },
+        }
+
+    def _share_build_dirs(self,
+        fingerprint : dict,
+    ):
+        """Links subdirectories listed in `shared_build_dirs` to the build tree of the first compatible stage
+        given by `share_build_with` (configured with the same sources, environment and options, except ones listed
+        in `share_build_neutral_options`). Top-level makefile does not configure subdirectories that already hold
+        a makefile so linked libraries are only checked to be up to date by the build.
+        """
+
+        neutral = tuple(self.description.share_build_neutral_options or [ ])
+
+        def relevant(config):
+            return sorted(option for option in config if not option.startswith(neutral))
+
+        for name in (self.description.share_build_with or [ ]):
+
+            provider = self.make_dirs(self.conanfile, name, self.target).build
+
+            # Check whether the stage has been built (and its build tree kept)
+            try:
+                provided = json.loads((provider / '.shared-build.json').read_text())
+            except (OSError, ValueError):
+                provided = None
+            if (provided is None) or (not (provider / '.built').exists()):
+                self.conanfile.output.info(f"Build tree of '{name}' is not available. Building all libraries of '{self.description.name}'...")
+                continue
+
+            # Check whether the stage is compatible
+            if (provided['env'] != fingerprint['env']) or (relevant(provided['config']) != relevant(fingerprint['config'])):
+                self.conanfile.output.info(f"'{name}' is configured differently than '{self.description.name}'. Build tree will not be shared.")
+                continue
+
+            # Share subdirectories built from the same sources
+            shared = [
+                subdir for subdir, digest in fingerprint['sources'].items()
+                    if (digest is not None) and (provided['sources'].get(subdir) == digest) and (provider / subdir / 'Makefile').exists()
+            ]
+            try:
+                for subdir in shared:
+                    (self.dirs.build / subdir).symlink_to(os.path.relpath(provider / subdir, self.dirs.build), target_is_directory = True)
+            except OSError as e:
+                self.conanfile.output.warning(f"Failed to link build tree of '{name}' ({e}). Building all libraries of '{self.description.name}'...")
+                for subdir in shared:
+                    if (self.dirs.build / subdir).is_symlink():
+                        (self.dirs.build / subdir).unlink()
+                return
+
+            if shared:
+                self.conanfile.output.info(f"Sharing {', '.join(shared)} with the build tree of '{name}'")
+                self.report.update(self._stage_id, shared_build = { 'stage' : name, 'dirs' : shared })
+                return
     
     def _build_project(self,
         autotools     : Autotools,
         build_target  : str,
         build_args    : list,
-        doc_targets   : list,
-        extra_targets : list,
+        doc_targets   : list | dict,
+        extra_targets : list | dict,
         clean_target  : str,
         clean_build   : bool,
     ):      
         modified = False
 
-        # Get the build options & env
-        build_options = self.description.get_build_options()
-        env           = self.description.get_env()
-        # Apply build options
-        if build_options:
-            os.environ['CXXFLAGS'] = ' '.join(build_options)
-        # Extend environment
-        if env:
-            os.environ.update(env)
-
-        with contextlib.chdir(self.dirs.build):
-
-            def make_target(target):
-                autotools.make(target = target, args = build_args)
+        def make_target(target):
+            autotools.make(target = target, args = build_args)
 
-            def process_clean_build():
-                make_target(clean_target)
+        def process_clean_build():
+            make_target(clean_target)
 
-            def process_build():
-
-                # Clean the build directory just in case
-                if clean_build:
-                    self._process_step(
-                        process = process_clean_build,
-                        step    = 'build-cleaning',
-                    )
-                
-                # Build the project
-                make_target(build_target)
-
-            def process_build_extras():
-                for target in extra_targets:
-                    make_target(target)
-
-            def process_build_doc():
-                for target in doc_targets:
-                    make_target(target)
+        def process_build():
 
+            # Clean the build directory just in case
+            if clean_build:
+                self._process_step(
+                    process = process_clean_build,
+                    step    = 'build-cleaning',
+                )
+            
             # Build the project
-            if self._run_step('build', process_build):
+            make_target(build_target)
+
+        def process_build_extras():
+            for batch in batch_targets(extra_targets):
+                make_target(' '.join(batch))
+
+        def process_build_doc():
+            for batch in batch_targets(doc_targets):
+                make_target(' '.join(batch))
+
+        # Build the project
+        if self._run_step('build', process_build):
+            modified = True
+        # Build extra targets if needed
+        if extra_targets:
+            if self._run_step('extra-build', process_build_extras):
                 modified = True
-            # Build extra targets if needed
-            if extra_targets:
-                if self._run_step('extra-build', process_build_extras):
+        # Build doc targets if needed
+        if self.conanfile.options.with_doc and (not self.description.without_doc):
+            if doc_targets:
+                if self._run_step('doc-build', process_build_doc):
                     modified = True
-            # Build doc targets if needed
-            if self.conanfile.options.with_doc and (not self.description.without_doc):
-                if doc_targets:
-                    if self._run_step('doc-build', process_build_doc):
-                        modified = True
 
         return modified
     
@@ -526,96 +932,138 @@ class AutotoolsPackage:
         autotools             : Autotools,
         install_target        : str,
         install_args          : list | None,
-        extra_install_targets : list,
+        extra_install_targets : list | dict,
         extra_install_args    : list | None,
-        doc_install_targets   : list,
+        doc_install_targets   : list | dict,
         doc_install_args      : list | None,
         manual_install_files  : dict,
     ):
         modified = False
 
-        # Configure the project in the build directory
-        with contextlib.chdir(self.dirs.build):
-
-            def make_target(target, extra_args = None):
-                autotools.make(
-                    target = target,
-                    args = (
-                        install_args if install_args else [ ]
-                    ) + (
-                        extra_args if extra_args else [ ]
-                    )
+        # Install into the staging tree if installs are staged
+        destdir_args = [ f'DESTDIR={self.manifest.destdir.as_posix()}' ] if (self.manifest is not None) else [ ]
+        # Destination of manually installed files
+        prefix = self.manifest.staged(self.dirs.prefix) if (self.manifest is not None) else self.dirs.prefix
+
+        def make_target(target, extra_args = None):
+            autotools.make(
+                target = target,
+                args = destdir_args + (
+                    install_args if install_args else [ ]
+                ) + (
+                    extra_args if extra_args else [ ]
                 )
+            )
 
-            def process_install():
-                make_target(install_target)
+        def staged(process):
+            def process_staged():
+                process()
+                self._merge_staged_install()
+            return process_staged if (self.manifest is not None) else process
 
-            def process_extra_install():
-                for target in extra_install_targets:
-                    make_target(target, extra_install_args)
+        def process_install():
+            # Drop manifest of the previous installation
+            if self.manifest is not None:
+                self.manifest.reset()
+            make_target(install_target)
 
-            def process_doc_install():
-                for target in doc_install_targets:
-                    make_target(target, doc_install_args)
+        def process_extra_install():
+            for batch in batch_targets(extra_install_targets):
+                make_target(' '.join(batch), extra_install_args)
 
-            def process_manual_install():
+        def process_doc_install():
+            for batch in batch_targets(doc_install_targets):
+                make_target(' '.join(batch), doc_install_args)
 
-                # If build is off-the-tree, copy the target files to the target directory
-                if self._is_off_build:
-                    self.conanfile.output.success(f"Copying target files to the install directory...")
-                    for pattern, dst in self.description.target_files.items():
-                        copy_with_rename(self.conanfile,
-                            pattern = pattern,
-                            src     = f'{self.dirs.offprefix.as_posix()}',
-                            dst     = f'{self.dirs.prefix.as_posix()}/{dst}',
-                        )
+        def process_manual_install():
 
-                # Install extra files directly from the build tree if needed
-                for pattern, dst in manual_install_files.items():
-                    self.conanfile.output.success(f"Copying extra files to the install directory...")
+            # If build is off-the-tree, copy the target files to the target directory
+            if self._is_off_build:
+                self.conanfile.output.success(f"Copying target files to the install directory...")
+                for pattern, dst in self.description.target_files.items():
                     copy_with_rename(self.conanfile,
-                        pattern = pattern.as_posix(),
-                        src     = f'{self.dirs.build.as_posix()}',
-                        dst     = f'{self.dirs.prefix.as_posix()}/{dst}',
+                        pattern = pattern,
+                        src     = f'{self.dirs.offprefix.as_posix()}',
+                        dst     = f'{prefix.as_posix()}/{dst}',
                     )
 
-                # For Windows, install msys2 runtime in the /lib directory if we use it
-                if (self.conanfile.settings.os == 'Windows') and ('msys2' in self.conanfile.dependencies.build):
-                    msys_bin = pathlib.Path(self.conanfile.dependencies.build['msys2'].package_folder) / 'bin/msys64/usr/bin'
-                    for file in self.msys_dlls:
-                        shutil.copy(msys_bin / file, self.dirs.prefix / 'bin' / file)
-                        assert (self.dirs.prefix / 'bin' / file).exists()
+            # Install extra files directly from the build tree if needed
+            for pattern, dst in manual_install_files.items():
+                self.conanfile.output.success(f"Copying extra files to the install directory...")
+                copy_with_rename(self.conanfile,
+                    pattern = pattern.as_posix(),
+                    src     = f'{self.dirs.build.as_posix()}',
+                    dst     = f'{prefix.as_posix()}/{dst}',
+                )
 
-            # Install the project
-            if self._run_step('install', process_install):
+            # For Windows, install msys2 runtime in the /lib directory if we use it
+            if (self.conanfile.settings.os == 'Windows') and ('msys2' in self.conanfile.dependencies.build):
+                msys_bin = pathlib.Path(self.conanfile.dependencies.build['msys2'].package_folder) / 'bin/msys64/usr/bin'
+                for file in self.msys_dlls:
+                    shutil.copy(msys_bin / file, prefix / 'bin' / file)
+                    assert (prefix / 'bin' / file).exists()
+
+        # Install the project
+        if self._run_step('install', staged(process_install)):
+            modified = True
+        # Install extra targets if needed
+        if extra_install_targets:
+            if self._run_step('extra-install', staged(process_extra_install)):
                 modified = True
-            # Install extra targets if needed
-            if extra_install_targets:
-                if self._run_step('extra-install', process_extra_install):
+        # Install doc targets if needed
+        if self.conanfile.options.with_doc and (not self.description.without_doc):
+            if doc_install_targets:
+                if self._run_step('doc-install', staged(process_doc_install)):
                     modified = True
-            # Install doc targets if needed
-            if self.conanfile.options.with_doc and (not self.description.without_doc):
-                if doc_install_targets:
-                    if self._run_step('doc-install', process_doc_install):
-                        modified = True
-            # Install some files manually if needed
-            if self._run_step('manual-install', process_manual_install):
-                modified = True
+        # Install some files manually if needed
+        if self._run_step('manual-install', staged(process_manual_install)):
+            modified = True
 
         return modified
 
+    def _merge_staged_install(self):
+
+        """Merges the staging tree into install trees and records conflicts in the report"""
+
+        stats = self.manifest.merge(self.conanfile, pathlib.Path(self.conanfile.build_folder) / get_standard_dirs().prefix.parent)
+
+        report   = self.report.load().get(self._stage_id, { }).get('manifest', { })
+        previous = [ conflict for conflict in report.get('conflicts', [ ]) if conflict['path'] not in { c['path'] for c in stats['conflicts'] } ]
+        self.report.update(self._stage_id,
+            manifest = {
+                'path'      : self.manifest.path.as_posix(),
+                'conflicts' : previous + stats['conflicts'],
+            }
+        )
+
     def _cleanup_project(self):
 
         def process_cleanup():
-            for path in self.description.cleanup_files:
-                path = self.dirs.prefix / path
-                try:
-                    if path.is_file():
-                        path.unlink()
-                    else:
-                        shutil.rmtree(path.as_posix())
-                except Exception as e:
-                    self.conanfile.output.warning(f"Failed to remove '{path.as_posix()}' ({e})")
+
+            # Preserve files installed by stages not preceding the stage (these may be built concurrently)
+            keep = None
+            if self.manifest is not None:
+                build_folder = pathlib.Path(self.conanfile.build_folder)
+                keep         = set()
+                for stage, manifest in InstallManifest.load_all(build_folder).items():
+                    if (stage != self.manifest.stage) and (stage not in self.preceded_by):
+                        for path in [ *manifest['files'], *manifest['symlinks'] ]:
+                            path = build_folder / path
+                            if path.is_relative_to(self.dirs.prefix):
+                                keep.add(path.relative_to(self.dirs.prefix).as_posix())
+
+            # Remove files matching patterns (in a single walk of the prefix)
+            removed = remove_matching(self.dirs.prefix, self.description.cleanup_files, keep = keep)
+
+            for pattern, stats in removed.items():
+                if stats['count'] == 0:
+                    self.conanfile.output.info(f"No files matching '{pattern}' found in '{self.dirs.prefix.as_posix()}'")
+                else:
+                    self.conanfile.output.info(f"Removed {stats['count']} entries matching '{pattern}' ({format_size(stats['size'])})")
+            self.report.update(self._stage_id, cleanup = { pattern : stats['size'] for pattern, stats in removed.items() })
+            # Drop removed files from the manifest
+            if self.manifest is not None:
+                self.manifest.prune()
 
         # Cleanup the installation
         if self.description.cleanup_files:
@@ -623,4 +1071,360 @@ class AutotoolsPackage:
 
         return False
 
+    # ------------------------------------------------------------------ #
+
+    @property
+    def _reclaim_tag(self):
+        return self.dirs.build / '.reclaimed'
+
+    @property
+    def _build_tree_archive(self):
+        build_root = pathlib.Path(self.conanfile.build_folder) / get_standard_dirs().build
+        return pathlib.Path(self.conanfile.build_folder) / 'archive' / f'{self.dirs.build.relative_to(build_root).as_posix()}.tar.gz'
+
+    def _reclaim_build_tree(self):
+
+        """Removes (or archives and removes) the build tree of the stage leaving only step tags
+        in place so that the stage is still recognized as completed when the build is resumed.
+        Names of preserved tags are stored in the `.reclaimed` tag file.
+        """
+
+        policy = str(self.conanfile.options.build_trees)
+
+        # Keep the tree if requested or if it has been already reclaimed
+        if (policy == 'keep') or self._reclaim_tag.exists():
+            return
+
+        # Collect tags of the completed steps
+        tags = [ step['tag'] for step in self._steps.values() if ('tag' in step) and step['tag'].exists() ]
+        # Compute size of the tree
+        tree_size = get_tree_size(self.dirs.build)
+
+        # Archive the tree if requested
+        if policy == 'archive':
+            self.conanfile.output.info(f"Archiving build tree of '{self.description.name}' into '{self._build_tree_archive.as_posix()}'...")
+            self._build_tree_archive.parent.mkdir(parents = True, exist_ok = True)
+            with tarfile.open(self._build_tree_archive.as_posix(), 'w:gz', compresslevel = 1) as archive:
+                archive.add(self.dirs.build.as_posix(), arcname = '.')
+
+        # Remove everything but the step tags (and identity of sources)
+        for entry in self.dirs.build.iterdir():
+            if entry not in tags + [ self._source_tag ]:
+                if entry.is_dir() and not entry.is_symlink():
+                    shutil.rmtree(entry.as_posix(), ignore_errors = True)
+                else:
+                    entry.unlink()
+
+        # Mark the tree as reclaimed
+        self._reclaim_tag.write_text('\n'.join(tag.name for tag in tags))
+
+        self.conanfile.output.success(f"Build tree of '{self.description.name}' reclaimed ({format_size(tree_size)} freed).")
+
+    def _restore_build_tree(self):
+
+        """Brings back the reclaimed build tree if some of the steps completed before the
+        reclamation need to be rerun (e.g. its tag has been removed manually). If the tree
+        has been archived, it is unpacked. Otherwise all step tags are removed so that the
+        stage is rebuilt from scratch.
+        """
+
+        # Nothing to do if the tree has not been reclaimed
+        if not self._reclaim_tag.exists():
+            return
+
+        # Nothing to do if all tags preserved at reclamation are still present
+        missing_tags = [ tag for tag in self._reclaim_tag.read_text().split() if not (self.dirs.build / tag).exists() ]
+        if not missing_tags:
+            return
+
+        # Unpack the archive if present
+        if self._build_tree_archive.exists():
+
+            self.conanfile.output.info(f"Restoring build tree of '{self.description.name}' from '{self._build_tree_archive.as_posix()}'...")
+            extract_tar(self._build_tree_archive, self.dirs.build, trusted = True)
+
+            # Remove tags that were missing before unpacking
+            for tag in missing_tags:
+                (self.dirs.build / tag).unlink(missing_ok = True)
+
+        # Otherwise, rebuild the stage from scratch
+        else:
+            self.conanfile.output.warning(f"Build tree of '{self.description.name}' has been removed. The stage will be rebuilt from scratch...")
+            self._remove_all_step_tags_from('configure')
+
+        self._reclaim_tag.unlink()
+
+    def _report_disk_usage(self,
+        disk_usage : DiskUsageMonitor,
+    ):
+        tree_size = get_tree_size(self.dirs.build)
+
+        self.conanfile.output.info(
+            f"Disk usage of '{self.description.name}': "
+            f"build tree {format_size(tree_size)}, "
+            f"peak filesystem growth {format_size(disk_usage.growth)} "
+            f"(peak usage {format_size(disk_usage.peak)})"
+        )
+
+        self.report.update(self._stage_id,
+            disk = {
+                'build_tree'  : tree_size,
+                'peak_growth' : disk_usage.growth,
+            }
+        )
+
+    # ------------------------------------------------------------------ #
+
+    @property
+    def _stage_id(self):
+        build_root = pathlib.Path(self.conanfile.build_folder) / get_standard_dirs().build
+        return self.dirs.build.relative_to(build_root).as_posix()
+
+    @property
+    def _source_id(self):
+        # Name of the source archive (identical for all mirrors of the archive) or the git remote along with
+        # the commit the revision resolves to (fetched if needed)
+        urls = split_option(self.description.url, ', ')
+        if urls and GitSource.is_git_url(urls[0]):
+            source = GitSource.from_conanfile(self.conanfile, urls[0], self.dirs.download)
+            with locked(source.reference.with_name(f'{source.reference.name}.lock')):
+                # Plans collected for the estimation only use the commit fetched previously (if any)
+                if BuildPlan.is_collecting_offline(self.conanfile):
+                    return f'{GitSource.prefix}{source.remote}@{source.fetched() or source.revision}'
+                return f'{GitSource.prefix}{source.remote}@{source.fetch()}'
+        return urls[0].rstrip('/').rsplit('/', 1)[-1] if urls else ''
+
+    @property
+    def _source_tag(self):
+        # File holding identity of sources the step tags refer to
+        return self.dirs.build / '.source'
+
+    def _sources_changed(self) -> bool:
+        """Checks whether sources of the stage differ from the ones its steps have been run on"""
+        return self._source_tag.exists() and (self._source_tag.read_text() != self._source_id)
+
+    def _get_stage_steps(self,
+        arguments : dict,
+    ) -> list:
+
+        """Returns list of steps run by the stage called with given `arguments`"""
+
+        with_doc = self.conanfile.options.with_doc and (not self.description.without_doc)
+
+        return [ step for step, enabled in {
+            'configure'      : True,
+            'build'          : True,
+            'extra-build'    : bool(arguments['extra_targets']),
+            'doc-build'      : with_doc and bool(arguments['doc_targets']),
+            'install'        : True,
+            'extra-install'  : bool(arguments['extra_install_targets']),
+            'doc-install'    : with_doc and bool(arguments['doc_install_targets']),
+            'manual-install' : True,
+            'cleanup'        : bool(self.description.cleanup_files),
+        }.items() if enabled ]
+
+    def _get_stage_key(self,
+        arguments : dict,
+    ) -> str | None:
+
+        """Computes key of the stage in the stage cache. The key covers all inputs of the stage and keys
+        of all stages it depends on. Paths of the build folder and of dependencies are replaced with
+        placeholders so that the key does not depend on the location of the build.
+        """
+
+        if self.stage_cache is None:
+            return None
+
+        # Hash patches applied to the sources
+        patches = { }
+        patches_dir = get_patches_dir(self.conanfile, self.description.component_name, str(self.description.version))
+        if patches_dir.exists():
+            for patch in sorted(patches_dir.iterdir()):
+                patches[patch.name] = hashlib.sha256(patch.read_bytes()).hexdigest()
+
+        # Collect dependencies (their package folders are replaced with placeholders)
+        placeholders = { self.conanfile.build_folder : '<build>' }
+        dependencies = [ ]
+        for dep in self.conanfile.dependencies.values():
+            dependencies.append(str(dep.pref))
+            if dep.package_folder is not None:
+                placeholders[dep.package_folder] = f'<{dep.ref.name}>'
+
+        inputs = {
+            'stage'        : self._stage_id,
+            'component'    : self.description.component_name,
+            'name'         : self.description.name,
+            'version'      : str(self.description.version),
+            'source'       : self._source_id,
+            'target'       : self.target,
+            'pkg_version'  : self.pkg_version,
+            'patches'      : patches,
+            'config'       : self.description.get_config() + self._common_config,
+            'build_opts'   : self.description.get_build_options(),
+            'env'          : self.description.get_env(),
+            'host_linkage' : self.description.get_host_linkage(),
+            'target_files' : self.description.target_files,
+            'cleanup'      : self.description.cleanup_files,
+            'arguments'    : arguments | {
+                'manual_install_files' : { str(src): str(dst) for src, dst in arguments['manual_install_files'].items() },
+                'envs'                 : list(arguments['envs'] or [ ]),
+            },
+            'with_doc'     : bool(self.conanfile.options.with_doc),
+            'settings'     : self.conanfile.settings.dumps(),
+            'conf'         : {
+                name : self.conanfile.conf.get(name) for name in [
+                    'tools.build:cflags',
+                    'tools.build:cxxflags',
+                    'tools.build:ldflags',
+                    'tools.build:defines',
+                ]
+            },
+            'dependencies' : sorted(dependencies),
+            'depends_on'   : StageCache.get_keys(self.conanfile, self.depends_on),
+        }
+
+        key = StageCache.compute_key(inputs, placeholders)
+        # Stages depending on this one refer to its key
+        StageCache.register_key(self.conanfile, self._stage_id, key)
+
+        return key
+
+    def _restore_from_stage_cache(self,
+        stage_key : str | None,
+        arguments : dict,
+    ) -> bool:
+
+        """Restores results of the stage from the stage cache if any of its steps needs to be run. Returns True
+        if the stage has been restored.
+        """
+
+        if stage_key is None:
+            return False
+
+        # Nothing to do if the stage has been already completed
+        steps = self._get_stage_steps(arguments)
+        if all(self._has_step_tag(step) for step in steps):
+            return False
+
+        start = time.monotonic()
+
+        # Fetch the artifact from the remote cache if it is not available locally
+        transfer = None
+        if self.stage_cache.lookup(stage_key) is None:
+            try:
+                transfer = self.stage_cache.fetch(stage_key)
+            except Exception as e:
+                self.conanfile.output.warning(f"Failed to fetch '{self.description.name}' from the remote stage cache ({e})")
+            if transfer is not None:
+                self.conanfile.output.info(
+                    f"'{self.description.name}' downloaded from the remote stage cache "
+                    f"({format_size(transfer['size'])} in {transfer['duration']:.1f}s)."
+                )
+
+        # Restore the stage
+        metadata = self.stage_cache.restore(stage_key, self.conanfile.build_folder)
+        if metadata is None:
+            self.conanfile.output.info(f"'{self.description.name}' not found in the stage cache ({stage_key[:12]}).")
+            self.report.update(self._stage_id, cache = { 'key': stage_key, 'status': 'miss' })
+            return False
+
+        # Drop outdated build tree
+        for entry in self.dirs.build.iterdir():
+            if entry.is_dir() and not entry.is_symlink():
+                shutil.rmtree(entry.as_posix(), ignore_errors = True)
+            else:
+                entry.unlink()
+        # Mark all steps as completed (build tree is not available, i.e. it is considered reclaimed)
+        for step in steps:
+            self._steps[step]['tag'].touch()
+        self._reclaim_tag.write_text('\n'.join(self._steps[step]['tag'].name for step in steps))
+        # Outdated archive of the build tree would be restored when the stage is rebuilt
+        self._build_tree_archive.unlink(missing_ok = True)
+
+        duration = time.monotonic() - start
+
+        self.conanfile.output.success(
+            f"'{self.description.name}' restored from the stage cache "
+            f"({stage_key[:12]}, {format_size(metadata['size'])} in {duration:.1f}s)."
+        )
+        self.report.update(self._stage_id,
+            cache = {
+                'key'      : stage_key,
+                'status'   : 'hit',
+                'size'     : metadata['size'],
+                'duration' : round(duration, 3),
+            } | ({ 'download' : transfer } if (transfer is not None) else { })
+        )
+
+        return True
+
+    def _snapshot_install_trees(self,
+        stage_key : str | None,
+    ) -> dict | None:
+
+        """Snapshots install trees before the stage is installed. Returns None if the stage cache is disabled
+        or if the stage has been already (partially) installed (results of such stage cannot be captured).
+        """
+
+        if (stage_key is None) or self._has_step_tag('install'):
+            return None
+
+        return StageCache.snapshot(
+            pathlib.Path(self.conanfile.build_folder),
+            [ pathlib.Path(self.conanfile.build_folder) / get_standard_dirs().prefix.parent ],
+        )
+
+    def _store_in_stage_cache(self,
+        stage_key        : str | None,
+        install_snapshot : dict | None,
+    ):
+        """Stores files installed by the stage in the stage cache"""
+
+        if (stage_key is None) or (install_snapshot is None):
+            return
+
+        build_folder = pathlib.Path(self.conanfile.build_folder)
+
+        # Find files modified by the stage
+        snapshot = StageCache.snapshot(build_folder, [ build_folder / get_standard_dirs().prefix.parent ])
+        files    = [ path for path, stat in snapshot.items() if install_snapshot.get(path) != stat ]
+        removed  = [ path for path in install_snapshot.keys() if path not in snapshot ]
+        # Manifest of the stage is restored together with installed files
+        if (self.manifest is not None) and self.manifest.path.exists():
+            files.append(self.manifest.path.relative_to(build_folder).as_posix())
+
+        self.conanfile.output.info(f"Storing '{self.description.name}' in the stage cache ({stage_key[:12]})...")
+
+        try:
+            metadata = self.stage_cache.store(stage_key, build_folder, files, removed, {
+                'stage'   : self._stage_id,
+                'name'    : self.description.name,
+                'version' : str(self.description.version),
+                'target'  : self.target,
+            })
+        except Exception as e:
+            self.conanfile.output.warning(f"Failed to store '{self.description.name}' in the stage cache ({e})")
+            return
+
+        self.report.update(self._stage_id,
+            cache = {
+                'key'      : stage_key,
+                'status'   : 'stored',
+                'size'     : metadata['size'],
+                'duration' : metadata['duration'],
+            }
+        )
+
+        # Upload the artifact to the remote cache in the background
+        stage_id = self._stage_id
+        name     = self.description.name
+        def on_uploaded(result):
+            if isinstance(result, Exception):
+                self.conanfile.output.warning(f"Failed to upload '{name}' to the remote stage cache ({result})")
+            else:
+                self.conanfile.output.info(f"'{name}' uploaded to the remote stage cache ({format_size(result['size'])} in {result['duration']:.1f}s).")
+                self.report.update(stage_id, cache = { 'upload' : result })
+
+        self.stage_cache.upload(self.conanfile, stage_key, on_uploaded)
+
 # ================================================================================================================================== #
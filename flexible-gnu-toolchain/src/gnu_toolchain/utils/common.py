@@ -93,4 +93,24 @@ def merge_dicts(
 
     return result
 
+# ========================================================== split_option ========================================================== #
+
+def split_option(
+    value,
+    separators : str = ',',
+) -> list:
+    """Splits value of the list-like option (e.g. comma-separated string) into the list of
+    non-empty, stripped items. `None` value results in an empty list.
+    """
+
+    if (value is None) or (str(value) == 'None'):
+        return [ ]
+
+    # Unify separators
+    value = str(value)
+    for separator in separators[1:]:
+        value = value.replace(separator, separators[0])
+
+    return [ item.strip() for item in value.split(separators[0]) if item.strip() ]
+
 # ================================================================================================================================== #
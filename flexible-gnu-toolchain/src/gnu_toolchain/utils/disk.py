@@ -0,0 +1,115 @@
+# ====================================================================================================================================
+# @file       disk.py
+# @author     Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @maintainer Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @date       Monday, 19th October 2026 9:12:40 am
+# @modified   Monday, 19th October 2026 9:12:40 am by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# 
+# 
+# @copyright Krzysztof Pierczyk © 2026
+# ====================================================================================================================================
+
+# ============================================================= Imports ============================================================ #
+
+# System imports
+import os
+import pathlib
+import shutil
+import threading
+
+# =========================================================== format_size ========================================================== #
+
+def format_size(
+    size : int,
+):
+    """Formats the `size` given in bytes into the human-readable string"""
+
+    for unit in [ 'B', 'KiB', 'MiB', 'GiB' ]:
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{size} {unit}"
+        size /= 1024
+
+    return f"{size:.1f} TiB"
+
+# ========================================================== get_tree_size ========================================================= #
+
+def get_tree_size(
+    path : pathlib.Path,
+):
+    """Computes total size of files in the `path` directory tree (symbolic links are not followed)"""
+
+    total = 0
+
+    # Walk the tree without recursion (build trees may be deep)
+    pending = [ pathlib.Path(path) ]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks = False):
+                            pending.append(entry.path)
+                        else:
+                            total += entry.stat(follow_symlinks = False).st_size
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+
+    return total
+
+# ======================================================== DiskUsageMonitor ======================================================== #
+
+class DiskUsageMonitor:
+
+    """Context manager sampling usage of the filesystem holding the `path` in the background
+    thread. After the context is exited, `baseline` holds usage of the filesystem at the
+    moment of entering the context while `peak` holds the highest usage observed in between.
+    """
+
+    def __init__(self,
+        path     : pathlib.Path,
+        interval : float = 5.0,
+    ):
+        self.path     = pathlib.Path(path)
+        self.interval = interval
+        self.baseline = None
+        self.peak     = None
+
+    @property
+    def growth(self):
+        """Peak growth of the filesystem usage observed in the context"""
+        return self.peak - self.baseline
+
+    # ------------------------------------------------------------------ #
+
+    def __enter__(self):
+
+        self.baseline = self._sample()
+        self.peak     = self.baseline
+
+        # Start the sampling thread
+        self._stopped = threading.Event()
+        self._thread  = threading.Thread(target = self._run, daemon = True)
+        self._thread.start()
+
+        return self
+
+    def __exit__(self, etype, value, traceback):
+
+        # Stop the sampling thread
+        self._stopped.set()
+        self._thread.join()
+        # Take the final sample
+        self.peak = max(self.peak, self._sample())
+
+    # ------------------------------------------------------------------ #
+
+    def _sample(self):
+        return shutil.disk_usage(self.path.as_posix()).used
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.peak = max(self.peak, self._sample())
+
+# ================================================================================================================================== #
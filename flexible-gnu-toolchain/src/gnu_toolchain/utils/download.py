@@ -0,0 +1,376 @@
+# ====================================================================================================================================
+# @file       download.py
+# @author     Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @maintainer Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @date       Monday, 19th October 2026 1:05:37 pm
+# @modified   Monday, 19th October 2026 1:05:37 pm by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# 
+# 
+# @copyright Krzysztof Pierczyk © 2026
+# ====================================================================================================================================
+
+# ============================================================= Imports ============================================================ #
+
+# System imports
+import concurrent.futures
+import ftplib
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import threading
+import time
+import urllib.parse
+import urllib.request
+# Conan imports
+from conan.errors import ConanException
+
+# ============================================================ sha256sum =========================================================== #
+
+def sha256sum(
+    path,
+    block_size : int = 1024 * 1024,
+) -> str:
+    """Computes SHA256 digest of the file"""
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while block := file.read(block_size):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+# ======================================================== Helper functions ======================================================== #
+
+def _to_local_path(
+    url : str,
+) -> pathlib.Path | None:
+    """Returns local path pointed by the `url` (file:// URL or plain path) or None if the URL is remote"""
+
+    parsed = urllib.parse.urlparse(url)
+    if parsed.scheme == 'file':
+        return pathlib.Path(urllib.request.url2pathname(parsed.path))
+    # Plain paths (including Windows paths with drive letters)
+    if (parsed.scheme == '') or ((os.name == 'nt') and (len(parsed.scheme) == 1)):
+        return pathlib.Path(url)
+
+    return None
+
+def _split_ftp_url(
+    url : str,
+) -> tuple:
+    """Returns (host, path) pair of the ftp:// URL"""
+
+    parsed = urllib.parse.urlparse(url)
+    return (parsed.hostname, urllib.parse.unquote(parsed.path.lstrip('/')))
+
+def _probe(
+    url     : str,
+    timeout : float,
+) -> dict | None:
+
+    """Probes the mirror. Returns dictionary holding the `url`, `latency` of the request (seconds), `size` of the file
+    (None if unknown), its `validator` (strong ETag or Last-Modified of HTTP servers, modification time reported by
+    FTP servers; None if unknown), whether bounded byte `ranges` are supported (HTTP range requests) and whether
+    interrupted downloads may be resumed. Returns None if the mirror is not available.
+    """
+
+    start = time.monotonic()
+
+    try:
+
+        # FTP servers support restarting transfers (REST) but not bounded ranges
+        if url.startswith('ftp://'):
+            host, path = _split_ftp_url(url)
+            ftp = ftplib.FTP(host, timeout = timeout)
+            try:
+                ftp.login()
+                ftp.voidcmd('TYPE I')
+                size = ftp.size(path)
+                try:
+                    validator = ftp.sendcmd(f'MDTM {path}').split()[-1]
+                except ftplib.all_errors:
+                    validator = None
+            finally:
+                ftp.close()
+            return { 'url' : url, 'latency' : time.monotonic() - start, 'size' : size, 'validator' : validator, 'ranges' : False, 'resume' : True }
+
+        request = urllib.request.Request(url, method = 'HEAD')
+        with urllib.request.urlopen(request, timeout = timeout) as response:
+            size   = response.headers.get('Content-Length', None)
+            ranges = response.headers.get('Accept-Ranges', 'none').lower() == 'bytes'
+            # Weak ETags cannot be used in If-Range headers
+            etag      = response.headers.get('ETag', None)
+            validator = etag if (etag is not None) and (not etag.startswith('W/')) else response.headers.get('Last-Modified', None)
+            return {
+                'url'       : url,
+                'latency'   : time.monotonic() - start,
+                'size'      : int(size) if (size is not None) else None,
+                'validator' : validator,
+                'ranges'    : ranges,
+                'resume'    : ranges,
+            }
+
+    except Exception:
+        return None
+
+def _read_state(
+    path : pathlib.Path,
+) -> dict:
+    """Returns state of the interrupted download saved in the `path` (empty if there is none)"""
+
+    try:
+        state = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return { }
+
+    return state if isinstance(state, dict) else { }
+
+def _download_range(
+    url       : str,
+    path      : pathlib.Path,
+    start     : int,
+    end       : int,
+    timeout   : float,
+    validator : str | None = None,
+):
+    """Downloads bytes [start, end] of the remote file into the same offsets of the local `path`. If the `validator`
+    is given, the range is requested only if the remote file has not changed (If-Range)
+    """
+
+    headers = { 'Range' : f'bytes={start}-{end}' }
+    if validator is not None:
+        headers['If-Range'] = validator
+
+    request = urllib.request.Request(url, headers = headers)
+    with urllib.request.urlopen(request, timeout = timeout) as response, open(path, 'r+b') as file:
+
+        if response.status != 206:
+            raise ConanException(f"Server did not send the requested range of '{url}' (range requests not supported or the file has changed)")
+
+        file.seek(start)
+        while block := response.read(1024 * 1024):
+            file.write(block[:max(0, end + 1 - start)])
+            start += len(block)
+
+    if start != end + 1:
+        raise ConanException(f"Incomplete range {start}-{end} of '{url}'")
+
+def _download_stream(
+    url       : str,
+    path      : pathlib.Path,
+    offset    : int,
+    timeout   : float,
+    validator : str | None = None,
+):
+    """Downloads the remote file into the `path` as a single stream, resuming from the `offset` (bytes already
+    downloaded) if the server allows it and the remote file still matches the `validator` (If-Range)
+    """
+
+    # FTP (restart the transfer at the offset)
+    if url.startswith('ftp://'):
+        host, path_on_host = _split_ftp_url(url)
+        ftp = ftplib.FTP(host, timeout = timeout)
+        try:
+            ftp.login()
+            with open(path, 'r+b' if offset else 'wb') as file:
+                file.truncate(offset)
+                file.seek(offset)
+                ftp.retrbinary(f'RETR {path_on_host}', file.write, rest = offset or None)
+        finally:
+            ftp.close()
+        return
+
+    # HTTP (request the remaining part of the file)
+    headers = { }
+    if offset:
+        headers['Range'] = f'bytes={offset}-'
+        if validator is not None:
+            headers['If-Range'] = validator
+
+    request = urllib.request.Request(url, headers = headers)
+    with urllib.request.urlopen(request, timeout = timeout) as response:
+        # Start from scratch if the server ignored the range
+        if offset and (response.status != 206):
+            offset = 0
+        with open(path, 'r+b' if offset else 'wb') as file:
+            file.truncate(offset)
+            file.seek(offset)
+            shutil.copyfileobj(response, file, 1024 * 1024)
+
+# ========================================================= select_mirrors ========================================================= #
+
+def select_mirrors(
+    conanfile,
+    urls    : list,
+    timeout : float = 10,
+) -> list:
+    """Probes all `urls` (mirrors of the same file) in parallel. Returns results of probes (see `_probe`)
+    of available mirrors sorted by latency.
+    """
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers = max(1, len(urls))) as executor:
+        probes = list(executor.map(lambda url: _probe(url, timeout), urls))
+
+    for url, probe in zip(urls, probes):
+        if probe is None:
+            conanfile.output.warning(f"Mirror '{url}' is not available")
+        else:
+            conanfile.output.info(f"Mirror '{url}': {probe['latency'] * 1000:.0f} ms" + (" (ranges supported)" if probe['ranges'] else ""))
+
+    return sorted([ probe for probe in probes if probe is not None ], key = lambda probe: probe['latency'])
+
+# ========================================================== download_file ========================================================= #
+
+def _download_chunks(
+    conanfile,
+    mirrors    : list,
+    path       : pathlib.Path,
+    size       : int,
+    threads    : int,
+    chunk_size : int,
+    timeout    : float,
+):
+    """Downloads the file of the given `size` into the `path` with parallel range requests spread over `mirrors`.
+    Completed chunks are recorded in the `<path>.json` file (along with validators of mirrors) so that an
+    interrupted download is resumed if mirrors still serve the same file. Chunks failing on one mirror are
+    retried on the remaining ones. Ranges are requested only if the file has not changed since it was probed.
+    """
+
+    state_path = path.with_name(f'{path.name}.json')
+    validators = { mirror['url'] : mirror['validator'] for mirror in mirrors }
+
+    # Resume the previous download if it concerned the same file
+    state = _read_state(state_path)
+    if (state.get('size') != size) or (state.get('validators') != validators) or (not path.exists()) or (path.stat().st_size != size):
+        state = { 'size' : size, 'validators' : validators, 'done' : [ ] }
+        with open(path, 'wb') as file:
+            file.truncate(size)
+
+    done   = set(state['done'])
+    chunks = [ (start, min(start + chunk_size, size) - 1) for start in range(0, size, chunk_size) if start not in done ]
+    lock   = threading.Lock()
+
+    conanfile.output.info(
+        f"Downloading '{path.name.removesuffix('.part')}' ({len(chunks)} chunks" +
+        (f", {len(done)} already downloaded" if done else "") +
+        f", {len(mirrors)} mirror(s), {min(threads, max(1, len(chunks)))} threads)..."
+    )
+
+    def fetch(index, start, end):
+
+        # Spread chunks over mirrors, fall back to remaining mirrors on failures
+        error = None
+        for mirror in mirrors[index % len(mirrors):] + mirrors[:index % len(mirrors)]:
+            try:
+                _download_range(mirror['url'], path, start, end, timeout, mirror['validator'])
+            except Exception as e:
+                error = e
+                continue
+            with lock:
+                done.add(start)
+                tmp_path = state_path.with_name(f'{state_path.name}.tmp')
+                tmp_path.write_text(json.dumps({ 'size' : size, 'validators' : validators, 'done' : sorted(done) }))
+                os.replace(tmp_path, state_path)
+            return
+
+        raise ConanException(f"Failed to download bytes {start}-{end} from any mirror ({error})")
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers = threads) as executor:
+        for future in [ executor.submit(fetch, index, start, end) for index, (start, end) in enumerate(chunks) ]:
+            future.result()
+
+    state_path.unlink(missing_ok = True)
+
+def download_file(
+    conanfile,
+    url,
+    destination,
+    sha256     : str | None = None,
+    threads    : int        = 8,
+    chunk_size : int        = 8 * 1024 * 1024,
+    timeout    : float      = 60,
+) -> pathlib.Path:
+
+    """Downloads the file from the `url` (or from the list of mirrors of the file) into the `destination` path
+    verifying its SHA256 digest (if given). Local files (plain paths and file:// URLs) are copied. Remote mirrors
+    are probed in parallel and used in order of their latency. Large files are downloaded in `chunk_size` chunks by
+    `threads` parallel range requests spread over all mirrors that support them and serve the file of the same
+    size. Without the `sha256` digest chunks are combined only from mirrors serving the file with the same validator
+    (ETag or Last-Modified) as the fastest one, and only if it has one. Otherwise the file is downloaded as a single
+    stream from the fastest mirror, falling back to the next ones on failures. The file is written under the
+    `<destination>.part` name (kept if the download is interrupted so that it may be resumed if the mirror still
+    serves the file with the same validator; callers are expected to serialize downloads of the same destination)
+    and moved into the `destination` only after it has been verified.
+    """
+
+    urls        = [ url ] if isinstance(url, str) else list(url)
+    destination = pathlib.Path(destination)
+    destination.parent.mkdir(parents = True, exist_ok = True)
+
+    part_path  = destination.with_name(f'{destination.name}.part')
+    state_path = part_path.with_name(f'{part_path.name}.json')
+    local_path = next((_to_local_path(url) for url in urls if _to_local_path(url) is not None), None)
+
+    # Copy local files
+    if local_path is not None:
+        conanfile.output.info(f"Copying '{local_path.as_posix()}' into '{destination.as_posix()}'...")
+        shutil.copyfile(local_path, part_path)
+
+    # Download remote files
+    else:
+
+        mirrors = select_mirrors(conanfile, urls, timeout = min(timeout, 10))
+        if not mirrors:
+            raise ConanException(f"None of mirrors of '{destination.name}' is available ({', '.join(urls)})")
+
+        completed = False
+
+        # Download in parallel chunks if possible
+        size   = mirrors[0]['size']
+        ranged = [ mirror for mirror in mirrors if mirror['ranges'] and (mirror['size'] == size) ]
+        # Without the digest chunks may be combined only if mirrors are known to serve the same file
+        if (sha256 is None) and ranged:
+            ranged = [ mirror for mirror in ranged if (mirror['validator'] is not None) and (mirror['validator'] == ranged[0]['validator']) ]
+        if ranged and (size is not None) and (size > chunk_size) and (threads > 1):
+            try:
+                _download_chunks(conanfile, ranged, part_path, size, threads, chunk_size, timeout)
+                completed = True
+            except Exception as e:
+                conanfile.output.warning(f"Parallel download of '{destination.name}' failed ({e}). Falling back to single streams...")
+                part_path.unlink(missing_ok = True)
+                state_path.unlink(missing_ok = True)
+
+        # Otherwise, download the file as a single stream (resuming the partial download if the mirror serves the same file)
+        if not completed:
+            for mirror in mirrors:
+                resume = part_path.exists() and mirror['resume'] and (mirror['validator'] is not None) and \
+                    (_read_state(state_path).get('validator') == mirror['validator'])
+                offset = part_path.stat().st_size if resume else 0
+                state_path.write_text(json.dumps({ 'validator' : mirror['validator'] }))
+                conanfile.output.info(f"Downloading '{mirror['url']}'" + (f" (resuming at {offset} bytes)" if offset else "") + "...")
+                try:
+                    _download_stream(mirror['url'], part_path, offset, timeout, mirror['validator'])
+                    completed = True
+                    break
+                except Exception as e:
+                    conanfile.output.warning(f"Failed to download '{mirror['url']}' ({e})")
+
+        if not completed:
+            raise ConanException(f"Failed to download '{destination.name}' from any mirror ({', '.join(urls)})")
+
+        state_path.unlink(missing_ok = True)
+
+    # Verify the file
+    if sha256 is not None:
+        digest = sha256sum(part_path)
+        if digest.lower() != str(sha256).lower():
+            part_path.unlink(missing_ok = True)
+            raise ConanException(f"SHA256 mismatch of '{destination.name}' (expected: {sha256}, got: {digest})")
+
+    os.replace(part_path, destination)
+
+    return destination
+
+# ================================================================================================================================== #
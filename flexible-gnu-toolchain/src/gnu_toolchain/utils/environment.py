@@ -0,0 +1,230 @@
+# ====================================================================================================================================
+# @file       environment.py
+# @author     Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @maintainer Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @date       Monday, 19th October 2026 2:41:20 pm
+# @modified   Monday, 19th October 2026 2:41:20 pm by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# 
+# 
+# @copyright Krzysztof Pierczyk © 2026
+# ====================================================================================================================================
+
+# ============================================================= Imports ============================================================ #
+
+# System imports
+import contextlib
+import os
+import pathlib
+import shlex
+# Conan imports
+from conan.tools.microsoft import unix_path
+
+# =========================================================== Environment ========================================================== #
+
+class Environment:
+
+    """Immutable set of modifications of environment variables applied to subprocesses of a stage.
+
+    Modifications are never applied to the environment of the current process. Instead, they are
+    rendered into shell commands preceding the command run by the stage (see `StageConanfile`).
+    Each modifier returns a new object so environments may be safely shared between stages
+    running in parallel.
+    """
+
+    def __init__(self,
+        operations : tuple = ( ),
+    ):
+        self._operations = tuple(operations)
+
+    # ------------------------------------------------------------------ #
+
+    def define(self, name : str, value : str):
+        """Returns environment with `name` set to `value`"""
+        return Environment(self._operations + (( 'define', name, str(value), None ),))
+
+    def append(self, name : str, value : str, separator : str = ' '):
+        """Returns environment with `value` appended to the `name` variable"""
+        return Environment(self._operations + (( 'append', name, str(value), separator ),))
+
+    def prepend(self, name : str, value : str, separator : str = ' '):
+        """Returns environment with `value` prepended to the `name` variable"""
+        return Environment(self._operations + (( 'prepend', name, str(value), separator ),))
+
+    def prepend_path(self, name : str, path):
+        """Returns environment with `path` prepended to the PATH-like `name` variable"""
+        return Environment(self._operations + (( 'prepend_path', name, pathlib.Path(path).as_posix(), ':' ),))
+
+    def __or__(self, other):
+        """Returns environment applying modifications of `other` after modifications of `self`"""
+        return Environment(self._operations + tuple(other._operations))
+
+    # ------------------------------------------------------------------ #
+
+    def __iter__(self):
+        return iter(self._operations)
+
+    def __bool__(self):
+        return bool(self._operations)
+
+    def __eq__(self, other):
+        return isinstance(other, Environment) and (self._operations == other._operations)
+
+    def __hash__(self):
+        return hash(self._operations)
+
+    def __repr__(self):
+        return f'Environment({list(self._operations)!r})'
+
+    # ------------------------------------------------------------------ #
+
+    def to_shell(self,
+        conanfile = None,
+    ) -> str:
+        """Renders the environment into the sequence of shell `export` commands joined with '&&'
+        (an empty string if there are no modifications). If `conanfile` is given, paths are
+        converted to the format of its build subsystem (e.g. MSYS2 on Windows).
+        """
+
+        commands = [ ]
+
+        for operation, name, value, separator in self._operations:
+            match operation:
+                case 'define':
+                    commands.append(f'export {name}={shlex.quote(value)}')
+                case 'append':
+                    commands.append(f'export {name}="${{{name}}}"{shlex.quote(separator + value)}')
+                case 'prepend':
+                    commands.append(f'export {name}={shlex.quote(value + separator)}"${{{name}}}"')
+                case 'prepend_path':
+                    path = unix_path(conanfile, value) if (conanfile is not None) else value
+                    commands.append(f'export {name}={shlex.quote(path)}"${{{name}:+{separator}${name}}}"')
+
+        return ' && '.join(commands)
+
+    def to_dict(self,
+        base : dict | None = None,
+    ) -> dict:
+        """Returns copy of `base` (environment of the current process by default) with modifications
+        applied (to be passed to subprocesses started directly from Python)
+        """
+
+        result = dict(os.environ if (base is None) else base)
+
+        for operation, name, value, separator in self._operations:
+            match operation:
+                case 'define':
+                    result[name] = value
+                case 'append':
+                    result[name] = result.get(name, '') + separator + value
+                case 'prepend':
+                    result[name] = value + separator + result.get(name, '')
+                case 'prepend_path':
+                    result[name] = value + ((os.pathsep + result[name]) if result.get(name, '') else '')
+
+        return result
+
+# ========================================================= _JobserverConf ========================================================= #
+
+class _JobserverConf:
+
+    """Proxy of the Conan configuration reporting no explicit number of build jobs"""
+
+    def __init__(self, conf):
+        self._conf = conf
+
+    def __getattr__(self, name):
+        return getattr(self._conf, name)
+
+    def get(self, name, *args, **kwargs):
+        return 0 if (name == 'tools.build:jobs') else self._conf.get(name, *args, **kwargs)
+
+# ========================================================= StageConanfile ========================================================= #
+
+class StageConanfile:
+
+    """Proxy of the conanfile running commands in the environment and the working directory of
+    a stage. Passed to Conan helpers (e.g. `Autotools`) instead of the conanfile so that the stage
+    does not need to modify environment or working directory of the whole process. If `log` is
+    given, output of commands is captured into the log of the stage instead of the console. If
+    `jobserver` is set, commands (make) are run as clients of the jobserver. If `usage` (`CommandUsage`)
+    is given, resource usage of commands is accumulated in it.
+    """
+
+    def __init__(self,
+        conanfile,
+        environment : Environment,
+        cwd         : pathlib.Path,
+        log         = None,
+        usage       = None,
+    ):
+        self._conanfile   = conanfile
+        self._environment = environment
+        self._cwd         = pathlib.Path(cwd)
+        self._log         = log
+        self._usage       = usage
+
+        # Jobserver of make commands (if any)
+        self.jobserver = None
+
+    @property
+    def conf(self):
+        # Do not let Conan helpers pass -jN to make run by the jobserver (it would disable the jobserver)
+        return _JobserverConf(self._conanfile.conf) if (self.jobserver is not None) else self._conanfile.conf
+
+    def __getattr__(self, name):
+        return getattr(self._conanfile, name)
+
+    def run(self,
+        command,
+        stdout        = None,
+        cwd           = None,
+        ignore_errors = False,
+        env           = "",
+        quiet         = False,
+        shell         = True,
+        scope         = "build",
+        stderr        = None,
+    ):
+        # Collect environment scripts to be sourced (the same way Conan does by default)
+        if env == "":
+            env = "conanbuild" if (scope == "build") else "conanrun"
+        env = [ env ] if isinstance(env, str) else (env or [ ])
+
+        scripts = [ ]
+        for name in env:
+            path = pathlib.Path(name) if pathlib.Path(name).is_absolute() else pathlib.Path(self._conanfile.generators_folder or '.') / name
+            path = path if (path.suffix == '.sh') else path.with_name(f'{path.name}.sh')
+            if path.is_file():
+                scripts.append(f'. "{unix_path(self._conanfile, path.as_posix())}"')
+
+        environment = self._environment
+        # Connect the command to the jobserver
+        if self.jobserver is not None:
+            environment = environment.define('MAKEFLAGS', self.jobserver.makeflags)
+            command     = f'{command} {self.jobserver.redirection}'
+
+        # Apply stage's environment first so that Conan scripts may extend it
+        prefix = ' && '.join(filter(None, [ environment.to_shell(self._conanfile) ] + scripts))
+
+        def run(command, stdout, stderr, quiet):
+            return self._conanfile.run(f'{prefix} && {command}' if prefix else command,
+                stdout        = stdout,
+                cwd           = (cwd or self._cwd.as_posix()),
+                ignore_errors = ignore_errors,
+                env           = None,
+                quiet         = quiet,
+                shell         = shell,
+                scope         = scope,
+                stderr        = stderr,
+            )
+
+        # Measure resource usage of the command itself (the original command is logged)
+        with (self._usage.measure(command) if (self._usage is not None) else contextlib.nullcontext(command)) as measured:
+
+            # Capture output into the log of the stage (unless redirected by the caller)
+            if (self._log is not None) and (stdout is None) and (stderr is None):
+                return self._log.capture(command, lambda stream: run(measured, stream, stream, True))
+
+            return run(measured, stdout, stderr, quiet)
+
+# ================================================================================================================================== #
@@ -14,14 +14,276 @@
 # System imports
 import pathlib
 import contextlib
+import json
+import hashlib
 import os
+import re
 import tempfile
 import shutil
+import stat
+import tarfile
+import threading
+import subprocess
+import concurrent.futures
 # External imports
 import patch_ng
 # Conan imports
 from conan.errors import ConanException
-from conan.tools.files import download, ftp_download, unzip, copy
+from conan.tools.build import build_jobs
+from conan.tools.files import unzip, copy
+# Private imports
+from gnu_toolchain.utils.common import split_option
+from gnu_toolchain.utils.download import download_file
+from gnu_toolchain.utils.git import GitSource
+from gnu_toolchain.utils.manifest import hash_file
+from gnu_toolchain.utils.disk import format_size, get_tree_size
+
+# ============================================================= locked ============================================================= #
+
+@contextlib.contextmanager
+def locked(
+    path,
+):
+    """Context manager holding an exclusive, cross-process lock of the `path` file (created if needed).
+    Used to guard resources shared by concurrent builds (e.g. shared download directory).
+    """
+
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents = True, exist_ok = True)
+
+    with open(path, 'a+') as lock_file:
+
+        # Acquire the lock
+        if os.name == 'nt':
+            import msvcrt
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass
+        else:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+
+        try:
+            yield
+        finally:
+
+            # Release the lock
+            if os.name == 'nt':
+                import msvcrt
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+# =========================================================== extract_tar ========================================================== #
+
+def extract_tar(
+    archive,
+    destination,
+    trusted : bool = False,
+):
+    """Extracts the tar `archive` into the `destination` directory preserving links and permissions. Unless
+    the archive is `trusted` (created by the build itself), members placed (or links pointing) outside of the
+    `destination` are rejected.
+    """
+
+    destination = pathlib.Path(destination)
+
+    with tarfile.open(pathlib.Path(archive).as_posix(), 'r:*') as tar:
+
+        if trusted:
+            if hasattr(tarfile, 'fully_trusted_filter'):
+                tar.extractall(destination.as_posix(), filter = 'fully_trusted')
+            else:
+                tar.extractall(destination.as_posix())
+            return
+
+        if hasattr(tarfile, 'data_filter'):
+            try:
+                tar.extractall(destination.as_posix(), filter = 'data')
+            except tarfile.FilterError as e:
+                raise ConanException(f"Unsafe member in the archive '{pathlib.Path(archive).as_posix()}' ({e})")
+            return
+
+        # Check members manually on interpreters not supporting extraction filters
+        root = os.path.realpath(destination)
+        for member in tar.getmembers():
+            paths = [ member.name ]
+            if member.issym():
+                paths.append(os.path.join(os.path.dirname(member.name), member.linkname))
+            elif member.islnk():
+                paths.append(member.linkname)
+            for path in paths:
+                if os.path.isabs(path) or not is_within(root, os.path.realpath(os.path.join(root, path))):
+                    raise ConanException(f"Unsafe path '{path}' in the archive '{pathlib.Path(archive).as_posix()}'")
+        tar.extractall(destination.as_posix())
+
+def is_within(
+    root : pathlib.Path,
+    path : pathlib.Path,
+) -> bool:
+    """Checks whether the `path` (resolved) is the `root` directory (resolved) or lies inside of it"""
+    return os.path.commonpath([ os.path.realpath(root), os.path.realpath(path) ]) == os.path.realpath(root)
+
+# ========================================================= extract_archive ======================================================== #
+
+def extract_archive(
+    archive,
+    destination,
+    threads    : int | None  = None,
+    large_file : int         = 64 * 1024 * 1024,
+    include    : list | None = None,
+    exclude    : list | None = None,
+):
+    """Extracts the tar `archive` into the `destination` directory in a streamed manner. If available, archive
+    is decompressed by the parallel external decompressor (pigz, xz, zstd). Members are read sequentially
+    from the stream while their contents are written by the pool of `threads` workers. Files larger than
+    `large_file` are written directly by the reading thread. Links are created after all files are in place.
+    If given, only members matching `include` glob patterns (or placed in matching directories) are extracted
+    and members matching `exclude` patterns are skipped (contents of skipped members are never written).
+    """
+
+    archive     = pathlib.Path(archive)
+    destination = pathlib.Path(destination)
+    threads     = threads or os.cpu_count() or 1
+
+    def compile_patterns(patterns):
+        if not patterns:
+            return None
+        return re.compile('(?:' + '|'.join(_glob_to_regex(pattern) for pattern in patterns) + ')(?:/.*)?')
+
+    # Compile filters of members (matching the path or any of its parents)
+    include = compile_patterns(include)
+    exclude = compile_patterns(exclude)
+
+    # Pick parallel decompressor
+    decompressors = {
+        ('.tar.gz',  '.tgz')  : [ 'pigz', '-dc', '-p', str(threads) ],
+        ('.tar.xz',  '.txz')  : [ 'xz',   '-dc', f'-T{threads}' ],
+        ('.tar.zst', '.tzst') : [ 'zstd', '-dc', f'-T{threads}' ],
+    }
+    command = next((
+        command for suffixes, command in decompressors.items()
+            if archive.name.endswith(suffixes) and (shutil.which(command[0]) is not None)
+    ), None)
+
+    def resolve(name):
+        path = pathlib.PurePosixPath(name)
+        if path.is_absolute() or ('..' in path.parts):
+            raise ConanException(f"Unsafe path '{name}' in the archive '{archive.as_posix()}'")
+        return destination / path
+
+    def write(path, data, member):
+        try:
+            path.write_bytes(data)
+            os.chmod(path, member.mode)
+            os.utime(path, (member.mtime, member.mtime))
+        finally:
+            pending.release()
+
+    # Number of files being written at once (bounds memory used by buffered contents)
+    pending = threading.BoundedSemaphore(4 * threads)
+
+    directories = [ ]
+    links       = [ ]
+
+    # Open the stream
+    if command is not None:
+        process = subprocess.Popen(command + [ archive.as_posix() ], stdout = subprocess.PIPE)
+        stream  = process.stdout
+    else:
+        process = None
+        stream  = open(archive, 'rb')
+
+    try:
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers = threads) as executor, \
+             tarfile.open(fileobj = stream, mode = 'r|' if (command is not None) else 'r|*') as tar:
+
+            futures = [ ]
+            for member in tar:
+
+                # Skip filtered members
+                name = pathlib.PurePosixPath(member.name).as_posix()
+                if (include is not None) and (not include.fullmatch(name)):
+                    continue
+                if (exclude is not None) and exclude.fullmatch(name):
+                    continue
+
+                path = resolve(member.name)
+
+                if member.isdir():
+                    path.mkdir(parents = True, exist_ok = True)
+                    directories.append((path, member))
+                elif member.issym() or member.islnk():
+                    links.append((path, member))
+                elif member.isfile():
+
+                    path.parent.mkdir(parents = True, exist_ok = True)
+                    source = tar.extractfile(member)
+
+                    # Write large files directly from the stream
+                    if member.size > large_file:
+                        with open(path, 'wb') as file:
+                            shutil.copyfileobj(source, file, 1024 * 1024)
+                        os.chmod(path, member.mode)
+                        os.utime(path, (member.mtime, member.mtime))
+                    # Pass smaller files to workers
+                    else:
+                        pending.acquire()
+                        futures.append(executor.submit(write, path, source.read(), member))
+
+            for future in futures:
+                future.result()
+
+    # Keep the original error (closing the stream makes the decompressor fail as well)
+    except BaseException:
+        stream.close()
+        if process is not None:
+            process.kill()
+            process.wait()
+        raise
+
+    stream.close()
+    if (process is not None) and (process.wait() != 0):
+        raise ConanException(f"Failed to decompress '{archive.as_posix()}' ({command[0]} returned {process.returncode})")
+
+    # Create links
+    for path, member in links:
+        path.parent.mkdir(parents = True, exist_ok = True)
+        if path.exists() or path.is_symlink():
+            path.unlink()
+        if member.issym():
+            path.symlink_to(member.linkname)
+        else:
+            try:
+                os.link(resolve(member.linkname), path)
+            except OSError:
+                shutil.copy2(resolve(member.linkname), path)
+
+    # Apply attributes of directories (deepest first so that parents' mtimes are not updated afterwards)
+    for path, member in reversed(directories):
+        os.chmod(path, member.mode | 0o700)
+        os.utime(path, (member.mtime, member.mtime))
+
+# ========================================================= get_patches_dir ======================================================== #
+
+def get_patches_dir(
+    conanfile,
+    component_name,
+    version,
+):
+    """Returns path to the directory holding patches of the given component"""
+
+    return pathlib.Path(conanfile.recipe_folder) / \
+        'patches' /                                 \
+            str(conanfile.settings.os).lower() /    \
+                component_name /                    \
+                    version
 
 # =============================================================== get ============================================================== #
 
@@ -31,15 +293,59 @@ def get(
     component_name,
     version,
     destination,
+    download_dir,
+    exclude = None,
     **kwargs,
 ):
     """
     Custom reimplementation of the `conan.tools.files.get` function that avoids
     redownloading/reunzipping sources if they are already present in the Conan.
+    Archives are downloaded into the `download_dir` directory. The function does not
+    change the working directory so it may be called by stages running in parallel.
+    The `url` may be a list of mirrors of the archive (or a string holding comma- or
+    space-separated mirrors). The archive is downloaded from the fastest of available
+    mirrors, with parallel range requests spread over all of them (see `download_file`).
+    Git URLs (`git+<remote>@<revision>`) are checked out from the shared reference
+    repository instead (see `GitSource`). Source subtrees matching `exclude` glob
+    patterns (relative to the source root) are not extracted from tar archives. As
+    sources are shared by stages of the component, subtrees excluded by previous
+    stages but required by the current one are extracted on demand.
     """
 
+    # Parse list of mirrors
+    urls = list(url) if isinstance(url, (list, tuple)) else split_option(url, ', ')
+    if not urls:
+        raise ConanException("No URL of the archive given")
+
+    # Check out git sources
+    if GitSource.is_git_url(urls[0]):
+
+        source = GitSource.from_conanfile(conanfile, urls[0], download_dir)
+
+        # Reference repository may be shared by concurrent builds and sources by parallel stages
+        with locked(source.reference.with_name(f'{source.reference.name}.lock')):
+
+            commit = source.fetch()
+
+            # Skip the checkout if the commit is already checked out and patched with the same patches
+            # (sources may be in use by parallel stages)
+            tag_file = pathlib.Path(destination) / source.worktree_name / '.downloaded'
+            state    = { 'commit' : commit, 'patches' : _get_patches_digests(conanfile, component_name, version) }
+            try:
+                if json.loads(tag_file.read_text()) == state:
+                    conanfile.output.info(f"'{source.worktree_name}' already checked out. Skipping...")
+                    return tag_file.parent
+            except (OSError, ValueError):
+                pass
+
+            src_dir = source.checkout(destination, commit)
+            _apply_patches(conanfile, component_name, version, src_dir)
+            tag_file.write_text(json.dumps(state))
+
+        return src_dir
+
     # Deduce file name from the url
-    url_base = url[0] if isinstance(url, (list, tuple)) else url
+    url_base = urls[0]
     if "?" in url_base or "=" in url_base:
         raise ConanException("Cannot deduce file name from the url: '{}'. Use 'filename' parameter.".format(url_base))
     filename = os.path.basename(url_base)
@@ -52,47 +358,95 @@ def get(
     # Compute src directory
     src_dir = pathlib.Path(destination) / src_dir_name
 
-    # Download the file, if not already downloaded
-    if not pathlib.Path(filename).exists():
-        conanfile.output.info(f"Dowloading '{filename}' from '{url}' into '{src_dir.as_posix()}'...")
-        if url.startswith("ftp://"):
-            host, ftp_filename = url.removeprefix("ftp://").split("/", 1)
-            ftp_download(conanfile, host, filename=ftp_filename)
+    # Compute path to the archive
+    archive = pathlib.Path(download_dir) / filename
+
+    # Download directory may be shared by concurrent builds and sources by parallel stages
+    with locked(f'{archive.as_posix()}.lock'):
+
+        # Download the file, if not already downloaded
+        if not archive.exists():
+            conanfile.output.info(f"Dowloading '{filename}' from '{', '.join(urls)}' into '{src_dir.as_posix()}'...")
+            download_file(conanfile,
+                url         = urls,
+                destination = archive,
+                threads     = build_jobs(conanfile),
+            )
         else:
-            download(conanfile, url, filename=filename)
-    else:
-        conanfile.output.info(f"'{filename}' already downloaded. Skipping...")
+            conanfile.output.info(f"'{filename}' already downloaded. Skipping...")
 
-    # Unzip the file, if not already unzipped
-    tag_file = src_dir / '.downloaded'
-    if not tag_file.exists():
-        unzip(conanfile, filename, destination=destination, **kwargs)
-        tag_file.touch()
-    else:
-        conanfile.output.info(f"'{filename}' already unzipped. Skipping...")
+        # Patterns of excluded subtrees (tag file lists subtrees excluded so far)
+        tag_file = src_dir / '.downloaded'
+        excluded = set(exclude or [ ])
+        is_tar   = filename.endswith(('.tar.gz', '.tgz', '.tar.xz', '.txz', '.tar.bz2', '.tar.zst', '.tar'))
+
+        # Unzip the file, if not already unzipped
+        if not tag_file.exists():
+            if is_tar:
+                extract_archive(archive, destination,
+                    threads = build_jobs(conanfile),
+                    exclude = [ f'{src_dir_name}/{pattern}' for pattern in excluded ],
+                )
+            else:
+                unzip(conanfile, archive.as_posix(), destination=destination, **kwargs)
+                excluded = set()
+            if excluded:
+                conanfile.output.info(f"Skipped {', '.join(sorted(excluded))} while extracting '{filename}'")
+            tag_file.write_text(json.dumps(sorted(excluded)))
+        else:
+
+            # Extract subtrees required by this stage but excluded by previous ones
+            previous = set(json.loads(tag_file.read_text() or '[]'))
+            missing  = previous - excluded
+            if missing:
+                conanfile.output.info(f"Extracting {', '.join(sorted(missing))} from '{filename}'...")
+                extract_archive(archive, destination,
+                    threads = build_jobs(conanfile),
+                    include = [ f'{src_dir_name}/{pattern}' for pattern in missing ],
+                )
+                tag_file.write_text(json.dumps(sorted(previous & excluded)))
+            else:
+                conanfile.output.info(f"'{filename}' already unzipped. Skipping...")
+
+        # Apply patches of the component
+        _apply_patches(conanfile, component_name, version, src_dir)
+
+    return src_dir
+
+def _get_patches_digests(
+    conanfile,
+    component_name,
+    version,
+) -> dict:
+    """Returns { name : SHA256 digest } dictionary of patches of the given component"""
 
+    patches_dir = get_patches_dir(conanfile, component_name, version)
+    if not patches_dir.exists():
+        return { }
+
+    return { patch.name : hashlib.sha256(patch.read_bytes()).hexdigest() for patch in sorted(patches_dir.iterdir()) }
+
+def _apply_patches(
+    conanfile,
+    component_name,
+    version,
+    src_dir,
+):
     # Compute path to the patches dir of the given component
-    patches_dir = pathlib.Path(conanfile.recipe_folder) / \
-        'patches' /                                       \
-            str(conanfile.settings.os).lower() /          \
-                component_name /                          \
-                    version
+    patches_dir = get_patches_dir(conanfile, component_name, version)
     
     # If set of patchfiles for the 
     if not patches_dir.exists():
         conanfile.output.info(f"No patches found in '{patches_dir.as_posix()}'. Skipping...")
     else:
         conanfile.output.info(f"Patches directory for {component_name}/{version} found. Looking for patches...")
-        with contextlib.chdir(src_dir):
-            for patch in patches_dir.iterdir():
-                conanfile.output.info(f"Applying patch '{(patches_dir / patch).as_posix()}'...")
-                patchset = patch_ng.fromfile(patch.as_posix())
-                if not patchset:
-                    raise ConanException(f"Failed to parse patch '{patch.name}'")
-                if not patchset.apply():
-                    raise ConanException(f"Failed to apply patch '{patch.name}'")
-
-    return src_dir
+        for patch in patches_dir.iterdir():
+            conanfile.output.info(f"Applying patch '{(patches_dir / patch).as_posix()}'...")
+            patchset = patch_ng.fromfile(patch.as_posix())
+            if not patchset:
+                raise ConanException(f"Failed to parse patch '{patch.name}'")
+            if not patchset.apply(root = src_dir.as_posix()):
+                raise ConanException(f"Failed to apply patch '{patch.name}'")
 
 # ======================================================== copy_with_rename ======================================================== #
 
@@ -160,4 +514,420 @@ def copy_with_rename(
 
     return copied_files
 
+# ============================================================ sync_tree =========================================================== #
+
+def _scan_tree(
+    root : pathlib.Path,
+) -> tuple:
+    """Returns ({ path : stat } of files and symbolic links, set of directories) of the `root` tree (paths are relative)"""
+
+    files       = { }
+    directories = set()
+
+    pending = [ pathlib.Path(root) ] if pathlib.Path(root).is_dir() else [ ]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                relative = pathlib.Path(entry.path).relative_to(root).as_posix()
+                if entry.is_dir(follow_symlinks = False):
+                    directories.add(relative)
+                    pending.append(entry.path)
+                else:
+                    files[relative] = entry.stat(follow_symlinks = False)
+
+    return (files, directories)
+
+def sync_tree(
+    conanfile,
+    src     : pathlib.Path,
+    dst     : pathlib.Path,
+    digests : dict | None = None,
+) -> dict:
+
+    """Makes the `dst` tree a copy of the `src` tree copying only files that changed since the previous sync.
+    Files of the same size and modification time are considered unchanged. Files differing only in the
+    modification time are compared by SHA-256 digests (`digests` may provide known { relative path : digest }
+    of `src` files, e.g. from install manifests). Files and directories missing in `src` are removed from `dst`.
+    Files of `dst` are never modified in place (changed files and attributes are replaced with new files), so
+    `dst` files may be shared (hardlinked) with other trees. Returns statistics of the sync.
+    """
+
+    src, dst = pathlib.Path(src), pathlib.Path(dst)
+    digests  = digests or { }
+
+    stats = { 'copied' : 0, 'copied_size' : 0, 'skipped' : 0, 'skipped_size' : 0, 'removed' : 0 }
+
+    src_files, src_dirs = _scan_tree(src)
+    dst_files, dst_dirs = _scan_tree(dst)
+    dst.mkdir(parents = True, exist_ok = True)
+
+    # Remove files that disappeared (or changed their type)
+    for relative, info in list(dst_files.items()):
+        source = src_files.get(relative)
+        if (source is None) or (stat.S_ISLNK(source.st_mode) != stat.S_ISLNK(info.st_mode)):
+            (dst / relative).unlink()
+            del dst_files[relative]
+            stats['removed'] += 1
+    for relative in sorted(dst_dirs - src_dirs, key = len, reverse = True):
+        if (dst / relative).is_dir():
+            shutil.rmtree((dst / relative).as_posix())
+            stats['removed'] += 1
+    # Directories replaced with files
+    for relative in sorted(src_dirs, key = len):
+        if (dst / relative).is_symlink() or (dst / relative).is_file():
+            (dst / relative).unlink()
+        (dst / relative).mkdir(parents = True, exist_ok = True)
+
+    # Find files that need to be compared by contents
+    candidates = [ ]
+    for relative, info in src_files.items():
+        known = dst_files.get(relative)
+        if (known is None) or stat.S_ISLNK(info.st_mode) or (known.st_size != info.st_size):
+            continue
+        if known.st_mtime_ns != info.st_mtime_ns:
+            candidates.append(relative)
+    def compare(relative):
+        src_digest = digests.get(relative) or hash_file(src / relative)
+        return src_digest == hash_file(dst / relative)
+    with concurrent.futures.ThreadPoolExecutor(max_workers = os.cpu_count() or 1) as executor:
+        identical = { relative for relative, same in zip(candidates, executor.map(compare, candidates)) if same }
+
+    # Copy changed files
+    for relative, info in src_files.items():
+
+        source = src / relative
+        target = dst / relative
+        known  = dst_files.get(relative)
+
+        # Symbolic links
+        if stat.S_ISLNK(info.st_mode):
+            if (known is not None) and (os.readlink(target) == os.readlink(source)):
+                stats['skipped'] += 1
+                continue
+            target.unlink(missing_ok = True)
+            target.symlink_to(os.readlink(source))
+            stats['copied'] += 1
+            continue
+
+        # Unchanged files
+        if (known is not None) and (known.st_size == info.st_size) and (known.st_mtime_ns == info.st_mtime_ns):
+            stats['skipped']      += 1
+            stats['skipped_size'] += info.st_size
+            continue
+
+        # Files under the temporary name are put in place at once (the destination is never left truncated)
+        tmp_path = target.with_name(f'.{target.name}.tmp')
+
+        # Keep the modification time of identical files in sync so that they are not hashed again (the file
+        # is replaced with its clone or copy, as it may be shared with other trees)
+        if (relative in identical) and reflink(target, tmp_path):
+            shutil.copystat(source, tmp_path)
+            os.replace(tmp_path, target)
+            stats['skipped']      += 1
+            stats['skipped_size'] += info.st_size
+            continue
+
+        shutil.copy2(source, tmp_path)
+        os.replace(tmp_path, target)
+        stats['copied']      += 1
+        stats['copied_size'] += info.st_size
+
+    conanfile.output.info(
+        f"Synced '{src.as_posix()}' to '{dst.as_posix()}': "
+        f"{stats['copied']} files copied ({format_size(stats['copied_size'])}), "
+        f"{stats['skipped']} skipped ({format_size(stats['skipped_size'])}), "
+        f"{stats['removed']} removed"
+    )
+
+    return stats
+
+# ============================================================ clone_tree ========================================================== #
+
+# ioctl request cloning a file (Linux, btrfs/XFS/bcachefs)
+_FICLONE = 0x40049409
+
+def reflink(
+    src : pathlib.Path,
+    dst : pathlib.Path,
+) -> bool:
+    """Tries to create `dst` as a copy-on-write clone of `src` (returns False if not supported)"""
+
+    try:
+        import fcntl
+    except ImportError:
+        return False
+
+    try:
+        with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+            fcntl.ioctl(dst_file.fileno(), _FICLONE, src_file.fileno())
+    except OSError:
+        pathlib.Path(dst).unlink(missing_ok = True)
+        return False
+
+    shutil.copystat(src, dst, follow_symlinks = False)
+    return True
+
+def _copy_range(
+    src : pathlib.Path,
+    dst : pathlib.Path,
+) -> bool:
+    """Copies `src` into `dst` in the kernel with copy_file_range() (clones extents on NFS/CIFS/XFS; returns False if not supported)"""
+
+    if not hasattr(os, 'copy_file_range'):
+        return False
+
+    try:
+        with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+            remaining = os.fstat(src_file.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(src_file.fileno(), dst_file.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+            if remaining > 0:
+                raise OSError('Source file shrunk while being copied')
+    except OSError:
+        pathlib.Path(dst).unlink(missing_ok = True)
+        return False
+
+    shutil.copystat(src, dst, follow_symlinks = False)
+    return True
+
+def _hardlink(
+    src : pathlib.Path,
+    dst : pathlib.Path,
+) -> bool:
+    os.link(src, dst, follow_symlinks = False)
+    return True
+
+def clone_tree(
+    conanfile,
+    src  : pathlib.Path,
+    dst  : pathlib.Path,
+    mode : str = 'clone',
+) -> dict:
+
+    """Makes the `dst` tree a copy of the `src` tree using the cheapest mechanism available:
+
+        - 'move'  : renames `src` into `dst` (`src` is consumed; falls back to 'link' if both are not
+                    on the same filesystem or `dst` is not empty)
+        - 'link'  : clones files with reflinks, falling back to hardlinks (files are shared with `src`,
+                    which must not be modified afterwards) and to copies
+        - 'clone' : clones files with reflinks, falling back to in-kernel copies (copy_file_range) and to
+                    regular copies
+
+    Files are cloned in parallel (directories and symbolic links are recreated first). Files existing
+    in `dst` are replaced. Returns statistics of the operation.
+    """
+
+    src, dst = pathlib.Path(src), pathlib.Path(dst)
+
+    stats = { 'moved' : 0, 'reflinked' : 0, 'linked' : 0, 'copied' : 0, 'copied_size' : 0 }
+
+    # Move the whole tree at once
+    if mode == 'move':
+
+        # Only empty destination can be replaced
+        if dst.is_dir() and not any(dst.iterdir()):
+            dst.rmdir()
+
+        try:
+            os.rename(src, dst)
+        except OSError as e:
+            dst.mkdir(parents = True, exist_ok = True)
+            conanfile.output.warning(f"Could not move '{src.as_posix()}' to '{dst.as_posix()}' ({e.strerror}), linking files instead")
+            mode = 'link'
+        else:
+            stats['moved'] = 1
+            conanfile.output.info(f"Moved '{src.as_posix()}' to '{dst.as_posix()}'")
+            return stats
+
+    src_files, src_dirs = _scan_tree(src)
+
+    # Recreate directories and symbolic links
+    for relative in sorted(src_dirs, key = len):
+        if (dst / relative).is_symlink() or (dst / relative).is_file():
+            (dst / relative).unlink()
+        (dst / relative).mkdir(parents = True, exist_ok = True)
+    files = [ ]
+    for relative, info in src_files.items():
+        (dst / relative).unlink(missing_ok = True)
+        if stat.S_ISLNK(info.st_mode):
+            (dst / relative).symlink_to(os.readlink(src / relative))
+        else:
+            files.append((relative, info))
+
+    # Stop trying mechanisms that are not supported by the filesystem(s)
+    supported = { 'reflink' : None, 'link' : None, 'copy_range' : None }
+    lock      = threading.Lock()
+
+    def try_method(name, method, source, target):
+        if supported[name] is False:
+            return False
+        try:
+            result = method(source, target)
+        except OSError:
+            result = False
+        if supported[name] is None:
+            with lock:
+                supported[name] = result
+        return result
+
+    def clone(item):
+
+        relative, info = item
+
+        source = src / relative
+        target = dst / relative
+
+        if try_method('reflink', reflink, source, target):
+            return 'reflinked'
+        if (mode == 'link') and try_method('link', _hardlink, source, target):
+            return 'linked'
+        if (mode != 'link') and try_method('copy_range', _copy_range, source, target):
+            return 'copied'
+
+        shutil.copy2(source, target, follow_symlinks = False)
+        return 'copied'
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers = build_jobs(conanfile) or os.cpu_count() or 1) as executor:
+        for (relative, info), method in zip(files, executor.map(clone, files)):
+            stats[method] += 1
+            if method == 'copied':
+                stats['copied_size'] += info.st_size
+
+    conanfile.output.info(
+        f"Cloned '{src.as_posix()}' to '{dst.as_posix()}': "
+        f"{stats['reflinked']} files reflinked, "
+        f"{stats['linked']} hardlinked, "
+        f"{stats['copied']} copied ({format_size(stats['copied_size'])})"
+    )
+
+    return stats
+
+# ========================================================= remove_matching ======================================================== #
+
+def _glob_to_regex(
+    pattern : str,
+) -> str:
+    """Translates the glob `pattern` (relative path with `*`, `?`, `[...]` and `**` matching any number of directories) into a regex"""
+
+    def translate(segment):
+        result, index = '', 0
+        while index < len(segment):
+            char = segment[index]
+            if char == '*':
+                result += '[^/]*'
+            elif char == '?':
+                result += '[^/]'
+            elif (char == '[') and (']' in segment[index + 2:]):
+                end     = segment.index(']', index + 2)
+                content = segment[index + 1:end]
+                result += '[' + ('^' + content[1:] if content.startswith('!') else content) + ']'
+                index   = end
+            else:
+                result += re.escape(char)
+            index += 1
+        return result
+
+    segments = pathlib.PurePosixPath(pattern).as_posix().strip('/').split('/')
+
+    regex = ''
+    for index, segment in enumerate(segments):
+        last = (index == len(segments) - 1)
+        if segment == '**':
+            regex += '.*' if last else '(?:[^/]+/)*'
+        else:
+            regex += translate(segment) + ('' if last else '/')
+
+    return regex
+
+def _remove_tree_except(
+    path     : str,
+    relative : str,
+    keep     : set,
+) -> int:
+    """Removes content of the `path` directory (`relative` to the root) except for `keep` paths, removing directories
+    left empty (including the `path`). Returns number of removed bytes.
+    """
+
+    size = 0
+    for directory, dirs, names in os.walk(path, topdown = False):
+        prefix = pathlib.Path(directory).relative_to(path).as_posix()
+        # Symbolic links to directories are listed as directories (and never followed)
+        for name in names + [ name for name in dirs if os.path.islink(os.path.join(directory, name)) ]:
+            if pathlib.PurePosixPath(relative, prefix, name).as_posix() not in keep:
+                size += os.lstat(os.path.join(directory, name)).st_size
+                os.unlink(os.path.join(directory, name))
+        if not os.listdir(directory):
+            os.rmdir(directory)
+
+    return size
+
+def remove_matching(
+    root     : pathlib.Path,
+    patterns : list,
+    keep     : set | None = None,
+) -> dict:
+
+    """Removes files, symbolic links and directories of the `root` tree matching any of glob `patterns`
+    (paths relative to the `root`, `**` matches any number of directories). All patterns are matched during
+    a single walk of the tree that descends only into directories that may contain matches (symbolic links are
+    never followed). Files and symbolic links listed in `keep` (paths relative to the `root`) are preserved
+    along with directories holding them, even if they match. Returns { pattern : { 'count' : removed entries,
+    'size' : removed bytes } } dictionary.
+    """
+
+    root     = pathlib.Path(root)
+    compiled = [ (pattern, re.compile(_glob_to_regex(str(pattern)))) for pattern in patterns ]
+    result   = { str(pattern) : { 'count' : 0, 'size' : 0 } for pattern in patterns }
+
+    # Directories holding preserved entries
+    keep      = set(keep or [ ])
+    kept_dirs = { parent.as_posix() for path in keep for parent in pathlib.PurePosixPath(path).parents }
+
+    # Literal parts of patterns (preceding the first wildcard) used to prune the walk
+    prefixes = [ ]
+    for pattern in patterns:
+        literal = [ ]
+        for segment in pathlib.PurePosixPath(str(pattern)).as_posix().strip('/').split('/'):
+            if any(char in segment for char in '*?['):
+                break
+            literal.append(segment)
+        prefixes.append('/'.join(literal))
+
+    def may_contain(relative):
+        return any((prefix == '') or (prefix + '/').startswith(relative + '/') or relative.startswith(prefix + '/') for prefix in prefixes)
+
+    pending = [ root ] if root.is_dir() else [ ]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            entries = list(entries)
+        for entry in entries:
+
+            relative = pathlib.Path(entry.path).relative_to(root).as_posix()
+            is_dir   = entry.is_dir(follow_symlinks = False)
+
+            match = next((pattern for pattern, regex in compiled if regex.fullmatch(relative)), None)
+            if match is None:
+                if is_dir and may_contain(relative):
+                    pending.append(entry.path)
+                continue
+
+            if relative in keep:
+                continue
+            if is_dir and (relative in kept_dirs):
+                size = _remove_tree_except(entry.path, relative, keep)
+            elif is_dir:
+                size = get_tree_size(entry.path)
+                shutil.rmtree(entry.path)
+            else:
+                size = entry.stat(follow_symlinks = False).st_size
+                os.unlink(entry.path)
+
+            result[str(match)]['count'] += 1
+            result[str(match)]['size']  += size
+
+    return result
+
 # ================================================================================================================================== #
@@ -0,0 +1,204 @@
+# ====================================================================================================================================
+# @file       git.py
+# @author     Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @maintainer Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @date       Monday, 19th October 2026 8:02:14 pm
+# @modified   Monday, 19th October 2026 8:02:14 pm by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# 
+# 
+# @copyright Krzysztof Pierczyk © 2026
+# ====================================================================================================================================
+
+# ============================================================= Imports ============================================================ #
+
+# System imports
+import pathlib
+import re
+import shutil
+import subprocess
+# Conan imports
+from conan.errors import ConanException
+
+# ============================================================ GitSource =========================================================== #
+
+class GitSource:
+
+    """Sources checked out from the git repository. URLs take form of `git+<remote>@<revision>` (e.g.
+    `git+https://gcc.gnu.org/git/gcc.git@releases/gcc-14.2.0`) where revision is a commit, a tag or a branch.
+    All checkouts of the remote share a single bare reference repository (`<reference_dir>/<name>.git`)
+    which is filled with shallow, blobless fetches of the requested revisions only. Sources are checked out
+    with `git worktree` so that switching revisions costs fetching objects that differ between them.
+    """
+
+    prefix = 'git+'
+
+    # Commits the revisions have been resolved to by this process ({ (reference, revision) : commit })
+    _resolved = { }
+
+    def __init__(self,
+        conanfile,
+        url           : str,
+        reference_dir : pathlib.Path,
+    ):
+        self.conanfile = conanfile
+
+        # Parse the URL (the revision follows the last '@' of the path part)
+        self.remote, separator, self.revision = url.removeprefix(self.prefix).rpartition('@')
+        if (not separator) or ('/' not in self.remote) or (not self.revision):
+            raise ConanException(f"Invalid git URL '{url}' (expected 'git+<remote>@<revision>')")
+
+        self.name      = self.remote.rstrip('/').rsplit('/', 1)[-1].removesuffix('.git')
+        self.reference = pathlib.Path(reference_dir) / f'{self.name}-{self._sanitize(self.remote)}.git'
+
+    @staticmethod
+    def is_git_url(
+        url : str,
+    ) -> bool:
+        return str(url).startswith(GitSource.prefix)
+
+    @staticmethod
+    def from_conanfile(
+        conanfile,
+        url          : str,
+        download_dir : pathlib.Path,
+    ):
+        """Creates the source using the reference directory of the build (`git_reference_dir` option,
+        `<download_dir>/git` by default)
+        """
+
+        reference_dir = conanfile.options.get_safe('git_reference_dir')
+        reference_dir = pathlib.Path(str(reference_dir)).expanduser() if (str(reference_dir) != 'None') else (pathlib.Path(download_dir) / 'git')
+
+        return GitSource(conanfile, url, reference_dir)
+
+    @staticmethod
+    def _sanitize(
+        name : str,
+    ) -> str:
+        return re.sub(r'[^A-Za-z0-9._-]+', '_', name).strip('_')
+
+    @property
+    def worktree_name(self) -> str:
+        """Name of the directory holding sources of the revision"""
+        return f'{self.name}-{self._sanitize(self.revision)}'
+
+    # ------------------------------------------------------------------ #
+
+    def _git(self,
+        *args,
+        cwd = None,
+    ) -> str:
+
+        if shutil.which('git') is None:
+            raise ConanException("Git sources require the 'git' executable to be available in PATH")
+
+        result = subprocess.run([ 'git', *args ],
+            cwd    = cwd,
+            stdout = subprocess.PIPE,
+            stderr = subprocess.PIPE,
+        )
+        if result.returncode != 0:
+            raise ConanException(f"'git {' '.join(args)}' failed:\n{result.stderr.decode(errors = 'replace').strip()}")
+
+        return result.stdout.decode().strip()
+
+    def _resolve(self,
+        name : str,
+    ) -> str | None:
+
+        """Returns the commit pointed by the `name` in the reference repository (None if not present). Only
+        names of refs should be resolved as looking up missing objects triggers lazy fetches in partial clones.
+        """
+
+        try:
+            return self._git('-C', self.reference.as_posix(), 'rev-parse', '--verify', '--quiet', f'{name}^{{commit}}')
+        except ConanException:
+            return None
+
+    def fetched(self) -> str | None:
+        """Returns the commit the revision has been resolved to by this process or pinned to by previous fetches
+        (None if the revision has never been fetched). Nothing is fetched.
+        """
+
+        commit = self._resolved.get((self.reference, self.revision))
+        if (commit is None) and (self.reference / 'HEAD').exists():
+            commit = self._resolve(f'refs/pinned/{self._sanitize(self.revision)}')
+
+        return commit
+
+    def fetch(self) -> str:
+
+        """Fetches the revision into the reference repository (unless already present). Returns the commit.
+        Names of branches and tags are resolved once per process so that all stages of the build (and their
+        keys in the stage cache) use the same commit. Callers are expected to hold the lock of the reference
+        repository.
+        """
+
+        # Use the commit the revision has been already resolved to
+        commit = self._resolved.get((self.reference, self.revision))
+        if commit is not None:
+            return commit
+
+        # Initialize the reference repository
+        if not (self.reference / 'HEAD').exists():
+            self.conanfile.output.info(f"Initializing reference repository of '{self.remote}' in '{self.reference.as_posix()}'...")
+            self.reference.mkdir(parents = True, exist_ok = True)
+            self._git('init', '--bare', '--quiet', self.reference.as_posix())
+            self._git('-C', self.reference.as_posix(), 'remote', 'add', 'origin', self.remote)
+
+        # Skip fetching if the revision is a commit already fetched (names of branches and tags may move)
+        pin    = f'refs/pinned/{self._sanitize(self.revision)}'
+        commit = self._resolve(pin)
+        if (commit is not None) and commit.startswith(self.revision.lower()):
+            return commit
+
+        self.conanfile.output.info(f"Fetching '{self.revision}' from '{self.remote}'...")
+
+        # Fetch only the revision (without history and blobs, which makes the remote a promisor of missing blobs
+        # fetched on checkout); servers that do not allow fetching commits by their hash are asked for all refs
+        # instead. Previously fetched commit is used if the remote is not available.
+        try:
+            self._git('-C', self.reference.as_posix(), 'fetch', '--quiet', '--depth=1', '--filter=blob:none', 'origin', self.revision)
+            commit = self._git('-C', self.reference.as_posix(), 'rev-parse', 'FETCH_HEAD^{commit}')
+        except ConanException:
+            if commit is None:
+                self._git('-C', self.reference.as_posix(), 'fetch', '--quiet', '--filter=blob:none', 'origin', '+refs/heads/*:refs/heads/*', '+refs/tags/*:refs/tags/*')
+                commit = self._resolve(self.revision)
+            if commit is None:
+                raise ConanException(f"Revision '{self.revision}' not found in '{self.remote}'")
+
+        # Pin the revision (protects the commit from being garbage-collected and remembers where names pointed)
+        self._git('-C', self.reference.as_posix(), 'update-ref', pin, commit)
+        self._resolved[(self.reference, self.revision)] = commit
+
+        return commit
+
+    def checkout(self,
+        destination : pathlib.Path,
+        commit      : str,
+    ) -> pathlib.Path:
+
+        """Checks out the `commit` into the `<destination>/<worktree_name>` worktree. Returns path to the worktree.
+        Callers are expected to hold the lock of the reference repository.
+        """
+
+        worktree = pathlib.Path(destination) / self.worktree_name
+
+        # Reuse the existing worktree (untracked files are removed and forced checkout reverts modified ones,
+        # i.e. previously applied patches are reverted as a whole)
+        if (worktree / '.git').exists():
+            self._git('-C', worktree.as_posix(), 'clean', '--quiet', '-fdx')
+            self._git('-C', worktree.as_posix(), 'checkout', '--quiet', '--force', '--detach', commit)
+            return worktree
+
+        # Forget worktrees whose directories have been removed
+        self._git('-C', self.reference.as_posix(), 'worktree', 'prune')
+        if worktree.exists():
+            shutil.rmtree(worktree)
+
+        self.conanfile.output.info(f"Checking out '{commit[:12]}' into '{worktree.as_posix()}'...")
+        self._git('-C', self.reference.as_posix(), 'worktree', 'add', '--quiet', '--force', '--detach', worktree.as_posix(), commit)
+
+        return worktree
+
+# ================================================================================================================================== #
@@ -0,0 +1,312 @@
+# ====================================================================================================================================
+# @file       jobs.py
+# @author     Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @maintainer Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @date       Monday, 19th October 2026 4:31:40 pm
+# @modified   Monday, 19th October 2026 4:31:40 pm by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# 
+# 
+# @copyright Krzysztof Pierczyk © 2026
+# ====================================================================================================================================
+
+# ============================================================= Imports ============================================================ #
+
+# System imports
+import contextlib
+import os
+import pathlib
+import re
+import shlex
+import subprocess
+import threading
+import time
+# Private imports
+from gnu_toolchain.utils.disk import format_size
+
+# ======================================================== Helper functions ======================================================== #
+
+def _read_int(
+    path : pathlib.Path,
+) -> int | None:
+    """Reads integer from the file (returns None if the file does not exist or holds 'max')"""
+
+    try:
+        value = path.read_text().strip()
+    except OSError:
+        return None
+
+    return int(value) if value.isdigit() else None
+
+def _cgroup_dir() -> pathlib.Path | None:
+    """Returns directory of the cgroup v2 of the current process (None if not available)"""
+
+    try:
+        for line in pathlib.Path('/proc/self/cgroup').read_text().splitlines():
+            if line.startswith('0::'):
+                return pathlib.Path('/sys/fs/cgroup') / line[3:].lstrip('/')
+    except OSError:
+        pass
+
+    return None
+
+# ======================================================== available_memory ======================================================== #
+
+def available_memory() -> int | None:
+
+    """Returns memory available for new processes in bytes, i.e. MemAvailable of the system limited by
+    the remaining part of the cgroup limit (v2 or v1) of the current process. Returns None if it cannot
+    be determined (e.g. on non-Linux systems).
+    """
+
+    candidates = [ ]
+
+    # System-wide available memory
+    try:
+        meminfo = pathlib.Path('/proc/meminfo').read_text()
+        match = re.search(r'^MemAvailable:\s+(\d+) kB', meminfo, re.MULTILINE)
+        if match is not None:
+            candidates.append(int(match.group(1)) * 1024)
+    except OSError:
+        pass
+
+    # Limit of the cgroup v2 (and of its parents)
+    root   = pathlib.Path('/sys/fs/cgroup')
+    cgroup = _cgroup_dir()
+    while cgroup is not None:
+        limit   = _read_int(cgroup / 'memory.max')
+        current = _read_int(cgroup / 'memory.current')
+        if (limit is not None) and (current is not None):
+            candidates.append(max(0, limit - current))
+        if (cgroup == root) or (root not in cgroup.parents):
+            break
+        cgroup = cgroup.parent
+
+    # Limit of the cgroup v1
+    limit = _read_int(pathlib.Path('/sys/fs/cgroup/memory/memory.limit_in_bytes'))
+    usage = _read_int(pathlib.Path('/sys/fs/cgroup/memory/memory.usage_in_bytes'))
+    if (limit is not None) and (usage is not None) and (limit < (1 << 60)):
+        candidates.append(max(0, limit - usage))
+
+    return min(candidates) if candidates else None
+
+# ========================================================= memory_pressure ======================================================== #
+
+def memory_pressure() -> float | None:
+
+    """Returns percentage of time (averaged over last 10 seconds) in which some tasks were stalled
+    waiting for memory (PSI, Linux 4.20+). Returns None if not available.
+    """
+
+    try:
+        for line in pathlib.Path('/proc/pressure/memory').read_text().splitlines():
+            if line.startswith('some '):
+                return float(re.search(r'avg10=([\d.]+)', line).group(1))
+    except (OSError, AttributeError, ValueError):
+        pass
+
+    return None
+
+# ============================================================ plan_jobs =========================================================== #
+
+# Memory reserved by jobs of running stages (in bytes, mapped by reservations)
+_reservations      = { }
+_reservations_lock = threading.Lock()
+
+def _plan_jobs(
+    cores          : int,
+    memory_per_job : int | None,
+) -> tuple:
+
+    available = available_memory()
+    if available is not None:
+        available = max(0, available - sum(_reservations.values()))
+
+    jobs = max(1, cores)
+    if (memory_per_job is not None) and (available is not None):
+        jobs = max(1, min(jobs, available // (memory_per_job * 1024 * 1024)))
+
+    return (jobs, available)
+
+def plan_jobs(
+    cores          : int,
+    memory_per_job : int | None,
+) -> tuple:
+
+    """Computes number of make jobs from the number of `cores` available for the stage and memory
+    currently available for the build less memory reserved by stages running at the moment (`memory_per_job`
+    is given in MiB, memory is not taken into account if None). Returns (jobs, available memory) pair.
+    """
+
+    with _reservations_lock:
+        return _plan_jobs(cores, memory_per_job)
+
+@contextlib.contextmanager
+def reserve_jobs(
+    cores          : int,
+    memory_per_job : int | None,
+):
+    """Plans jobs of the stage (see `plan_jobs`) and reserves memory of these jobs until the context
+    exits so that stages planned in the meantime (e.g. built in parallel) do not count the same memory.
+    Yields (jobs, available memory) pair.
+    """
+
+    reservation = object()
+
+    with _reservations_lock:
+        jobs, available = _plan_jobs(cores, memory_per_job)
+        _reservations[reservation] = jobs * (memory_per_job or 0) * 1024 * 1024
+
+    try:
+        yield (jobs, available)
+    finally:
+        with _reservations_lock:
+            _reservations.pop(reservation, None)
+
+# ============================================================ Jobserver =========================================================== #
+
+class Jobserver:
+
+    """GNU make jobserver owned by the build driver. Make started with `makeflags` in the environment and
+    with the `redirection` applied to its command line acts as a client of the jobserver so the number of
+    parallel jobs may be changed while make is running. A monitor thread withdraws job slots when the
+    memory pressure (PSI) rises or available memory drops below the per-job estimate and returns them
+    once the pressure settles. Requires a POSIX system and GNU make 4.2 or newer.
+    """
+
+    # File descriptor used by make to access the jobserver's pipe
+    fd = 3
+
+    # Memory pressure (percent of stalled time) above which slots are withdrawn
+    high_pressure = 20.0
+    # Memory pressure below which slots are returned
+    low_pressure = 5.0
+    # Period of probing memory pressure [s]
+    interval = 1.0
+    # Minimal period between changes of the number of slots [s]
+    cooldown = 10.0
+
+    # Version of the make program (detected once)
+    _make_version = None
+
+    def __init__(self,
+        conanfile,
+        directory      : pathlib.Path,
+        name           : str,
+        slots          : int,
+        memory_per_job : int | None,
+    ):
+        self.conanfile      = conanfile
+        self.path           = pathlib.Path(directory) / '.jobserver'
+        self.name           = name
+        self.slots          = max(1, slots)
+        self.memory_per_job = memory_per_job
+
+        # Current number of slots (including the implicit one held by make)
+        self.current = self.slots
+        # Number of slots to be withdrawn when make returns tokens
+        self._debt   = 0
+
+        self._fd      = None
+        self._stop    = threading.Event()
+        self._monitor = None
+
+    @classmethod
+    def supported(cls,
+        conanfile,
+    ) -> bool:
+
+        """Checks whether the jobserver may be used (POSIX system with GNU make 4.2+)"""
+
+        if (os.name != 'posix') or (not hasattr(os, 'mkfifo')):
+            return False
+
+        if cls._make_version is None:
+            make = conanfile.conf.get('tools.gnu:make_program', default = 'make')
+            try:
+                output = subprocess.run(shlex.split(make) + [ '--version' ], stdout = subprocess.PIPE, stderr = subprocess.DEVNULL).stdout.decode()
+                match  = re.search(r'GNU Make (\d+)\.(\d+)', output)
+                cls._make_version = (int(match.group(1)), int(match.group(2))) if match else (0, 0)
+            except OSError:
+                cls._make_version = (0, 0)
+
+        return cls._make_version >= (4, 2)
+
+    # ------------------------------------------------------------------ #
+
+    @property
+    def makeflags(self) -> str:
+        return f'-j --jobserver-auth={self.fd},{self.fd}'
+
+    @property
+    def redirection(self) -> str:
+        return f'{self.fd}<>{shlex.quote(self.path.as_posix())}'
+
+    def __enter__(self):
+
+        self.path.unlink(missing_ok = True)
+        os.mkfifo(self.path)
+
+        # Keep the pipe open for the whole lifetime of the jobserver
+        self._fd = os.open(self.path, os.O_RDWR | os.O_NONBLOCK)
+        # Make holds one implicit slot
+        os.write(self._fd, b'+' * (self.slots - 1))
+
+        self._monitor = threading.Thread(target = self._monitor_pressure, daemon = True)
+        self._monitor.start()
+
+        return self
+
+    def __exit__(self, etype, value, traceback):
+        self._stop.set()
+        self._monitor.join()
+        os.close(self._fd)
+        self.path.unlink(missing_ok = True)
+
+    # ------------------------------------------------------------------ #
+
+    def _withdraw(self) -> bool:
+        try:
+            return len(os.read(self._fd, 1)) == 1
+        except BlockingIOError:
+            return False
+
+    def _monitor_pressure(self):
+
+        last_change = time.monotonic()
+
+        while not self._stop.wait(self.interval):
+
+            # Collect slots that could not be withdrawn immediately
+            while (self._debt > 0) and self._withdraw():
+                self._debt -= 1
+
+            pressure  = memory_pressure()
+            available = available_memory()
+            per_job   = (self.memory_per_job or 0) * 1024 * 1024
+
+            if time.monotonic() - last_change < self.cooldown:
+                continue
+
+            # Withdraw a slot if memory is scarce
+            if ((pressure is not None) and (pressure > self.high_pressure)) or ((available is not None) and (available < per_job)):
+                if self.current > 1:
+                    self.current -= 1
+                    if not self._withdraw():
+                        self._debt += 1
+                    last_change = time.monotonic()
+                    self.conanfile.output.warning(
+                        f"Memory pressure {pressure or 0:.1f}% (available: {format_size(available or 0)}): "
+                        f"reducing make jobs of '{self.name}' to {self.current}")
+
+            # Return a slot if the pressure settled
+            elif (self.current < self.slots) and ((pressure is None) or (pressure < self.low_pressure)) and \
+                 ((available is None) or (available > 2 * per_job)):
+                self.current += 1
+                if self._debt > 0:
+                    self._debt -= 1
+                else:
+                    os.write(self._fd, b'+')
+                last_change = time.monotonic()
+                self.conanfile.output.info(f"Memory pressure settled: increasing make jobs of '{self.name}' to {self.current}")
+
+# ================================================================================================================================== #
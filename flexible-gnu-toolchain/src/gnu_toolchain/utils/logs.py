@@ -0,0 +1,254 @@
+# ====================================================================================================================================
+# @file       logs.py
+# @author     Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @maintainer Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @date       Monday, 19th October 2026 3:24:51 pm
+# @modified   Monday, 19th October 2026 3:24:51 pm by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# 
+# 
+# @copyright Krzysztof Pierczyk © 2026
+# ====================================================================================================================================
+
+# ============================================================= Imports ============================================================ #
+
+# System imports
+import collections
+import gzip
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import threading
+import time
+# Private imports
+from gnu_toolchain.utils.timings import format_duration
+
+# ============================================================ Progress ============================================================ #
+
+class Progress:
+
+    """Live one-line indicator of stages whose output is captured into log files. Progress of all
+    stages running in parallel is rendered in a single line of the terminal. If the output is not
+    a terminal (e.g. on CI), a plain status line is printed every `interval` seconds instead.
+    """
+
+    # Minimal period of redrawing the line on terminals
+    refresh = 0.2
+    # Period of status lines on non-terminals
+    interval = 60
+
+    # Callable returning estimated remaining time of the build in seconds (or None)
+    eta = None
+
+    _lock    = threading.Lock()
+    _active  = { }
+    _drawn   = 0.0
+    _printed = 0.0
+
+    @classmethod
+    def update(cls,
+        log,
+        force : bool = False,
+    ):
+        with cls._lock:
+
+            cls._active[id(log)] = log
+
+            now = time.monotonic()
+            if sys.stderr.isatty():
+                if force or (now - cls._drawn >= cls.refresh):
+                    cls._draw()
+                    cls._drawn = now
+            elif force or (now - cls._printed >= cls.interval):
+                sys.stderr.write(f'{cls._describe()}\n')
+                sys.stderr.flush()
+                cls._printed = now
+
+    @classmethod
+    def finish(cls,
+        log,
+    ):
+        with cls._lock:
+            cls._active.pop(id(log), None)
+            if sys.stderr.isatty():
+                cls._draw()
+
+    @classmethod
+    def _describe(cls) -> str:
+
+        description = ' | '.join(
+            f'{log.name}: {log.step or "running"} ({log.lines} lines, {int(time.monotonic() - log.started)}s)'
+                for log in cls._active.values()
+        )
+
+        # Append estimated remaining time of the build
+        eta = cls.eta() if (cls.eta is not None) else None
+        if eta is not None:
+            description += f' | ETA {format_duration(eta)}'
+
+        return description
+
+    @classmethod
+    def _draw(cls):
+        width = shutil.get_terminal_size().columns
+        sys.stderr.write('\r\x1b[K' + cls._describe()[:max(0, width - 1)])
+        sys.stderr.flush()
+
+# ============================================================ StageLog ============================================================ #
+
+class StageLog:
+
+    """Compressed log of a stage. Output of all commands run by the stage is captured into the
+    `<build_folder>/logs/<stage>.log.zst` file (or `.log.gz` if the `zstd` tool is not available)
+    instead of being streamed to the console. Each command is written as a separate compressed
+    frame so the log may be read with `zstd -dc` (or `zcat`) even if the build is interrupted.
+    Last `tail_lines` lines are kept in memory to be printed if the command fails.
+    """
+
+    def __init__(self,
+        path       : pathlib.Path,
+        name       : str,
+        tail_lines : int = 50,
+    ):
+        # Use zstd if available, fall back to gzip otherwise
+        self.zstd = shutil.which('zstd')
+        self.path = pathlib.Path(path).with_name(f'{pathlib.Path(path).name}.log' + ('.zst' if self.zstd else '.gz'))
+        self.name = name
+
+        # Current step of the stage (displayed by the progress indicator)
+        self.step    = None
+        self.lines   = 0
+        self.started = time.monotonic()
+
+        self._tail = collections.deque(maxlen = tail_lines)
+
+    @staticmethod
+    def from_conanfile(
+        conanfile,
+        stage : str,
+        name  : str,
+    ):
+        """Creates log of the `stage` if requested by the `build_logs` option (returns None otherwise)"""
+
+        if str(conanfile.options.get_safe('build_logs', 'console')) != 'file':
+            return None
+
+        tail_lines = conanfile.options.get_safe('build_log_tail', None)
+        tail_lines = int(str(tail_lines)) if (str(tail_lines) != 'None') else 50
+
+        return StageLog(
+            path       = pathlib.Path(conanfile.build_folder) / 'logs' / stage,
+            name       = name,
+            tail_lines = tail_lines,
+        )
+
+    # ------------------------------------------------------------------ #
+
+    def capture(self,
+        command : str,
+        run,
+    ):
+        """Calls `run(stream)` which is expected to run the `command` with its output (stdout and
+        stderr) redirected to the `stream`. The output is compressed into the log file. Returns
+        result of `run`.
+        """
+
+        self.path.parent.mkdir(parents = True, exist_ok = True)
+
+        read_fd, write_fd = os.pipe()
+
+        with open(self.path, 'ab') as file:
+
+            # Start the compressor (a new frame is appended to the log)
+            compressor = None
+            if self.zstd:
+                compressor = subprocess.Popen([ self.zstd, '-q', '-3', '-T0', '-c' ], stdin = subprocess.PIPE, stdout = file)
+                sink = compressor.stdin
+            else:
+                sink = gzip.GzipFile(fileobj = file, mode = 'ab', compresslevel = 6)
+
+            sink.write(f'$ {command}\n'.encode())
+
+            def pump():
+                with os.fdopen(read_fd, 'rb') as source:
+                    for line in source:
+                        sink.write(line)
+                        self._tail.append(line.decode(errors = 'replace').rstrip('\r\n'))
+                        self.lines += 1
+                        Progress.update(self)
+
+            reader = threading.Thread(target = pump, daemon = True)
+            reader.start()
+
+            try:
+                with os.fdopen(write_fd, 'wb', buffering = 0) as stream:
+                    Progress.update(self, force = True)
+                    return run(stream)
+            finally:
+                reader.join()
+                sink.close()
+                if compressor is not None:
+                    compressor.wait()
+                Progress.finish(self)
+
+    # ------------------------------------------------------------------ #
+
+    def tail(self) -> list:
+        """Returns last lines of the log"""
+        return list(self._tail)
+
+    def report_failure(self,
+        conanfile,
+        build_dir  : pathlib.Path,
+        since      : float | None = None,
+    ):
+        """Prints tail of the log and the excerpt of the most recently modified `config.log` in the
+        `build_dir` (only if modified after `since` timestamp, if given)
+        """
+
+        conanfile.output.error(f"Last {len(self._tail)} lines of the '{self.name}' log ({self.path.as_posix()}):")
+        conanfile.output.write('\n'.join(self._tail) + '\n')
+
+        config_log = find_config_log(build_dir, since)
+        if config_log is not None:
+            conanfile.output.error(f"Excerpt of '{config_log.as_posix()}':")
+            conanfile.output.write('\n'.join(config_log_excerpt(config_log, self._tail.maxlen)) + '\n')
+
+# ======================================================== Helper functions ======================================================== #
+
+def find_config_log(
+    build_dir : pathlib.Path,
+    since     : float | None = None,
+) -> pathlib.Path | None:
+    """Returns the most recently modified `config.log` in the `build_dir` tree (or None)"""
+
+    latest = None
+    for root, dirs, files in os.walk(build_dir):
+        if 'config.log' in files:
+            path  = pathlib.Path(root) / 'config.log'
+            mtime = path.stat().st_mtime
+            if ((since is None) or (mtime >= since)) and ((latest is None) or (mtime > latest[0])):
+                latest = (mtime, path)
+
+    return latest[1] if (latest is not None) else None
+
+def config_log_excerpt(
+    path  : pathlib.Path,
+    lines : int = 50,
+) -> list:
+    """Returns last `lines` lines of the tests section of the `config.log` (i.e. lines preceding
+    the dump of cache variables, where the failing test is reported)
+    """
+
+    content = path.read_text(errors = 'replace').splitlines()
+
+    # Cut the dump of cache variables and output variables
+    for index, line in enumerate(content):
+        if line.startswith('## Cache variables.'):
+            content = content[:max(0, index - 1)]
+            break
+
+    return content[-lines:]
+
+# ================================================================================================================================== #
@@ -0,0 +1,245 @@
+# ====================================================================================================================================
+# @file       manifest.py
+# @author     Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @maintainer Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @date       Monday, 19th October 2026 5:48:03 pm
+# @modified   Monday, 19th October 2026 5:48:03 pm by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# 
+# 
+# @copyright Krzysztof Pierczyk © 2026
+# ====================================================================================================================================
+
+# ============================================================= Imports ============================================================ #
+
+# System imports
+import concurrent.futures
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import time
+# Private imports
+from gnu_toolchain.utils.disk import format_size
+
+# ======================================================== Helper functions ======================================================== #
+
+def hash_file(
+    path : pathlib.Path,
+) -> str:
+    """Returns SHA-256 digest of the file"""
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+# ========================================================= InstallManifest ======================================================== #
+
+class InstallManifest:
+
+    """Manifest of files installed by a stage. Stages are installed with DESTDIR pointing to the staging
+    tree (`<build_folder>/staging/<stage>`) which is then merged into install trees. The merge records
+    path (relative to the build folder), size and SHA-256 digest of each installed file in the
+    `<build_folder>/manifests/<stage>.json` file and reports conflicts, i.e. files previously installed
+    by other stages with different contents.
+    """
+
+    def __init__(self,
+        build_folder : pathlib.Path,
+        stage        : str,
+        jobs         : int | None = None,
+    ):
+        self.build_folder = pathlib.Path(build_folder)
+        self.stage        = stage
+        self.jobs         = jobs or os.cpu_count() or 1
+
+        # Staging tree passed as DESTDIR to install targets
+        self.destdir = self.build_folder / 'staging' / stage
+        # Manifest file of the stage
+        self.path    = self.manifests_dir(self.build_folder) / f'{stage.replace("/", "_")}.json'
+
+    @staticmethod
+    def from_conanfile(
+        conanfile,
+        stage : str,
+    ):
+        """Creates manifest of the `stage` (returns None if staged installs are disabled with the `staged_install`
+        option or not supported, i.e. on Windows where DESTDIR cannot be prepended to prefixes with drive letters)
+        """
+
+        if str(conanfile.options.get_safe('staged_install', False)) != 'True':
+            return None
+        if conanfile.settings.os == 'Windows':
+            return None
+
+        return InstallManifest(conanfile.build_folder, stage)
+
+    @staticmethod
+    def manifests_dir(
+        build_folder : pathlib.Path,
+    ) -> pathlib.Path:
+        return pathlib.Path(build_folder) / 'manifests'
+
+    @staticmethod
+    def load_all(
+        build_folder : pathlib.Path,
+    ) -> dict:
+        """Returns { stage : manifest } dictionary of all manifests of the build"""
+
+        result = { }
+
+        directory = InstallManifest.manifests_dir(build_folder)
+        if directory.exists():
+            for path in sorted(directory.glob('*.json')):
+                try:
+                    manifest = json.loads(path.read_text())
+                except (OSError, ValueError):
+                    continue
+                result[manifest['stage']] = manifest
+
+        return result
+
+    # ------------------------------------------------------------------ #
+
+    def staged(self,
+        path : pathlib.Path,
+    ) -> pathlib.Path:
+        """Returns location of the `path` (absolute) in the staging tree"""
+        return pathlib.Path(self.destdir.as_posix() + pathlib.Path(path).as_posix())
+
+    def load(self) -> dict:
+        try:
+            return json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return { 'stage' : self.stage, 'files' : { }, 'symlinks' : { } }
+
+    def save(self,
+        manifest : dict,
+    ):
+        self.path.parent.mkdir(parents = True, exist_ok = True)
+        tmp_path = self.path.with_name(f'{self.path.name}.tmp')
+        tmp_path.write_text(json.dumps(manifest, indent = 4, sort_keys = True))
+        os.replace(tmp_path, self.path)
+
+    def reset(self):
+        """Drops the manifest and leftovers of the staging tree (before the stage is re-installed)"""
+
+        self.path.unlink(missing_ok = True)
+        if self.destdir.exists():
+            shutil.rmtree(self.destdir.as_posix())
+
+    # ------------------------------------------------------------------ #
+
+    def merge(self,
+        conanfile,
+        root : pathlib.Path,
+    ) -> dict:
+
+        """Moves content of the staging tree corresponding to the `root` (absolute path of install trees)
+        into install trees and records it in the manifest. Returns statistics of the merge.
+        """
+
+        start  = time.monotonic()
+        staged = self.staged(root)
+        root   = pathlib.Path(root)
+
+        stats = { 'files' : 0, 'size' : 0, 'conflicts' : [ ] }
+
+        if not staged.exists():
+            shutil.rmtree(self.destdir.as_posix(), ignore_errors = True)
+            return stats
+
+        # Collect staged files and symbolic links
+        files    = [ ]
+        symlinks = [ ]
+        for directory, dirs, names in os.walk(staged):
+            directory = pathlib.Path(directory)
+            for name in list(dirs):
+                if (directory / name).is_symlink():
+                    symlinks.append(directory / name)
+                    dirs.remove(name)
+            for name in names:
+                (symlinks if (directory / name).is_symlink() else files).append(directory / name)
+
+        # Hash files in parallel (hardlinked files are hashed once)
+        inodes = { }
+        for path in files:
+            stat = path.stat()
+            inodes.setdefault((stat.st_dev, stat.st_ino), (path, stat.st_size))
+        with concurrent.futures.ThreadPoolExecutor(max_workers = self.jobs) as executor:
+            digests = dict(zip(inodes.keys(), executor.map(hash_file, [ path for path, _ in inodes.values() ])))
+
+        # Find owners of files installed by other stages
+        owners = { }
+        for stage, manifest in self.load_all(self.build_folder).items():
+            if stage != self.stage:
+                for path, entry in manifest['files'].items():
+                    owners[path] = (stage, entry['sha256'])
+
+        manifest = self.load()
+
+        # Move files into install trees
+        for path in files:
+
+            stat     = path.stat()
+            digest   = digests[(stat.st_dev, stat.st_ino)]
+            target   = root / path.relative_to(staged)
+            relative = target.relative_to(self.build_folder).as_posix()
+
+            # Report files overwritten with different contents
+            if (relative in owners) and (owners[relative][1] != digest):
+                stats['conflicts'].append({ 'path' : relative, 'stages' : [ owners[relative][0], self.stage ] })
+                conanfile.output.warning(f"'{relative}' installed by '{owners[relative][0]}' is overwritten by '{self.stage}' with different contents")
+
+            target.parent.mkdir(parents = True, exist_ok = True)
+            os.replace(path, target)
+
+            manifest['files'][relative] = { 'size' : stat.st_size, 'mtime_ns' : stat.st_mtime_ns, 'sha256' : digest }
+            manifest['symlinks'].pop(relative, None)
+            stats['files'] += 1
+            stats['size']  += stat.st_size
+
+        # Recreate symbolic links
+        for path in symlinks:
+
+            target   = root / path.relative_to(staged)
+            relative = target.relative_to(self.build_folder).as_posix()
+
+            target.parent.mkdir(parents = True, exist_ok = True)
+            if target.is_symlink() or target.is_file():
+                target.unlink()
+            elif target.is_dir():
+                shutil.rmtree(target.as_posix())
+            target.symlink_to(os.readlink(path))
+
+            manifest['symlinks'][relative] = os.readlink(path)
+            manifest['files'].pop(relative, None)
+
+        self.save(manifest)
+
+        # Anything left outside of install trees is not merged
+        shutil.rmtree(staged.as_posix())
+        leftovers = [ path for path in self.destdir.rglob('*') if not path.is_dir() ]
+        if leftovers:
+            conanfile.output.warning(f"Files installed outside of install trees by '{self.stage}' are ignored (e.g. '{leftovers[0].as_posix()}')")
+        shutil.rmtree(self.destdir.as_posix(), ignore_errors = True)
+
+        conanfile.output.info(
+            f"Merged {stats['files']} files ({format_size(stats['size'])}) of '{self.stage}' into install trees "
+            f"in {time.monotonic() - start:.1f}s" + (f" ({len(stats['conflicts'])} conflicts)" if stats['conflicts'] else "")
+        )
+
+        return stats
+
+    def prune(self):
+        """Drops entries of files that no longer exist (e.g. removed by the cleanup)"""
+
+        manifest = self.load()
+        manifest['files']    = { path : entry  for path, entry  in manifest['files'].items()    if (self.build_folder / path).is_file() }
+        manifest['symlinks'] = { path : target for path, target in manifest['symlinks'].items() if (self.build_folder / path).is_symlink() }
+        self.save(manifest)
+
+# ================================================================================================================================== #
@@ -0,0 +1,268 @@
+# ====================================================================================================================================
+# @file       prefix_snapshots.py
+# @author     Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @maintainer Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @date       Monday, 19th October 2026 5:12:26 pm
+# @modified   Monday, 19th October 2026 5:12:26 pm by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# 
+# 
+# @copyright Krzysztof Pierczyk © 2026
+# ====================================================================================================================================
+
+# ============================================================= Imports ============================================================ #
+
+# System imports
+import json
+import os
+import pathlib
+import shutil
+import time
+# Private imports
+from gnu_toolchain.utils.disk import format_size
+from gnu_toolchain.utils.files import reflink
+
+# ========================================================= PrefixSnapshots ======================================================== #
+
+class PrefixSnapshots:
+
+    """Snapshots of the install trees (`<build_folder>/install`) taken after each successful stage. Files are
+    cloned with reflinks if the filesystem supports them. Otherwise small files are copied and large ones are
+    hardlinked (install rules replace files rather than modifying them in place; sizes and modification times
+    of hardlinked files are recorded and verified before the snapshot is restored).
+
+    When a stage fails in the middle of the installation, the install trees are marked as dirty and rolled back
+    to the latest snapshot when the build is resumed. When the last installed stage(s) are re-run, the install
+    trees are rolled back to the snapshot preceding them.
+    """
+
+    # Files smaller than this are copied rather than hardlinked
+    copy_size_limit = 64 * 1024
+
+    def __init__(self,
+        root      : pathlib.Path,
+        directory : pathlib.Path,
+    ):
+        self.root      = pathlib.Path(root)
+        self.directory = pathlib.Path(directory)
+
+        # Whether reflinks are supported by the filesystem (detected on first use)
+        self._reflinks = None
+
+    @staticmethod
+    def from_conanfile(
+        conanfile,
+    ):
+        """Creates snapshots manager of the build (returns None if disabled with the `prefix_snapshots` option)"""
+
+        if str(conanfile.options.get_safe('prefix_snapshots', False)) != 'True':
+            return None
+
+        return PrefixSnapshots(
+            root      = pathlib.Path(conanfile.build_folder) / 'install',
+            directory = pathlib.Path(conanfile.build_folder) / 'snapshots',
+        )
+
+    @staticmethod
+    def clear(
+        conanfile,
+    ):
+        """Removes all snapshots of the build (e.g. once install trees have been moved away), whether or not
+        snapshots are enabled
+        """
+
+        shutil.rmtree((pathlib.Path(conanfile.build_folder) / 'snapshots').as_posix(), ignore_errors = True)
+
+    # ------------------------------------------------------------------ #
+
+    @property
+    def _index_path(self):
+        return self.directory / 'index.json'
+
+    @property
+    def _dirty_path(self):
+        return self.directory / '.dirty'
+
+    def _load_index(self) -> list:
+        try:
+            return json.loads(self._index_path.read_text())
+        except (OSError, ValueError):
+            return [ ]
+
+    def _save_index(self, index : list):
+        self.directory.mkdir(parents = True, exist_ok = True)
+        tmp_path = self._index_path.with_name(f'{self._index_path.name}.tmp')
+        tmp_path.write_text(json.dumps(index, indent = 4))
+        os.replace(tmp_path, self._index_path)
+
+    # ------------------------------------------------------------------ #
+
+    def mark_dirty(self,
+        stage : str,
+    ):
+        """Marks install trees as being modified by the `stage`"""
+
+        self.directory.mkdir(parents = True, exist_ok = True)
+        self._dirty_path.write_text(stage)
+
+    def take(self,
+        conanfile,
+        stage : str,
+    ):
+        """Takes snapshot of install trees after the `stage` succeeded (clears the dirty mark)"""
+
+        start = time.monotonic()
+
+        index = [ entry for entry in self._load_index() if entry['stage'] != stage ]
+        name  = f'{len(index):03d}-{stage.replace("/", "_")}'
+        path  = self.directory / name
+
+        if path.exists():
+            shutil.rmtree(path.as_posix())
+
+        stats = self._clone(self.root, path)
+
+        index.append({ 'stage' : stage, 'name' : name, 'files' : stats['files'] })
+        self._save_index(index)
+        self._dirty_path.unlink(missing_ok = True)
+
+        conanfile.output.info(
+            f"Install trees snapshotted after '{stage}' in {time.monotonic() - start:.1f}s "
+            f"({stats['reflinked']} reflinked, {stats['linked']} hardlinked, {stats['copied']} copied, "
+            f"{format_size(stats['copied_size'])} of copies)"
+        )
+
+    def recover(self,
+        conanfile,
+        needs_install,
+    ):
+        """Rolls back install trees before stages are run. If the trees are dirty, they are restored from the
+        latest snapshot. Then, as long as the stage of the latest snapshot is going to be re-installed (i.e.
+        `needs_install(stage)` returns True), the snapshot is dropped and trees are restored from the previous one.
+        """
+
+        index  = self._load_index()
+        dirty  = self._dirty_path.exists()
+        rerun  = [ ]
+
+        # Drop snapshots of trailing stages that are going to be re-installed
+        while index and needs_install(index[-1]['stage']):
+            rerun.append(index.pop()['stage'])
+
+        if (not dirty) and (not rerun):
+            return
+
+        if dirty:
+            conanfile.output.warning(f"Install trees have been left dirty by '{self._dirty_path.read_text().strip()}'")
+        if rerun:
+            conanfile.output.info(f"Stages {list(reversed(rerun))} are going to be re-installed")
+
+        self.rollback(conanfile, index[-1] if index else None)
+
+        # Remove dropped snapshots
+        for entry in self._load_index()[len(index):]:
+            shutil.rmtree((self.directory / entry['name']).as_posix(), ignore_errors = True)
+        self._save_index(index)
+        self._dirty_path.unlink(missing_ok = True)
+
+    def rollback(self,
+        conanfile,
+        entry : dict | None,
+    ):
+        """Restores install trees from the snapshot described by the index `entry` (empties them if None)"""
+
+        start = time.monotonic()
+
+        # Verify that hardlinked files have not been modified in place
+        if entry is not None:
+            snapshot = self.directory / entry['name']
+            for relative, (size, mtime) in entry['files'].items():
+                stat = (snapshot / relative).stat(follow_symlinks = False)
+                if (stat.st_size != size) or (stat.st_mtime_ns != mtime):
+                    raise RuntimeError(
+                        f"Snapshot of '{entry['stage']}' is no longer valid ('{relative}' has been modified in place). "
+                        f"Remove '{self.root.as_posix()}' and the build tags to rebuild from scratch.")
+
+        # Remove current trees
+        if self.root.exists():
+            shutil.rmtree(self.root.as_posix())
+
+        # Restore the snapshot
+        if entry is not None:
+            self._clone(self.directory / entry['name'], self.root)
+        else:
+            self.root.mkdir(parents = True, exist_ok = True)
+
+        conanfile.output.success(
+            f"Install trees rolled back to " + (f"the snapshot of '{entry['stage']}'" if (entry is not None) else "the empty state") +
+            f" in {time.monotonic() - start:.1f}s"
+        )
+
+    # ------------------------------------------------------------------ #
+
+    def _clone(self,
+        src : pathlib.Path,
+        dst : pathlib.Path,
+    ) -> dict:
+
+        """Clones the `src` tree into `dst`. Returns statistics and { path : (size, mtime) } dictionary
+        of hardlinked files.
+        """
+
+        stats = { 'reflinked' : 0, 'linked' : 0, 'copied' : 0, 'copied_size' : 0, 'files' : { } }
+
+        dst.mkdir(parents = True, exist_ok = True)
+        if not src.exists():
+            return stats
+
+        directories = [ ]
+
+        for root, dirs, files in os.walk(src):
+
+            root     = pathlib.Path(root)
+            dst_root = dst / root.relative_to(src)
+
+            # Recreate symbolic links to directories (os.walk does not follow them)
+            for name in list(dirs):
+                if (root / name).is_symlink():
+                    (dst_root / name).symlink_to(os.readlink(root / name))
+                    dirs.remove(name)
+                else:
+                    (dst_root / name).mkdir(exist_ok = True)
+                    directories.append((root / name, dst_root / name))
+
+            for name in files:
+
+                src_path = root / name
+                dst_path = dst_root / name
+                stat     = src_path.stat(follow_symlinks = False)
+
+                if src_path.is_symlink():
+                    dst_path.symlink_to(os.readlink(src_path))
+                    continue
+
+                # Prefer copy-on-write clones
+                if self._reflinks is not False:
+                    if reflink(src_path, dst_path):
+                        self._reflinks = True
+                        stats['reflinked'] += 1
+                        continue
+                    self._reflinks = False
+
+                # Copy small files (may be modified in place, e.g. the info directory)
+                if stat.st_size < self.copy_size_limit:
+                    shutil.copy2(src_path, dst_path, follow_symlinks = False)
+                    stats['copied']      += 1
+                    stats['copied_size'] += stat.st_size
+                # Hardlink large ones
+                else:
+                    os.link(src_path, dst_path, follow_symlinks = False)
+                    stats['linked'] += 1
+                    stats['files'][(dst_path.relative_to(dst)).as_posix()] = (stat.st_size, stat.st_mtime_ns)
+
+        # Preserve attributes of directories
+        for src_dir, dst_dir in directories:
+            shutil.copystat(src_dir, dst_dir, follow_symlinks = False)
+
+        return stats
+
+# ================================================================================================================================== #
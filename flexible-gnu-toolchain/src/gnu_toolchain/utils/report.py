@@ -0,0 +1,74 @@
+# ====================================================================================================================================
+# @file       report.py
+# @author     Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @maintainer Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @date       Monday, 19th October 2026 11:20:05 am
+# @modified   Monday, 19th October 2026 11:20:05 am by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# 
+# 
+# @copyright Krzysztof Pierczyk © 2026
+# ====================================================================================================================================
+
+# ============================================================= Imports ============================================================ #
+
+# System imports
+import json
+import os
+import pathlib
+import threading
+# Private imports
+from gnu_toolchain.utils.common import merge_dicts
+
+# =========================================================== BuildReport ========================================================== #
+
+class BuildReport:
+
+    """Persistent report of the build stages stored in the `<build>/build/report.json` file.
+    The report maps stage identifiers (e.g. 'gcc_base' or 'arm-none-eabi/gcc_base') to records
+    holding information like step durations, disk usage or stage cache hits. Records are kept
+    across resumed builds, i.e. each run updates only records of steps it has actually run.
+    """
+
+    # Lock serializing updates of reports (stages may be built by parallel workers)
+    _lock = threading.Lock()
+
+    def __init__(self,
+        conanfile,
+    ):
+        self.path = pathlib.Path(conanfile.build_folder) / 'build' / 'report.json'
+
+    # ------------------------------------------------------------------ #
+
+    def load(self) -> dict:
+        try:
+            return json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return { }
+
+    def update(self,
+        stage : str,
+        **fields,
+    ):
+        """Merges `fields` into the record of the `stage` (nested dictionaries are merged recursively)"""
+
+        with self._lock:
+
+            report = self.load()
+            # Update the record
+            report[stage] = merge_dicts(report.get(stage, { }), fields, list_policy = 'replace')
+
+            # Save the report atomically
+            self.path.parent.mkdir(parents = True, exist_ok = True)
+            tmp_path = self.path.with_name(f'{self.path.name}.{os.getpid()}.tmp')
+            tmp_path.write_text(json.dumps(report, indent = 4, sort_keys = True))
+            os.replace(tmp_path, self.path)
+
+    def add_step(self,
+        stage    : str,
+        step     : str,
+        duration : float,
+    ):
+        """Records duration of the `step` of the `stage` (in seconds)"""
+        self.update(stage, steps = { step : round(duration, 3) })
+
+# ================================================================================================================================== #
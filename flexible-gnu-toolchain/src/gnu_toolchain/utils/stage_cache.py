@@ -0,0 +1,457 @@
+# ====================================================================================================================================
+# @file       stage_cache.py
+# @author     Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @maintainer Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @date       Monday, 19th October 2026 11:41:52 am
+# @modified   Monday, 19th October 2026 11:41:52 am by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# 
+# 
+# @copyright Krzysztof Pierczyk © 2026
+# ====================================================================================================================================
+
+# ============================================================= Imports ============================================================ #
+
+# System imports
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import tarfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import concurrent.futures
+# Conan imports
+from conan.errors import ConanException
+# Private imports
+from gnu_toolchain.utils.files import extract_tar, is_within
+from gnu_toolchain.utils.download import sha256sum
+
+# ======================================================== RemoteStageCache ======================================================== #
+
+class RemoteStageCache:
+
+    """Client of the remote stage cache. The protocol is a plain HTTP GET/PUT of `<url>/<key>.tar.gz`
+    and `<url>/<key>.json` files (metadata is uploaded last and marks the artifact as complete). If the
+    GNU_TOOLCHAIN_STAGE_CACHE_TOKEN environment variable is set, it is sent as a bearer token.
+    """
+
+    def __init__(self,
+        url       : str,
+        read_only : bool  = False,
+        timeout   : float = 60,
+    ):
+        self.url       = url.rstrip('/')
+        self.read_only = read_only
+        self.timeout   = timeout
+
+    def _request(self,
+        method : str,
+        name   : str,
+        data         = None,
+        headers      = { },
+    ):
+        token = os.environ.get('GNU_TOOLCHAIN_STAGE_CACHE_TOKEN', None)
+        if token:
+            headers = headers | { 'Authorization' : f'Bearer {token}' }
+
+        request = urllib.request.Request(f'{self.url}/{name}', data = data, method = method, headers = headers)
+        return urllib.request.urlopen(request, timeout = self.timeout)
+
+    def download(self,
+        key      : str,
+        archive  : pathlib.Path,
+        metadata : pathlib.Path,
+    ) -> int | None:
+
+        """Downloads the artifact into the `archive` and `metadata` paths. Returns number of downloaded
+        bytes or None if the artifact is not available. The archive is verified against the SHA256 digest
+        recorded in the metadata before it is published in the local cache (raises ValueError on mismatch).
+        """
+
+        try:
+            with self._request('GET', f'{key}.json') as response:
+                metadata_content = response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+
+        archive.parent.mkdir(parents = True, exist_ok = True)
+
+        # Download the archive under the temporary name
+        tmp_archive = archive.with_name(f'{archive.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            with self._request('GET', f'{key}.tar.gz') as response, open(tmp_archive, 'wb') as file:
+                shutil.copyfileobj(response, file, 1024 * 1024)
+            size = tmp_archive.stat().st_size
+            # Verify the archive
+            expected = json.loads(metadata_content).get('sha256', None)
+            if expected is None:
+                raise ValueError(f"metadata of '{key}' does not record the digest of the artifact")
+            digest = sha256sum(tmp_archive)
+            if digest != expected:
+                raise ValueError(f"SHA256 mismatch of '{key}.tar.gz' (expected: {expected}, got: {digest})")
+            os.replace(tmp_archive, archive)
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+        finally:
+            tmp_archive.unlink(missing_ok = True)
+
+        # Publish metadata last
+        tmp_metadata = metadata.with_name(f'{metadata.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        tmp_metadata.write_bytes(metadata_content)
+        os.replace(tmp_metadata, metadata)
+
+        return size + len(metadata_content)
+
+    def upload(self,
+        key      : str,
+        archive  : pathlib.Path,
+        metadata : pathlib.Path,
+    ) -> int:
+        """Uploads the artifact. Returns number of uploaded bytes"""
+
+        with open(archive, 'rb') as file:
+            size = archive.stat().st_size
+            self._request('PUT', f'{key}.tar.gz', data = file, headers = {
+                'Content-Type'   : 'application/gzip',
+                'Content-Length' : str(size),
+            }).close()
+
+        content = metadata.read_bytes()
+        self._request('PUT', f'{key}.json', data = content, headers = { 'Content-Type' : 'application/json' }).close()
+
+        return size + len(content)
+
+# =========================================================== StageCache =========================================================== #
+
+class StageCache:
+
+    """Cache of stage artifacts shared by builds on the machine (e.g. by entries of the build matrix).
+
+    Each stage is identified by the key computed from all of its inputs (sources, configuration, environment,
+    host settings, dependencies) and keys of all stages it depends on in the same build (stages install
+    into the shared prefix so the result of a stage depends on the content left by its predecessors). Artifact
+    of the stage is a tarball of files added or modified in the install trees (paths relative to the build
+    folder) accompanied by a JSON file with metadata (e.g. list of paths removed by the stage). Text files
+    referring to the build folder are relocated when the artifact is restored into a different build folder.
+
+    Layout of the cache:
+
+        <root>/<key[:2]>/<key>.tar.gz
+        <root>/<key[:2]>/<key>.json
+    """
+
+    # Keys of stages computed so far by the build (per build folder, mapped by stage identifiers)
+    _keys      = { }
+    _keys_lock = threading.Lock()
+
+    # Uploads to remote caches run in the background (pending uploads are kept per build folder)
+    _uploads          = { }
+    _uploads_executor = None
+
+    def __init__(self,
+        root   : pathlib.Path,
+        remote : RemoteStageCache | None = None,
+    ):
+        self.root   = pathlib.Path(root)
+        self.remote = remote
+
+    @staticmethod
+    def from_conanfile(
+        conanfile,
+    ):
+        """Returns stage cache configured for the package (None, if the cache is disabled)"""
+
+        root = conanfile.options.get_safe('stage_cache_dir')
+        url  = conanfile.options.get_safe('stage_cache_url')
+
+        # Configure the remote cache
+        remote = None
+        if (url is not None) and (str(url) != 'None'):
+            remote = RemoteStageCache(str(url),
+                read_only = (str(conanfile.options.get_safe('stage_cache_mode')) == 'read-only')
+            )
+
+        # Use local cache in the build folder if only the remote one is configured
+        if (root is None) or (str(root) == 'None'):
+            if remote is None:
+                return None
+            root = pathlib.Path(conanfile.build_folder) / 'stage-cache'
+
+        return StageCache(str(root), remote)
+
+    # ------------------------------------------------------------------ #
+
+    @classmethod
+    def reset_keys(cls,
+        conanfile,
+    ):
+        with cls._keys_lock:
+            cls._keys[conanfile.build_folder] = { }
+
+    @classmethod
+    def get_keys(cls,
+        conanfile,
+        stages : list,
+    ) -> list:
+        """Returns keys of `stages` (stage identifiers) of the build"""
+
+        with cls._keys_lock:
+            keys = cls._keys.get(conanfile.build_folder, { })
+            missing = [ stage for stage in stages if stage not in keys ]
+            if missing:
+                raise RuntimeError(f"[StageCache][BUG] Keys of stages {missing} requested before they were computed")
+            return [ keys[stage] for stage in stages ]
+
+    @classmethod
+    def register_key(cls,
+        conanfile,
+        stage : str,
+        key   : str,
+    ):
+        with cls._keys_lock:
+            cls._keys.setdefault(conanfile.build_folder, { })[stage] = key
+
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def compute_key(
+        inputs       : dict,
+        placeholders : dict = { },
+    ) -> str:
+
+        """Computes key of the stage from its `inputs`. Strings being keys of `placeholders` are replaced
+        with the corresponding values before hashing (used to make keys independent of the build folder
+        and locations of dependencies).
+        """
+
+        serialized = json.dumps(inputs, sort_keys = True, default = str)
+        # Replace machine-specific paths (longest first in case paths are nested)
+        for path in sorted(placeholders.keys(), key = len, reverse = True):
+            serialized = serialized.replace(path, placeholders[path])
+
+        return hashlib.sha256(serialized.encode()).hexdigest()
+
+    @staticmethod
+    def snapshot(
+        root : pathlib.Path,
+        dirs : list,
+    ) -> dict:
+
+        """Returns dictionary mapping paths of files (and symbolic links) residing in `dirs` (relative to the `root`)
+        to their (size, modification time) pairs
+        """
+
+        result = { }
+
+        pending = [ pathlib.Path(d) for d in dirs if pathlib.Path(d).exists() ]
+        while pending:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks = False):
+                        pending.append(entry.path)
+                    else:
+                        stat = entry.stat(follow_symlinks = False)
+                        result[pathlib.Path(entry.path).relative_to(root).as_posix()] = (stat.st_size, stat.st_mtime_ns)
+
+        return result
+
+    # ------------------------------------------------------------------ #
+
+    # Maximal size of text files checked for references to the build folder
+    relocatable_size_limit = 1024 * 1024
+
+    @classmethod
+    def _refers_to(cls,
+        path : pathlib.Path,
+        text : str,
+    ) -> bool:
+
+        if path.is_symlink() or (not path.is_file()) or (path.stat().st_size > cls.relocatable_size_limit):
+            return False
+
+        content = path.read_bytes()
+        # Skip binary files (paths embedded in them cannot be safely rewritten)
+        if b'\0' in content[:8192]:
+            return False
+
+        return text.encode() in content
+
+    def _paths(self, key):
+        base = self.root / key[:2] / key
+        return (base.with_name(f'{key}.tar.gz'), base.with_name(f'{key}.json'))
+
+    def lookup(self,
+        key : str,
+    ) -> dict | None:
+        """Returns metadata of the artifact identified by the `key` (None if it is not cached)"""
+
+        archive, metadata = self._paths(key)
+        if not (archive.exists() and metadata.exists()):
+            return None
+
+        try:
+            return json.loads(metadata.read_text())
+        except ValueError:
+            return None
+
+    def fetch(self,
+        key : str,
+    ) -> dict | None:
+
+        """Downloads the artifact identified by the `key` from the remote cache into the local one. Returns
+        dictionary describing the transfer (size, duration) or None if the artifact is not available remotely.
+        """
+
+        if self.remote is None:
+            return None
+
+        start = time.monotonic()
+
+        archive, metadata = self._paths(key)
+        size = self.remote.download(key, archive, metadata)
+        if size is None:
+            return None
+
+        return { 'size' : size, 'duration' : round(time.monotonic() - start, 3) }
+
+    def upload(self,
+        conanfile,
+        key      : str,
+        callback = None,
+    ) -> concurrent.futures.Future | None:
+
+        """Schedules upload of the artifact identified by the `key` to the remote cache (unless the remote
+        cache is not configured or is read-only). Once the upload finishes, `callback` is called with the
+        dictionary describing the transfer (size, duration) or with the exception raised by the upload.
+        """
+
+        if (self.remote is None) or self.remote.read_only:
+            return None
+
+        def process():
+
+            start = time.monotonic()
+
+            try:
+                archive, metadata = self._paths(key)
+                result = { 'size' : self.remote.upload(key, archive, metadata), 'duration' : round(time.monotonic() - start, 3) }
+            except Exception as e:
+                result = e
+
+            if callback is not None:
+                callback(result)
+
+            return result
+
+        with self._keys_lock:
+            if StageCache._uploads_executor is None:
+                StageCache._uploads_executor = concurrent.futures.ThreadPoolExecutor(max_workers = 4)
+            future = StageCache._uploads_executor.submit(process)
+            self._uploads.setdefault(conanfile.build_folder, [ ]).append(future)
+
+        return future
+
+    @classmethod
+    def wait_for_uploads(cls,
+        conanfile,
+    ) -> list:
+        """Waits for all uploads scheduled by the build. Returns list of their results"""
+
+        with cls._keys_lock:
+            futures = cls._uploads.pop(conanfile.build_folder, [ ])
+
+        return [ future.result() for future in futures ]
+
+    def restore(self,
+        key         : str,
+        destination : pathlib.Path,
+    ) -> dict | None:
+
+        """Restores the artifact identified by the `key` into the `destination` (build folder). Returns
+        metadata of the artifact or None if the artifact is not cached.
+        """
+
+        metadata = self.lookup(key)
+        if metadata is None:
+            return None
+
+        archive, _ = self._paths(key)
+
+        # Extract the artifact
+        extract_tar(archive, destination)
+        # Remove paths removed by the stage (metadata of remote artifacts is not trusted)
+        for path in metadata.get('removed', [ ]):
+            if pathlib.PurePath(path).is_absolute() or ('..' in pathlib.PurePath(path).parts) or \
+               not is_within(destination, (pathlib.Path(destination) / path).parent):
+                raise ConanException(f"Unsafe path '{path}' removed by the cached artifact '{key}'")
+            path = pathlib.Path(destination) / path
+            if path.is_dir() and not path.is_symlink():
+                shutil.rmtree(path.as_posix(), ignore_errors = True)
+            elif path.exists() or path.is_symlink():
+                path.unlink()
+
+        # Relocate text files referring to the build folder the artifact has been created in
+        source      = metadata.get('source', None)
+        destination = pathlib.Path(destination).as_posix()
+        if (source is not None) and (source != destination):
+            for file in metadata.get('relocatable', [ ]):
+                path = pathlib.Path(destination) / file
+                path.write_bytes(path.read_bytes().replace(source.encode(), destination.encode()))
+
+        return metadata
+
+    def store(self,
+        key      : str,
+        source   : pathlib.Path,
+        files    : list,
+        removed  : list,
+        metadata : dict,
+    ) -> dict:
+
+        """Stores `files` (paths relative to the `source` directory) as the artifact identified by the `key`.
+        `removed` lists paths removed by the stage. Returns metadata of the stored artifact.
+        """
+
+        archive, metadata_path = self._paths(key)
+        archive.parent.mkdir(parents = True, exist_ok = True)
+
+        start = time.monotonic()
+
+        # Create the archive under the temporary name (concurrent builds may store the same key)
+        relocatable = [ ]
+        tmp_archive = archive.with_name(f'{archive.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        with tarfile.open(tmp_archive.as_posix(), 'w:gz', compresslevel = 1) as tar:
+            for file in sorted(files):
+                path = pathlib.Path(source) / file
+                tar.add(path.as_posix(), arcname = file, recursive = False)
+                # Find text files referring to the build folder (e.g. libtool archives, pkg-config files)
+                if self._refers_to(path, pathlib.Path(source).as_posix()):
+                    relocatable.append(file)
+
+        metadata = metadata | {
+            'key'         : key,
+            'source'      : pathlib.Path(source).as_posix(),
+            'relocatable' : relocatable,
+            'removed'     : sorted(removed),
+            'files'       : len(files),
+            'size'        : tmp_archive.stat().st_size,
+            'sha256'      : sha256sum(tmp_archive),
+            'duration'    : round(time.monotonic() - start, 3),
+        }
+
+        # Publish the artifact (metadata last, it marks the artifact as complete)
+        tmp_metadata = metadata_path.with_name(f'{metadata_path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        tmp_metadata.write_text(json.dumps(metadata, indent = 4, sort_keys = True))
+        os.replace(tmp_archive, archive)
+        os.replace(tmp_metadata, metadata_path)
+
+        return metadata
+
+# ================================================================================================================================== #
@@ -0,0 +1,387 @@
+# ====================================================================================================================================
+# @file       timings.py
+# @author     Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @maintainer Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @date       Monday, 19th October 2026 7:05:37 pm
+# @modified   Monday, 19th October 2026 7:05:37 pm by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# 
+# 
+# @copyright Krzysztof Pierczyk © 2026
+# ====================================================================================================================================
+
+# ============================================================= Imports ============================================================ #
+
+# System imports
+import contextlib
+import json
+import os
+import pathlib
+import platform
+import shlex
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+# Private imports
+from gnu_toolchain.utils.files import locked
+
+# ======================================================== Helper functions ======================================================== #
+
+def format_duration(
+    seconds : float,
+) -> str:
+    """Formats the duration given in seconds into the human-readable string (e.g. '1h 02m', '3m 15s')"""
+
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f'{seconds // 3600}h {(seconds % 3600) // 60:02d}m'
+    if seconds >= 60:
+        return f'{seconds // 60}m {seconds % 60:02d}s'
+
+    return f'{seconds}s'
+
+# ========================================================== CommandUsage ========================================================== #
+
+class CommandUsage:
+
+    """Accumulates CPU time (user + system) and peak RSS of commands run by a stage. Each command is run by a small
+    Python wrapper waiting for it with `os.wait4`, so that only the command (and its descendants) is measured, unlike
+    with `RUSAGE_CHILDREN` of the whole process which also covers commands of stages built in parallel and reports
+    the peak RSS of all children since the start of the process. On systems without `os.wait4` (or if Conan does
+    not run from a Python interpreter) commands are not wrapped and the usage is unknown.
+    """
+
+    # Wrapper running the command (argv[2]) with the shell and saving its usage into the argv[1] file
+    wrapper = '; '.join([
+        'import json, os, signal, sys',
+        'signal.signal(signal.SIGINT, signal.SIG_IGN)',
+        "pid = os.posix_spawn('/bin/sh', [ 'sh', '-c', sys.argv[2] ], os.environ, setsigdef = [ signal.SIGINT ])",
+        '_, status, usage = os.wait4(pid, 0)',
+        "json.dump({ 'cpu_time' : usage.ru_utime + usage.ru_stime, 'max_rss' : usage.ru_maxrss }, open(sys.argv[1], 'w'))",
+        'code = os.waitstatus_to_exitcode(status)',
+        'sys.exit(code if (code >= 0) else (128 - code))',
+    ])
+
+    # Whether commands can be measured on this system
+    supported = hasattr(os, 'wait4') and hasattr(os, 'posix_spawn') and not getattr(sys, 'frozen', False)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forgets usage of commands measured so far"""
+
+        with self._lock:
+            self._commands = 0
+            self._cpu_time = 0.0
+            self._max_rss  = 0
+
+    def get(self) -> dict:
+        """Returns CPU time and peak RSS of commands measured since the last reset (empty if none was measured)"""
+
+        with self._lock:
+            if self._commands == 0:
+                return { }
+            return { 'cpu_time' : self._cpu_time, 'max_rss' : self._max_rss }
+
+    @contextlib.contextmanager
+    def measure(self,
+        command : str,
+    ):
+        """Yields the shell `command` wrapped so that its usage is recorded once it completes (the `command`
+        itself if measuring is not supported)
+        """
+
+        if not self.supported:
+            yield command
+            return
+
+        handle, path = tempfile.mkstemp(prefix = 'usage-', suffix = '.json')
+        os.close(handle)
+
+        try:
+            yield f'{shlex.quote(sys.executable)} -c {shlex.quote(self.wrapper)} {shlex.quote(path)} {shlex.quote(command)}'
+            # Usage is not saved if the command could not be started at all
+            try:
+                usage = json.loads(pathlib.Path(path).read_text() or 'null')
+            except (OSError, ValueError):
+                usage = None
+            if usage is not None:
+                with self._lock:
+                    self._commands += 1
+                    self._cpu_time += usage['cpu_time']
+                    self._max_rss   = max(self._max_rss, usage['max_rss'])
+        finally:
+            pathlib.Path(path).unlink(missing_ok = True)
+
+# ========================================================= TimingDatabase ========================================================= #
+
+class TimingDatabase:
+
+    """Local SQLite database of durations and resource usage of steps run by builds. Records are keyed by
+    the stage (name of the stage, component and its version), the step and the host (node name, architecture
+    and number of CPUs) so that predictions made on a shared runner are based on its own history.
+    """
+
+    # Number of latest records used for predictions
+    history = 5
+
+    schema = '''
+        CREATE TABLE IF NOT EXISTS steps (
+            host      TEXT    NOT NULL,
+            component TEXT    NOT NULL,
+            version   TEXT    NOT NULL,
+            stage     TEXT    NOT NULL,
+            target    TEXT,
+            step      TEXT    NOT NULL,
+            duration  REAL    NOT NULL,
+            cpu_time  REAL,
+            max_rss   INTEGER,
+            jobs      INTEGER,
+            timestamp REAL    NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS steps_key ON steps (component, stage, step, host, version);
+    '''
+
+    def __init__(self,
+        path : pathlib.Path,
+    ):
+        self.path = pathlib.Path(path)
+        self.host = f'{platform.node()}/{platform.machine()}/{os.cpu_count()}'
+
+        # Create the database
+        self.path.parent.mkdir(parents = True, exist_ok = True)
+        with locked(self.path.with_name(f'{self.path.name}.lock')):
+            with self._connect() as connection:
+                connection.executescript(self.schema)
+
+    @staticmethod
+    def from_conanfile(
+        conanfile,
+    ):
+        """Opens the database of the build (`timings_db` option, `<build_folder>/timings.sqlite` by default)"""
+
+        path = conanfile.options.get_safe('timings_db')
+        path = pathlib.Path(str(path)).expanduser() if (str(path) != 'None') else (pathlib.Path(conanfile.build_folder) / 'timings.sqlite')
+
+        return TimingDatabase(path)
+
+    def _connect(self):
+        return sqlite3.connect(self.path.as_posix(), timeout = 60)
+
+    # ------------------------------------------------------------------ #
+
+    def record(self,
+        component : str,
+        version   : str,
+        stage     : str,
+        target    : str | None,
+        step      : str,
+        duration  : float,
+        cpu_time  : float | None = None,
+        max_rss   : int | None   = None,
+        jobs      : int | None   = None,
+    ):
+        """Records duration (and resource usage) of the step"""
+
+        with self._connect() as connection:
+            connection.execute(
+                'INSERT INTO steps VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (self.host, component, version, stage, target, step, duration, cpu_time, max_rss, jobs, time.time())
+            )
+
+    def is_empty(self) -> bool:
+        """Checks whether no step has been recorded yet (i.e. nothing can be predicted)"""
+
+        with self._connect() as connection:
+            return connection.execute('SELECT 1 FROM steps LIMIT 1').fetchone() is None
+
+    def predict(self,
+        component : str,
+        version   : str,
+        stage     : str,
+        step      : str,
+    ) -> float | None:
+
+        """Predicts duration of the step as a median of latest records of the same stage on the same host
+        (falling back to other versions of the component and then to other hosts). Returns None if the
+        step has never been recorded.
+        """
+
+        queries = [
+            ('host = ? AND version = ?', (self.host, version)),
+            ('host = ?',                 (self.host,)),
+            ('1',                        ()),
+        ]
+
+        with self._connect() as connection:
+            for condition, parameters in queries:
+                durations = [ row[0] for row in connection.execute(
+                    f'SELECT duration FROM steps WHERE component = ? AND stage = ? AND step = ? AND {condition} '
+                    f'ORDER BY timestamp DESC LIMIT ?',
+                    (component, stage, step, *parameters, self.history)
+                ) ]
+                if durations:
+                    return statistics.median(durations)
+
+        return None
+
+# ============================================================ BuildPlan =========================================================== #
+
+class BuildPlan:
+
+    """Plan of the build, i.e. list of steps of all stages with their status ('done' if the step's tag exists,
+    'cached' if the stage is going to be restored from the stage cache, 'run' otherwise) and predicted durations.
+    While the plan is being collected (`collect()`), stages only add their steps to the plan instead of being built.
+    During the build the plan is used to estimate the remaining time (`eta()`). Plans collected only for the
+    estimation are `offline`, i.e. stages do not fetch anything to find out their status.
+    """
+
+    # Plans of builds (kept per build folder)
+    _plans = { }
+    _lock  = threading.Lock()
+
+    def __init__(self,
+        offline : bool = False,
+    ):
+        self.entries    = [ ]
+        self.collecting = True
+        self.offline    = offline
+
+        # Steps completed during the build and the currently running ones
+        self._completed = set()
+        self._running   = { }
+
+    # ------------------------------------------------------------------ #
+
+    @classmethod
+    def collect(cls,
+        conanfile,
+        offline : bool = False,
+    ):
+        """Starts collecting the plan of the build"""
+
+        with cls._lock:
+            plan = cls._plans[conanfile.build_folder] = BuildPlan(offline)
+
+        return plan
+
+    @classmethod
+    def get(cls,
+        conanfile,
+    ):
+        """Returns the plan of the build (None if not collected)"""
+
+        with cls._lock:
+            return cls._plans.get(conanfile.build_folder)
+
+    @classmethod
+    def is_collecting(cls,
+        conanfile,
+    ) -> bool:
+        plan = cls.get(conanfile)
+        return (plan is not None) and plan.collecting
+
+    @classmethod
+    def is_collecting_offline(cls,
+        conanfile,
+    ) -> bool:
+        plan = cls.get(conanfile)
+        return (plan is not None) and plan.collecting and plan.offline
+
+    @classmethod
+    def drop(cls,
+        conanfile,
+    ):
+        with cls._lock:
+            cls._plans.pop(conanfile.build_folder, None)
+
+    # ------------------------------------------------------------------ #
+
+    def add(self,
+        stage     : str,
+        name      : str,
+        step      : str,
+        status    : str,
+        predicted : float | None,
+    ):
+        with self._lock:
+            self.entries.append({ 'stage' : stage, 'name' : name, 'step' : step, 'status' : status, 'predicted' : predicted })
+
+    def start_step(self,
+        stage : str,
+        step  : str,
+    ):
+        with self._lock:
+            self._running[(stage, step)] = time.monotonic()
+
+    def complete_step(self,
+        stage : str,
+        step  : str,
+    ):
+        with self._lock:
+            self._running.pop((stage, step), None)
+            self._completed.add((stage, step))
+
+    def complete_stage(self,
+        stage : str,
+    ):
+        with self._lock:
+            for entry in self.entries:
+                if entry['stage'] == stage:
+                    self._running.pop((stage, entry['step']), None)
+                    self._completed.add((stage, entry['step']))
+
+    def eta(self) -> float | None:
+
+        """Estimates remaining time of the build (sum of predictions of steps to be run, reduced by the time
+        already spent in running steps). Returns None if no predictions are available.
+        """
+
+        with self._lock:
+
+            remaining = None
+            now       = time.monotonic()
+            for entry in self.entries:
+                key = (entry['stage'], entry['step'])
+                if (entry['status'] != 'run') or (entry['predicted'] is None) or (key in self._completed):
+                    continue
+                elapsed   = (now - self._running[key]) if (key in self._running) else 0
+                remaining = (remaining or 0) + max(0, entry['predicted'] - elapsed)
+
+            return remaining
+
+    # ------------------------------------------------------------------ #
+
+    def show(self,
+        conanfile,
+    ):
+        """Prints the plan of the build"""
+
+        conanfile.output.highlight("Build plan:")
+
+        total   = 0
+        unknown = 0
+        for entry in self.entries:
+            if entry['status'] == 'run':
+                if entry['predicted'] is None:
+                    unknown += 1
+                    predicted = 'unknown'
+                else:
+                    total    += entry['predicted']
+                    predicted = format_duration(entry['predicted'])
+            else:
+                predicted = '-'
+            conanfile.output.info(f"  {entry['stage']:<40} {entry['step']:<16} {entry['status']:<8} {predicted:>10}")
+
+        steps = sum(1 for entry in self.entries if entry['status'] == 'run')
+        conanfile.output.highlight(
+            f"{steps} steps to run, predicted duration: {format_duration(total)}" +
+            (f" (+{unknown} steps without history)" if unknown else "") +
+            " (upper bound if stages are built in parallel)"
+        )
+
+# ================================================================================================================================== #
@@ -0,0 +1,107 @@
+# ====================================================================================================================================
+# @file       stage_cache_server.py
+# @author     Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @maintainer Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# @date       Monday, 19th October 2026 2:02:44 pm
+# @modified   Monday, 19th October 2026 2:02:44 pm by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+# 
+# 
+# @copyright Krzysztof Pierczyk © 2026
+# ====================================================================================================================================
+
+"""
+Minimal HTTP server implementing the remote stage cache protocol (GET/HEAD/PUT of `<key>.tar.gz` and `<key>.json`
+files). Intended for testing and for small setups (e.g. a single machine serving CI runners in the local network).
+
+Usage:
+
+    python stage_cache_server.py <directory> [--host 0.0.0.0] [--port 8080] [--read-only]
+"""
+
+# ============================================================= Imports ============================================================ #
+
+# System imports
+import argparse
+import functools
+import http.server
+import os
+import pathlib
+import re
+import threading
+
+# ============================================================= Handler ============================================================ #
+
+class StageCacheHandler(http.server.SimpleHTTPRequestHandler):
+
+    # Names of files that may be stored in the cache
+    name_pattern = re.compile(r'^/[0-9a-f]{64}\.(tar\.gz|json)$')
+
+    def __init__(self, *args, read_only = False, **kwargs):
+        self.read_only = read_only
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        if not self.name_pattern.match(self.path):
+            self.send_error(404)
+            return
+        super().do_GET()
+
+    def do_HEAD(self):
+        if not self.name_pattern.match(self.path):
+            self.send_error(404)
+            return
+        super().do_HEAD()
+
+    def do_PUT(self):
+
+        if self.read_only:
+            self.send_error(403, 'Cache is read-only')
+            return
+        if not self.name_pattern.match(self.path):
+            self.send_error(400, 'Invalid artifact name')
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        path   = pathlib.Path(self.directory) / self.path.lstrip('/')
+
+        # Receive the file under the temporary name and publish it atomically
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            with open(tmp_path, 'wb') as file:
+                while length > 0:
+                    block = self.rfile.read(min(length, 1024 * 1024))
+                    if not block:
+                        break
+                    file.write(block)
+                    length -= len(block)
+            if length != 0:
+                self.send_error(400, 'Incomplete upload')
+                return
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok = True)
+
+        self.send_response(201)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+# ============================================================== Main ============================================================== #
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'Serves the remote stage cache over HTTP')
+    parser.add_argument('directory', type = pathlib.Path, help = 'Directory holding artifacts')
+    parser.add_argument('--host', default = '127.0.0.1', help = 'Address to listen on')
+    parser.add_argument('--port', default = 8080, type = int, help = 'Port to listen on')
+    parser.add_argument('--read-only', action = 'store_true', help = 'Reject uploads')
+    args = parser.parse_args()
+
+    args.directory.mkdir(parents = True, exist_ok = True)
+
+    handler = functools.partial(StageCacheHandler, directory = args.directory.as_posix(), read_only = args.read_only)
+    server  = http.server.ThreadingHTTPServer((args.host, args.port), handler)
+
+    print(f'Serving stage cache from {args.directory.as_posix()} on http://{args.host}:{server.server_port}')
+    server.serve_forever()
+
+# ================================================================================================================================== #
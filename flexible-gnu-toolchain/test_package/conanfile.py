@@ -11,16 +11,46 @@
 
 # ============================================================ Imports ============================================================= #
 
+# System imports
+import concurrent.futures
+import json
+import os
+import pathlib
+import subprocess
+import time
 # Conan imports
 from conan import ConanFile
+from conan.errors import ConanException
 from conan.tools.layout import basic_layout
 
 # ============================================================ Script ============================================================== #
 
 class GnuToolchainConan(ConanFile):
-    
+
     settings = [ 'os', 'compiler', 'build_type', 'arch' ]
 
+    # Programs linked by the code-size benchmark (src/benchmark/<name>)
+    benchmark_programs = [
+        'printf.c',
+        'containers.cpp',
+        'malloc.c',
+    ]
+
+    # Variants of the C library linked by the code-size benchmark
+    benchmark_variants = {
+        'standard' : [ ],
+        'nano'     : [ '--specs=nano.specs' ],
+    }
+
+    # Flags common to all benchmark programs (typical firmware build)
+    benchmark_flags = [
+        '-Os',
+        '-ffunction-sections',
+        '-fdata-sections',
+        '-Wl,--gc-sections',
+        '--specs=nosys.specs',
+    ]
+
     # ------------------------------------------------------------------ #
 
     def build_requirements(self):
@@ -28,7 +58,7 @@ class GnuToolchainConan(ConanFile):
 
     def layout(self):
         basic_layout(self, src_folder="src")
-        
+
     def build(self):
         self.run(' '.join([
             'arm-none-eabi-g++', f'{self.source_folder}/main.cpp',
@@ -40,4 +70,243 @@ class GnuToolchainConan(ConanFile):
                 '--mfloat-abi=hard',
         ]))
 
+        # Measure code size of representative programs (if enabled)
+        if self.conf.get('user.gnu_toolchain:code_size', default = False, check_type = bool):
+            self._benchmark_code_size()
+        # Measure startup time of toolchain executables
+        self._benchmark_startup()
+
+    # ------------------------------------------------------------------ #
+
+    def _benchmark_code_size(self):
+
+        """Links benchmark programs for every multilib of every target (reported by -print-multi-lib) against standard
+        and nano variants of the C library in parallel (enabled with the `user.gnu_toolchain:code_size` conf). Sizes
+        of .text/.data/.bss sections are saved in the `<build_folder>/code-size.json` file. If the `user.gnu_toolchain:code_size_baseline` conf points to results
+        of a previous build, sizes exceeding the baseline by more than `user.gnu_toolchain:code_size_tolerance`
+        percent (1 by default) fail the test.
+        """
+
+        toolchain = self.dependencies.build[self.tested_reference_str]
+        bin_dir   = pathlib.Path(toolchain.package_folder) / 'bin'
+        targets   = [ target.strip() for target in str(toolchain.options.target).split(',') if target.strip() ]
+        out_dir   = pathlib.Path(self.build_folder) / 'code-size'
+
+        # Compile list of programs to be linked
+        jobs = [ ]
+        for target in targets:
+            for multilib, flags in self._get_multilibs(bin_dir, target):
+                for variant, variant_flags in self.benchmark_variants.items():
+                    for program in self.benchmark_programs:
+                        jobs.append((target, multilib, variant, program, flags + variant_flags))
+
+        def link(job):
+
+            target, multilib, variant, program, flags = job
+
+            compiler = bin_dir / (f'{target}-g++' if program.endswith('.cpp') else f'{target}-gcc')
+            output   = out_dir / target / multilib.replace('/', '_') / variant / f'{pathlib.Path(program).stem}.elf'
+            output.parent.mkdir(parents = True, exist_ok = True)
+
+            result = subprocess.run([
+                compiler.as_posix(), (pathlib.Path(self.source_folder) / 'benchmark' / program).as_posix(),
+                    '-o', output.as_posix(),
+                    *self.benchmark_flags,
+                    *([ '-fno-exceptions', '-fno-rtti' ] if program.endswith('.cpp') else [ ]),
+                    *flags,
+            ],
+                stdout = subprocess.PIPE,
+                stderr = subprocess.STDOUT,
+            )
+            if result.returncode != 0:
+                return { 'error' : result.stdout.decode(errors = 'replace').strip() }
+
+            try:
+                return self._get_sections_size(bin_dir / f'{target}-size', output)
+            except (subprocess.CalledProcessError, IndexError, ValueError) as e:
+                return { 'error' : f"Failed to read sizes of '{output.as_posix()}': {e}" }
+
+        # Link programs in parallel
+        with concurrent.futures.ThreadPoolExecutor(max_workers = os.cpu_count() or 1) as executor:
+            sizes = list(executor.map(link, jobs))
+
+        results = { }
+        for (target, multilib, variant, program, _), size in zip(jobs, sizes):
+            results.setdefault(target, { }).setdefault(multilib, { }).setdefault(variant, { })[program] = size
+
+        # Save results
+        results_path = pathlib.Path(self.build_folder) / 'code-size.json'
+        results_path.write_text(json.dumps(results, indent = 4, sort_keys = True))
+        self.output.info(f"Code-size benchmark results saved to '{results_path.as_posix()}'")
+
+        # Print summary (average sizes over multilibs)
+        for target in results:
+            for variant in self.benchmark_variants:
+                for program in self.benchmark_programs:
+                    entries = [ results[target][multilib][variant][program] for multilib in results[target] ]
+                    entries = [ entry for entry in entries if 'error' not in entry ]
+                    if entries:
+                        self.output.info(
+                            f"[{target}] {variant:>8} {program:<16} " +
+                            ' '.join(f"{section}: {sum(entry[section] for entry in entries) // len(entries):>7}" for section in [ 'text', 'data', 'bss' ]) +
+                            f" (average of {len(entries)} multilibs)"
+                        )
+
+        # Report failures
+        failures = [ ]
+        for (target, multilib, variant, program, _), size in zip(jobs, sizes):
+            if 'error' in size:
+                self.output.error(f"Failed to link '{program}' for '{target}/{multilib}' ({variant}):\n{size['error']}")
+                failures.append(f"{target}/{multilib}/{variant}/{program}")
+        if failures:
+            raise ConanException(f"Code-size benchmark failed for {len(failures)} programs (e.g. {failures[0]})")
+
+        # Compare with the baseline
+        baseline = self.conf.get('user.gnu_toolchain:code_size_baseline', default = None)
+        if baseline is not None:
+            self._compare_code_size(results, json.loads(pathlib.Path(baseline).read_text()))
+
+    def _compare_code_size(self,
+        results  : dict,
+        baseline : dict,
+    ):
+        """Fails if any section of any program grew by more than the tolerance compared to the `baseline`"""
+
+        tolerance   = float(self.conf.get('user.gnu_toolchain:code_size_tolerance', default = 1.0))
+        regressions = [ ]
+
+        for target, multilibs in results.items():
+            for multilib, variants in multilibs.items():
+                for variant, programs in variants.items():
+                    for program, size in programs.items():
+                        reference = baseline.get(target, { }).get(multilib, { }).get(variant, { }).get(program)
+                        if (reference is None) or ('error' in reference):
+                            continue
+                        for section in [ 'text', 'data', 'bss' ]:
+                            if size[section] > reference[section] * (1 + tolerance / 100):
+                                regressions.append(f"{target}/{multilib}/{variant}/{program} .{section}: {reference[section]} -> {size[section]}")
+
+        for regression in regressions:
+            self.output.error(f"Code size regression: {regression}")
+        if regressions:
+            raise ConanException(f"Code size of {len(regressions)} sections exceeds the baseline by more than {tolerance}%")
+
+        self.output.success(f"Code size within {tolerance}% of the baseline")
+
+    def _benchmark_startup(self):
+
+        """Runs trivial invocations of toolchain executables (compilation of empty C/C++ files, assembling an empty file
+        and relocatable linking) `user.gnu_toolchain:startup_runs` times each (disabled by default) in parallel and
+        measures the average CPU time (user + system) and wall time of a single run, which are dominated by the
+        startup of processes (loading and relocation of shared libraries). Results are saved in the
+        `<build_folder>/startup.json` file. If the `user.gnu_toolchain:startup_baseline` conf points to results of
+        another build (e.g. one with different `host_linkage`), both are compared.
+        """
+
+        runs = int(self.conf.get('user.gnu_toolchain:startup_runs', default = 0))
+        if runs <= 0:
+            return
+
+        try:
+            import resource
+        except ImportError:
+            resource = None
+
+        toolchain = self.dependencies.build[self.tested_reference_str]
+        bin_dir   = pathlib.Path(toolchain.package_folder) / 'bin'
+        target    = [ target.strip() for target in str(toolchain.options.target).split(',') if target.strip() ][0]
+        work_dir  = pathlib.Path(self.build_folder) / 'startup'
+        work_dir.mkdir(parents = True, exist_ok = True)
+
+        # Prepare empty inputs
+        for name in [ 'empty.c', 'empty.cpp', 'empty.s' ]:
+            (work_dir / name).write_text('')
+        subprocess.run([ (bin_dir / f'{target}-gcc').as_posix(), '-c', 'empty.c', '-o', 'empty.o' ], cwd = work_dir, check = True)
+
+        commands = {
+            'gcc -c' : lambda output: [ (bin_dir / f'{target}-gcc').as_posix(), '-c', 'empty.c',   '-o', output ],
+            'g++ -c' : lambda output: [ (bin_dir / f'{target}-g++').as_posix(), '-c', 'empty.cpp', '-o', output ],
+            'as'     : lambda output: [ (bin_dir / f'{target}-as').as_posix(),        'empty.s',   '-o', output ],
+            'ld -r'  : lambda output: [ (bin_dir / f'{target}-ld').as_posix(), '-r', 'empty.o',   '-o', output ],
+        }
+
+        workers = os.cpu_count() or 1
+        results = { }
+        for name, command in commands.items():
+
+            def run(index):
+                subprocess.run(command(f'out-{index}.o'), cwd = work_dir, check = True)
+
+            cpu_start  = resource.getrusage(resource.RUSAGE_CHILDREN) if (resource is not None) else None
+            wall_start = time.monotonic()
+            with concurrent.futures.ThreadPoolExecutor(max_workers = workers) as executor:
+                list(executor.map(run, range(runs)))
+            wall = time.monotonic() - wall_start
+            cpu  = resource.getrusage(resource.RUSAGE_CHILDREN) if (resource is not None) else None
+
+            results[name] = {
+                # Wall time of a single run (runs are spread over all CPUs, unless there are fewer of them)
+                'wall_ms' : round(1000 * wall * min(workers, runs) / runs, 3),
+                'cpu_ms'  : round(1000 * ((cpu.ru_utime - cpu_start.ru_utime) + (cpu.ru_stime - cpu_start.ru_stime)) / runs, 3) if (cpu is not None) else None,
+            }
+
+        results = {
+            'host_linkage' : str(toolchain.options.get_safe('host_linkage')),
+            'runs'         : runs,
+            'commands'     : results,
+        }
+
+        # Save results
+        results_path = pathlib.Path(self.build_folder) / 'startup.json'
+        results_path.write_text(json.dumps(results, indent = 4, sort_keys = True))
+        self.output.info(f"Startup benchmark results saved to '{results_path.as_posix()}'")
+
+        # Print summary (compared with the baseline, if given)
+        baseline = self.conf.get('user.gnu_toolchain:startup_baseline', default = None)
+        baseline = json.loads(pathlib.Path(baseline).read_text()) if (baseline is not None) else None
+        for name, result in results['commands'].items():
+            line = f"[{results['host_linkage']}] {name:<8} cpu: {result['cpu_ms'] or 0:>8.3f} ms  wall: {result['wall_ms']:>8.3f} ms"
+            reference = (baseline or { }).get('commands', { }).get(name)
+            if reference is not None:
+                for metric in [ 'cpu_ms', 'wall_ms' ]:
+                    if result[metric] and reference.get(metric):
+                        line += f"  {metric.removesuffix('_ms')} vs [{baseline['host_linkage']}]: {100 * (result[metric] / reference[metric] - 1):+.1f}%"
+            self.output.info(line)
+
+    @staticmethod
+    def _get_multilibs(
+        bin_dir : pathlib.Path,
+        target  : str,
+    ) -> list:
+        """Returns list of (directory, flags) pairs of multilibs reported by `-print-multi-lib`"""
+
+        output = subprocess.run([ (bin_dir / f'{target}-gcc').as_posix(), '-print-multi-lib' ],
+            check  = True,
+            stdout = subprocess.PIPE,
+        ).stdout.decode()
+
+        multilibs = [ ]
+        for line in output.splitlines():
+            directory, _, flags = line.strip().partition(';')
+            if directory:
+                multilibs.append((directory, [ f'-{flag}' for flag in flags.split('@') if flag ]))
+
+        return multilibs
+
+    @staticmethod
+    def _get_sections_size(
+        size_path : pathlib.Path,
+        elf_path  : pathlib.Path,
+    ) -> dict:
+        """Returns sizes of .text, .data and .bss sections of the ELF file (Berkeley format of the size tool)"""
+
+        output = subprocess.run([ size_path.as_posix(), '--format=berkeley', elf_path.as_posix() ],
+            check  = True,
+            stdout = subprocess.PIPE,
+        ).stdout.decode()
+
+        text, data, bss = output.splitlines()[1].split()[:3]
+
+        return { 'text' : int(text), 'data' : int(data), 'bss' : int(bss) }
+
 # ================================================================================================================================== #
@@ -0,0 +1,45 @@
+/* ============================================================================================================================ *//**
+ * @file       containers.cpp
+ * @author     Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+ * @maintainer Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+ * @date       Monday, 19th October 2026 6:41:12 pm
+ * @modified   Monday, 19th October 2026 6:41:12 pm by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+ * 
+ * @brief Code-size benchmark: C++ standard containers and algorithms
+ * 
+ * @copyright Krzysztof Pierczyk © 2026
+ */// ============================================================================================================================= */
+
+/* =========================================================== Includes =========================================================== */
+
+#include <algorithm>
+#include <cstdio>
+#include <map>
+#include <string>
+#include <vector>
+
+/* ============================================================= Main ============================================================= */
+
+int main() {
+
+    // Dynamic arrays and sorting
+    std::vector<int> values { 5, 3, 9, 1, 7 };
+    for (int i = 0; i < 16; ++i) {
+        values.push_back((i * 37) % 11);
+    }
+    std::sort(values.begin(), values.end());
+
+    // Associative containers with string keys
+    std::map<std::string, int> counters;
+    for (auto value : values) {
+        counters["key" + std::to_string(value % 4)] += value;
+    }
+
+    for (const auto &[key, counter] : counters) {
+        std::printf("%s: %d\n", key.c_str(), counter);
+    }
+
+    return static_cast<int>(values.size() - counters.size());
+}
+
+/* ================================================================================================================================ */
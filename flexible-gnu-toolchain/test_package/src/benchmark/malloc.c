@@ -0,0 +1,75 @@
+/* ============================================================================================================================ *//**
+ * @file       malloc.c
+ * @author     Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+ * @maintainer Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+ * @date       Monday, 19th October 2026 6:41:12 pm
+ * @modified   Monday, 19th October 2026 6:41:12 pm by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+ * 
+ * @brief Code-size benchmark: dynamic memory (heap-heavy firmware)
+ * 
+ * @copyright Krzysztof Pierczyk © 2026
+ */// ============================================================================================================================= */
+
+/* =========================================================== Includes =========================================================== */
+
+#include <stdlib.h>
+#include <string.h>
+
+/* ============================================================= Main ============================================================= */
+
+/* Node of the singly-linked list */
+struct node {
+    struct node *next;
+    size_t size;
+    unsigned char payload[];
+};
+
+int main(void) {
+
+    struct node *head = NULL;
+    size_t total = 0;
+
+    /* Allocate nodes of varying sizes */
+    for (size_t i = 1; i <= 32; ++i) {
+        struct node *node = malloc(sizeof(struct node) + i * 8);
+        if (node == NULL) {
+            return 1;
+        }
+        node->size = i * 8;
+        memset(node->payload, (int) i, node->size);
+        node->next = head;
+        head = node;
+    }
+
+    /* Grow a buffer */
+    unsigned char *buffer = NULL;
+    for (size_t size = 16; size <= 1024; size *= 2) {
+        unsigned char *grown = realloc(buffer, size);
+        if (grown == NULL) {
+            free(buffer);
+            return 1;
+        }
+        buffer = grown;
+        memset(buffer, 0, size);
+    }
+    free(buffer);
+
+    /* Zero-initialized table */
+    unsigned *table = calloc(64, sizeof(*table));
+    if (table != NULL) {
+        total += table[0];
+        free(table);
+    }
+
+    /* Release the list */
+    while (head != NULL) {
+        struct node *next = head->next;
+        total += head->size;
+        free(head);
+        head = next;
+    }
+
+    return (int) (total & 0xFF);
+}
+
+/* ================================================================================================================================ */
@@ -0,0 +1,48 @@
+/* ============================================================================================================================ *//**
+ * @file       printf.c
+ * @author     Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+ * @maintainer Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+ * @date       Monday, 19th October 2026 6:41:12 pm
+ * @modified   Monday, 19th October 2026 6:41:12 pm by Krzysztof Pierczyk (krzysztof.pierczyk@gmail.com)
+ * 
+ * @brief Code-size benchmark: formatted I/O (typical logging/CLI firmware)
+ * 
+ * @copyright Krzysztof Pierczyk © 2026
+ */// ============================================================================================================================= */
+
+/* =========================================================== Includes =========================================================== */
+
+#include <stdio.h>
+#include <string.h>
+#include <stdint.h>
+#include <inttypes.h>
+
+/* ============================================================= Main ============================================================= */
+
+/* Simulated sensor readings */
+static volatile int32_t readings[] = { 12, -7, 1024, 65535, -32768 };
+
+int main(void) {
+
+    char buffer[128];
+    int value;
+    char unit[8];
+
+    /* Integer, hex and string formatting */
+    for (unsigned i = 0; i < sizeof(readings) / sizeof(readings[0]); ++i) {
+        printf("reading[%u] = %" PRId32 " (0x%08" PRIx32 ")\n", i, readings[i], (uint32_t) readings[i]);
+    }
+
+    /* Formatting into buffers */
+    snprintf(buffer, sizeof(buffer), "%-10s|%5d|%lld", "status", 42, (long long) readings[3] * 100000);
+    puts(buffer);
+
+    /* Parsing */
+    if (sscanf("temp 25 C", "temp %d %7s", &value, unit) == 2) {
+        printf("parsed: %d %s (%u chars)\n", value, unit, (unsigned) strlen(unit));
+    }
+
+    return 0;
+}
+
+/* ================================================================================================================================ */